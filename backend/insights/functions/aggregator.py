@@ -12,6 +12,7 @@ import sys
 import time
 import boto3
 import math
+from operator import mul
 from typing import Dict, Any, List, Optional
 from decimal import Decimal
 from aws_lambda_powertools import Logger
@@ -22,11 +23,15 @@ from botocore.exceptions import ClientError
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'shared'))
 
 from dynamodb_helpers import extract_reading_from_stream_record
-from idempotency import generate_reading_id, is_aggregate_processed, mark_aggregate_processed_if_absent
+from idempotency import (
+    generate_reading_id,
+    mark_aggregate_processed_if_absent
+)
 from models import Reading, SensorStatus
+from log_serializer import json_deserializer, json_serializer
 from time_utils import get_hour_window, is_within_lateness_window, is_window_closed
 
-logger = Logger()
+logger = Logger(json_serializer=json_serializer, json_deserializer=json_deserializer)
 
 # DynamoDB client
 dynamodb = boto3.client("dynamodb")
@@ -37,6 +42,8 @@ READINGS_TABLE = os.environ.get("READINGS_TABLE", "plant_readings")
 AGGREGATES_TABLE = os.environ.get("AGGREGATES_TABLE", "plant_aggregates")
 DEVICE_STATUS_TABLE = os.environ.get("DEVICE_STATUS_TABLE", "plant_device_status")
 
+readings_table = dynamodb_resource.Table(READINGS_TABLE)
+
 
 def parse_reading_from_item(item: Dict[str, Any]) -> Optional[Reading]:
     """
@@ -100,8 +107,9 @@ def process_stream_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
             # Generate reading_id for idempotency
             reading_id = generate_reading_id(reading.batch_id, reading.timestamp_ms)
 
-            # Check if already processed for aggregation
-            if is_aggregate_processed(reading_id):
+            # Mark as processed; the conditional write fails for readings
+            # that were already processed, so no separate check is needed
+            if not mark_aggregate_processed_if_absent(reading_id, reading.hardware_id):
                 logger.debug(
                     "Reading already processed for aggregation",
                     extra={"reading_id": reading_id, "hardware_id": reading.hardware_id}
@@ -109,12 +117,6 @@ def process_stream_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
                 skipped_count += 1
                 continue
 
-            # Mark as processed
-            if not mark_aggregate_processed_if_absent(reading_id, reading.hardware_id):
-                # Another process marked it first
-                skipped_count += 1
-                continue
-
             # Process the reading for aggregation
             process_reading_for_aggregation(reading)
             processed_count += 1
@@ -343,8 +345,7 @@ def rebuild_hourly_aggregate(hardware_id: str, window_start_ms: int, window_end_
 
     # Query raw readings for this device and hour
     try:
-        table = dynamodb_resource.Table(READINGS_TABLE)
-        response = table.query(
+        response = readings_table.query(
             KeyConditionExpression="hardware_id = :hw_id AND timestamp_ms BETWEEN :start AND :end",
             ExpressionAttributeValues={
                 ":hw_id": hardware_id,
@@ -357,7 +358,7 @@ def rebuild_hourly_aggregate(hardware_id: str, window_start_ms: int, window_end_
 
         # Handle pagination if needed
         while "LastEvaluatedKey" in response:
-            response = table.query(
+            response = readings_table.query(
                 KeyConditionExpression="hardware_id = :hw_id AND timestamp_ms BETWEEN :start AND :end",
                 ExpressionAttributeValues={
                     ":hw_id": hardware_id,
@@ -422,19 +423,17 @@ def compute_statistics_from_readings(readings: List[Dict[str, Any]]) -> Dict[str
     """
     sensors = ["temperature", "humidity", "pressure", "soil_moisture"]
     stats = {}
+    total_count = len(readings)
 
     for sensor in sensors:
-        valid_values = []
-        total_count = 0
-
-        for reading in readings:
-            total_count += 1
-            status_field = f"{sensor}_status"
-            status = reading.get(status_field, "ok")
+        status_field = f"{sensor}_status"
 
-            # Only include OK readings in statistics
-            if status == "ok" and sensor in reading and reading[sensor] is not None:
-                valid_values.append(float(reading[sensor]))
+        # Only include OK readings in statistics
+        valid_values = [
+            float(reading[sensor])
+            for reading in readings
+            if reading.get(status_field, "ok") == "ok" and reading.get(sensor) is not None
+        ]
 
         # Compute statistics
         if valid_values:
@@ -445,13 +444,14 @@ def compute_statistics_from_readings(readings: List[Dict[str, Any]]) -> Dict[str
 
             # Compute standard deviation
             if len(valid_values) > 1:
-                variance = sum((x - avg_val) ** 2 for x in valid_values) / len(valid_values)
+                deviations = [x - avg_val for x in valid_values]
+                variance = sum(map(mul, deviations, deviations)) / len(valid_values)
                 stddev_val = math.sqrt(variance)
             else:
                 stddev_val = 0.0
 
             # Compute sum of squares
-            sumsq_val = sum(x * x for x in valid_values)
+            sumsq_val = sum(map(mul, valid_values, valid_values))
 
             stats[sensor] = {
                 "min": min_val,
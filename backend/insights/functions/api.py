@@ -13,6 +13,8 @@ API endpoints for querying and managing Plant Insights data:
 import os
 import base64
 import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.typing import LambdaContext
@@ -20,7 +22,10 @@ from aws_lambda_powertools.event_handler import APIGatewayRestResolver
 import boto3
 from boto3.dynamodb.conditions import Key
 
-logger = Logger()
+from shared.log_serializer import json_deserializer, json_serializer
+from shared.rollup_helpers import estimate_distinct_count
+
+logger = Logger(json_serializer=json_serializer, json_deserializer=json_deserializer)
 app = APIGatewayRestResolver()
 
 # Initialize DynamoDB client
@@ -32,6 +37,20 @@ device_profiles_table = dynamodb.Table(os.environ['PLANT_DEVICE_PROFILES_TABLE']
 device_status_table = dynamodb.Table(os.environ['PLANT_DEVICE_STATUS_TABLE'])
 rollups_table = dynamodb.Table(os.environ['PLANT_ROLLUPS_TABLE'])
 
+# Background writers used by rerun_event_detection so event persistence and
+# marker round-trips overlap with detection of the next reading.
+# All reprocess writes for a device land on one partition key (hardware_id or
+# device_window), so the pool size is also the cap on concurrent writes to that
+# partition; lower it for large backfills that run into partition throttling.
+REPROCESS_WRITER_WORKERS = int(os.environ.get('REPROCESS_WRITER_WORKERS', '8'))
+
+# Time reserved at the end of an invocation for draining writes and returning a
+# continuation token from rerun_event_detection
+REPROCESS_DEADLINE_MARGIN_MS = 5000
+
+# Detection context size, matching the event detector's recent readings query
+RECENT_READINGS_LIMIT = 200
+
 
 def encode_pagination_token(last_key: Dict[str, Any]) -> str:
     """Encode DynamoDB LastEvaluatedKey as a base64 pagination token."""
@@ -444,7 +463,6 @@ def trigger_manual_insight_generation(hardware_id: str):
         # Fetch additional data for insight generation
         events = insight_generator.fetch_recent_events(hardware_id, hours=24)
         profile = insight_generator.fetch_device_profile(hardware_id)
-        previous_week_aggregates = insight_generator.fetch_aggregates_for_insight(hardware_id, hours=24 * 7)
 
         # Check timeout before LLM call
         if time.time() - start_time > timeout_seconds:
@@ -455,7 +473,7 @@ def trigger_manual_insight_generation(hardware_id: str):
             }
 
         # Build prompt
-        prompt = insight_generator.build_insight_prompt(aggregates, events, profile, previous_week_aggregates)
+        prompt = insight_generator.build_insight_prompt(aggregates, events, profile)
 
         # Call LLM with remaining time budget
         remaining_time = timeout_seconds - (time.time() - start_time)
@@ -886,6 +904,12 @@ def get_dashboard_rollups():
         # Trim to exact limit
         rollups = all_rollups[:limit]
 
+        # Distinct-count rows store a slot set; report its estimate instead
+        for rollup in rollups:
+            slots = rollup.pop('slots', None)
+            if slots is not None:
+                rollup['distinct_count_estimate'] = estimate_distinct_count(len(slots))
+
         # Build response
         result = {
             'rollups': rollups
@@ -1291,6 +1315,7 @@ def get_low_moisture_devices():
     Requirements: 16.3, 10.7
     """
     from aws_lambda_powertools.event_handler.exceptions import BadRequestError
+    from models import EVENT_TIME_KEY_MAX, event_type_time_key
     import time
 
     logger.info("Querying devices with low moisture and no recent watering")
@@ -1362,9 +1387,11 @@ def get_low_moisture_devices():
 
             # Check for recent watering events
             watering_response = events_table.query(
-                KeyConditionExpression=Key('hardware_id').eq(hardware_id) & Key('start_time_ms').gte(cutoff_time_ms),
-                FilterExpression='event_type = :event_type',
-                ExpressionAttributeValues={':event_type': 'Watering_Event'},
+                IndexName='DeviceEventTypeIndex',
+                KeyConditionExpression=Key('hardware_id').eq(hardware_id) & Key('event_type_start_time').between(
+                    event_type_time_key('Watering_Event', cutoff_time_ms),
+                    f'Watering_Event#{EVENT_TIME_KEY_MAX}'
+                ),
                 ScanIndexForward=False,  # Most recent first
                 Limit=1
             )
@@ -1378,9 +1405,8 @@ def get_low_moisture_devices():
 
             # Get last watering event (if any) for reporting
             all_watering_response = events_table.query(
-                KeyConditionExpression=Key('hardware_id').eq(hardware_id),
-                FilterExpression='event_type = :event_type',
-                ExpressionAttributeValues={':event_type': 'Watering_Event'},
+                IndexName='DeviceEventTypeIndex',
+                KeyConditionExpression=Key('hardware_id').eq(hardware_id) & Key('event_type_start_time').begins_with('Watering_Event#'),
                 ScanIndexForward=False,  # Most recent first
                 Limit=1
             )
@@ -1499,6 +1525,9 @@ def recompute_aggregates():
 
         logger.info(f"Recomputing aggregates for device {hardware_id} from {start_time_ms} to {end_time_ms}")
 
+        # Single reprocess timestamp shared by every marker written in this request
+        now_ms = int(time.time() * 1000)
+
         # Import aggregator functions
         import aggregator
 
@@ -1515,7 +1544,7 @@ def recompute_aggregates():
                 hours_recomputed += 1
 
                 # Mark as reprocessed
-                mark_aggregate_reprocessed(hardware_id, 'hourly', current_hour_start)
+                mark_aggregate_reprocessed(hardware_id, 'hourly', current_hour_start, now_ms)
 
                 logger.info(f"Recomputed hourly aggregate for {hardware_id} at {current_hour_start}")
 
@@ -1538,7 +1567,7 @@ def recompute_aggregates():
                 days_recomputed += 1
 
                 # Mark as reprocessed
-                mark_aggregate_reprocessed(hardware_id, 'daily', current_day_start)
+                mark_aggregate_reprocessed(hardware_id, 'daily', current_day_start, now_ms)
 
                 logger.info(f"Recomputed daily aggregate for {hardware_id} at {current_day_start}")
 
@@ -1561,7 +1590,7 @@ def recompute_aggregates():
                 weeks_recomputed += 1
 
                 # Mark as reprocessed
-                mark_aggregate_reprocessed(hardware_id, 'weekly', current_week_start)
+                mark_aggregate_reprocessed(hardware_id, 'weekly', current_week_start, now_ms)
 
                 logger.info(f"Recomputed weekly aggregate for {hardware_id} at {current_week_start}")
 
@@ -1605,7 +1634,7 @@ def recompute_aggregates():
         }
 
 
-def mark_aggregate_reprocessed(hardware_id: str, window_type: str, window_start_ms: int) -> None:
+def mark_aggregate_reprocessed(hardware_id: str, window_type: str, window_start_ms: int, now_ms: int) -> None:
     """
     Mark an aggregate as reprocessed by updating its metadata.
 
@@ -1613,11 +1642,9 @@ def mark_aggregate_reprocessed(hardware_id: str, window_type: str, window_start_
         hardware_id: Device hardware ID
         window_type: Window type (hourly, daily, weekly)
         window_start_ms: Window start timestamp
+        now_ms: Reprocess timestamp, computed once per request by the caller
     """
-    import time
-
     device_window = f"{hardware_id}#{window_type}"
-    now_ms = int(time.time() * 1000)
 
     try:
         aggregates_table.update_item(
@@ -1646,6 +1673,7 @@ def rerun_event_detection():
     - hardware_id: Device hardware ID (REQUIRED)
     - start_time: Start timestamp in ms (REQUIRED)
     - end_time: End timestamp in ms (REQUIRED)
+    - continuation_token: Token from a previous partial response (optional)
 
     Process:
     1. Query raw readings for the device and date range
@@ -1653,10 +1681,18 @@ def rerun_event_detection():
     3. Mark detected events with reprocessed marker
     4. Update device status
 
+    Long ranges are processed as a resumable job: when the invocation nears its
+    deadline the endpoint stops, returns status "partial" with a continuation
+    token, and the client re-invokes with the same body plus the token until
+    status is "success". The token is bound to the hardware_id and range it was
+    issued for and is rejected with any other body. Counts in the response are cumulative across calls.
+
     Returns:
-    - status: Success message
+    - status: "success", or "partial" when more readings remain
+    - continuation_token: Token to resume from (only when partial)
     - readings_processed: Count of readings processed
     - events_detected: Count of events detected
+    - event_write_failures: Count of detected events that failed to persist
 
     Requirements: 18.2, 18.4-18.5
     """
@@ -1697,99 +1733,195 @@ def rerun_event_detection():
         if start_time_ms >= end_time_ms:
             raise BadRequestError('start_time must be less than end_time')
 
-        logger.info(f"Rerunning event detection for device {hardware_id} from {start_time_ms} to {end_time_ms}")
+        # Resume state from a previous partial run
+        resume_from_ms = start_time_ms
+        readings_processed = 0
+        events_detected_count = 0
+        event_write_failures = 0
+
+        continuation_token = body.get('continuation_token')
+        if continuation_token:
+            checkpoint = decode_pagination_token(continuation_token)
+            try:
+                resume_from_ms = int(checkpoint['last_timestamp_ms']) + 1
+                readings_processed = int(checkpoint['readings_processed'])
+                events_detected_count = int(checkpoint['events_detected'])
+                event_write_failures = int(checkpoint.get('event_write_failures', 0))
+            except (KeyError, ValueError, TypeError):
+                raise BadRequestError('continuation_token is invalid')
+
+            # A token only resumes the exact job it was issued for
+            if (
+                checkpoint.get('hardware_id') != hardware_id
+                or checkpoint.get('start_time_ms') != start_time_ms
+                or checkpoint.get('end_time_ms') != end_time_ms
+            ):
+                raise BadRequestError('continuation_token does not match hardware_id, start_time and end_time')
+
+        logger.info(f"Rerunning event detection for device {hardware_id} from {resume_from_ms} to {end_time_ms}")
+
+        # Stop taking new readings once the invocation is close to timing out
+        deadline = time.monotonic() + (
+            app.lambda_context.get_remaining_time_in_millis() - REPROCESS_DEADLINE_MARGIN_MS
+        ) / 1000
 
         # Query raw readings for the device and date range
         readings_table = dynamodb.Table(os.environ['READINGS_TABLE'])
 
-        all_readings = []
         query_kwargs = {
-            'KeyConditionExpression': Key('hardware_id').eq(hardware_id) & Key('timestamp_ms').between(start_time_ms, end_time_ms),
-            'ScanIndexForward': True  # Process in chronological order
+            'KeyConditionExpression': Key('hardware_id').eq(hardware_id) & Key('timestamp_ms').between(resume_from_ms, end_time_ms),
+            'ScanIndexForward': True,  # Process in chronological order
+            # Eventually consistent reads cost half the RCUs of strongly consistent
+            # ones; reprocessing historical readings never needs read-after-write
+            'ConsistentRead': False
         }
 
-        response = readings_table.query(**query_kwargs)
-        all_readings.extend(response.get('Items', []))
-
-        # Handle pagination
-        while 'LastEvaluatedKey' in response:
-            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        def iter_readings():
+            """Yield readings page by page so only one page is held in memory."""
             response = readings_table.query(**query_kwargs)
-            all_readings.extend(response.get('Items', []))
-
-        logger.info(f"Found {len(all_readings)} readings to reprocess for {hardware_id}")
+            while True:
+                yield from response.get('Items', [])
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+                response = readings_table.query(**query_kwargs)
 
         # Import event detection functions
         from event_detection import (
             get_recent_readings,
-            detect_watering_event,
-            detect_drying_cycle,
-            detect_temperature_stress,
-            detect_humidity_anomaly,
-            detect_environmental_change,
+            run_all_detectors,
             persist_event
         )
 
-        readings_processed = 0
-        events_detected_count = 0
+        # Single reprocess timestamp shared by every marker written in this request
+        now_ms = int(time.time() * 1000)
+
+        def persist_and_mark(detector_name, event):
+            """Persist a detected event and mark it reprocessed; runs on the writer pool."""
+            if not persist_event(event):
+                return False
+
+            etype_value = event.event_type.value
+            start_ms = event.start_time_ms
+
+            # Mark event as reprocessed
+            mark_event_reprocessed(hardware_id, etype_value, start_ms, now_ms)
+
+            logger.info(
+                f"{detector_name} event detected during reprocessing",
+                extra={
+                    "hardware_id": hardware_id,
+                    "event_type": etype_value,
+                    "start_time_ms": start_ms
+                }
+            )
+            return True
+
+        write_futures = []
+
+        # Detection context is a sliding 6-hour window over readings already seen,
+        # capped like the stream path at the latest 200 before the current reading.
+        # Readings arrive in chronological order, so the window is seeded once with
+        # the readings preceding the range instead of re-querying per reading.
+        context_window_ms = 6 * 60 * 60 * 1000
+        recent_window = deque(
+            get_recent_readings(
+                hardware_id,
+                resume_from_ms - context_window_ms,
+                limit=RECENT_READINGS_LIMIT,
+                until_ms=resume_from_ms
+            ),
+            maxlen=RECENT_READINGS_LIMIT
+        )
+        last_timestamp_ms = None
+        timed_out = False
+
+        # Writes have no data dependency on later readings, so they are handed to
+        # the writer pool; leaving the with-block waits for all of them
+        with ThreadPoolExecutor(max_workers=REPROCESS_WRITER_WORKERS) as writer_pool:
+            # Process each reading for event detection
+            for reading in iter_readings():
+                if time.monotonic() >= deadline:
+                    timed_out = True
+                    break
+
+                timestamp_ms = reading.get('timestamp_ms')
+                batch_id = reading.get('batch_id', 'reprocess')
+                reading_id = f"{batch_id}#{timestamp_ms}"
+
+                # Recent readings for context (last 6 hours, oldest first)
+                six_hours_ago = timestamp_ms - context_window_ms
+                while recent_window and recent_window[0].get('timestamp_ms') < six_hours_ago:
+                    recent_window.popleft()
+                recent_readings = list(recent_window)
+
+                # Run all detection algorithms; persist each event with its
+                # reprocessed marker on the writer pool
+                for detector_name, event in run_all_detectors(recent_readings, reading):
+                    write_futures.append(writer_pool.submit(persist_and_mark, detector_name, event))
+
+                recent_window.append(reading)
+                readings_processed += 1
+                last_timestamp_ms = timestamp_ms
+
+        for future in write_futures:
+            error = future.exception()
+            if error is not None:
+                event_write_failures += 1
+                logger.error(
+                    "Error persisting event during reprocessing",
+                    extra={
+                        "hardware_id": hardware_id,
+                        "error": str(error),
+                        "error_type": type(error).__name__
+                    }
+                )
+            elif future.result():
+                events_detected_count += 1
+
+        if timed_out:
+            # Timing out before the first reading resumes where this run started
+            if last_timestamp_ms is None:
+                last_timestamp_ms = resume_from_ms - 1
+
+            next_token = encode_pagination_token({
+                'hardware_id': hardware_id,
+                'start_time_ms': start_time_ms,
+                'end_time_ms': end_time_ms,
+                'last_timestamp_ms': int(last_timestamp_ms),
+                'readings_processed': readings_processed,
+                'events_detected': events_detected_count,
+                'event_write_failures': event_write_failures
+            })
+
+            logger.info(
+                f"Rerun event detection checkpointed for {hardware_id}",
+                extra={
+                    "hardware_id": hardware_id,
+                    "last_timestamp_ms": int(last_timestamp_ms),
+                    "readings_processed": readings_processed,
+                    "events_detected": events_detected_count
+                }
+            )
 
-        # Process each reading for event detection
-        for reading in all_readings:
-            timestamp_ms = reading.get('timestamp_ms')
-            batch_id = reading.get('batch_id', 'reprocess')
-            reading_id = f"{batch_id}#{timestamp_ms}"
-
-            # Fetch recent readings for context (last 6 hours)
-            six_hours_ago = timestamp_ms - (6 * 60 * 60 * 1000)
-            recent_readings = get_recent_readings(hardware_id, six_hours_ago, limit=200)
-
-            # Run all detection algorithms
-            detectors = [
-                ("watering", lambda: detect_watering_event(recent_readings, reading)),
-                ("drying", lambda: detect_drying_cycle(recent_readings, reading)),
-                ("temperature_stress", lambda: detect_temperature_stress(reading)),
-                ("humidity_anomaly", lambda: detect_humidity_anomaly(recent_readings, reading)),
-                ("environmental_change", lambda: detect_environmental_change(recent_readings, reading))
-            ]
-
-            for detector_name, detector_func in detectors:
-                try:
-                    event = detector_func()
-                    if event:
-                        # Persist event with reprocessed marker
-                        if persist_event(event):
-                            events_detected_count += 1
-
-                            # Mark event as reprocessed
-                            mark_event_reprocessed(hardware_id, event.event_type.value, event.start_time_ms)
-
-                            logger.info(
-                                f"{detector_name} event detected during reprocessing",
-                                extra={
-                                    "hardware_id": hardware_id,
-                                    "event_type": event.event_type.value,
-                                    "start_time_ms": event.start_time_ms
-                                }
-                            )
-                except Exception as e:
-                    logger.error(
-                        f"Error in {detector_name} detection during reprocessing",
-                        extra={
-                            "hardware_id": hardware_id,
-                            "error": str(e),
-                            "error_type": type(e).__name__
-                        }
-                    )
-                    # Continue with other detectors
-
-            readings_processed += 1
+            return {
+                "status": "partial",
+                "message": f"Reprocessed {readings_processed} readings for device {hardware_id}, more remain",
+                "continuation_token": next_token,
+                "readings_processed": readings_processed,
+                "events_detected": events_detected_count,
+                "event_write_failures": event_write_failures,
+                "start_time_ms": start_time_ms,
+                "end_time_ms": end_time_ms
+            }
 
         logger.info(
             f"Rerun event detection completed for {hardware_id}",
             extra={
                 "hardware_id": hardware_id,
                 "readings_processed": readings_processed,
-                "events_detected": events_detected_count
+                "events_detected": events_detected_count,
+                "event_write_failures": event_write_failures
             }
         )
 
@@ -1798,6 +1930,7 @@ def rerun_event_detection():
             "message": f"Reprocessed {readings_processed} readings for device {hardware_id}",
             "readings_processed": readings_processed,
             "events_detected": events_detected_count,
+            "event_write_failures": event_write_failures,
             "start_time_ms": start_time_ms,
             "end_time_ms": end_time_ms
         }
@@ -1812,7 +1945,7 @@ def rerun_event_detection():
         }
 
 
-def mark_event_reprocessed(hardware_id: str, event_type: str, start_time_ms: int) -> None:
+def mark_event_reprocessed(hardware_id: str, event_type: str, start_time_ms: int, now_ms: int) -> None:
     """
     Mark an event as reprocessed by updating its metadata.
 
@@ -1820,11 +1953,8 @@ def mark_event_reprocessed(hardware_id: str, event_type: str, start_time_ms: int
         hardware_id: Device hardware ID
         event_type: Event type
         start_time_ms: Event start timestamp
+        now_ms: Reprocess timestamp, computed once per request by the caller
     """
-    import time
-
-    now_ms = int(time.time() * 1000)
-
     try:
         events_table.update_item(
             Key={
@@ -1854,7 +1984,7 @@ def regenerate_insight():
     Process:
     1. Create InsightRequest with reprocess marker
     2. Force immediate insight generation
-    3. Mark insight as reprocessed
+    3. Mark insight as reprocessed and request as done
 
     Returns:
     - status: Success message
@@ -1898,10 +2028,11 @@ def regenerate_insight():
             hardware_id=hardware_id,
             request_time_ms=now_ms,
             request_type=InsightRequestType.SCHEDULED,  # Use scheduled type for manual regeneration
-            status=InsightRequestStatus.PENDING
+            status=InsightRequestStatus.PROCESSING
         )
 
-        # Store the request
+        # Store the request already PROCESSING so the pending-request poller
+        # never picks up a request this invocation is generating
         insight_requests_table.put_item(Item=request.to_dynamodb_item())
 
         logger.info(f"Created InsightRequest for {hardware_id}")
@@ -1911,23 +2042,14 @@ def regenerate_insight():
 
         # Process the request immediately (synchronous for this endpoint)
         try:
-            # Mark as processing
-            insight_requests_table.update_item(
-                Key={
-                    'hardware_id': hardware_id,
-                    'request_time_ms': now_ms
-                },
-                UpdateExpression='SET #status = :processing',
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={':processing': InsightRequestStatus.PROCESSING.value}
-            )
-
             # Generate the insight
             insight = insight_generator.generate_insight_for_device(hardware_id)
+            processed_ms = int(time.time() * 1000)
 
             if insight:
-                # Mark insight as reprocessed
-                mark_insight_reprocessed(hardware_id, insight.timestamp_ms)
+                # Reprocessed marker is non-critical and written on its own so
+                # its failure can't turn a generated insight into a failed request
+                mark_insight_reprocessed(hardware_id, insight.timestamp_ms, processed_ms)
 
                 # Mark request as done
                 insight_requests_table.update_item(
@@ -1939,7 +2061,7 @@ def regenerate_insight():
                     ExpressionAttributeNames={'#status': 'status'},
                     ExpressionAttributeValues={
                         ':done': InsightRequestStatus.DONE.value,
-                        ':processed': int(time.time() * 1000)
+                        ':processed': processed_ms
                     }
                 )
 
@@ -1961,7 +2083,7 @@ def regenerate_insight():
                     ExpressionAttributeNames={'#status': 'status'},
                     ExpressionAttributeValues={
                         ':failed': InsightRequestStatus.FAILED.value,
-                        ':processed': int(time.time() * 1000),
+                        ':processed': processed_ms,
                         ':error': 'Insight generation returned None'
                     }
                 )
@@ -2005,18 +2127,15 @@ def regenerate_insight():
         }
 
 
-def mark_insight_reprocessed(hardware_id: str, timestamp_ms: int) -> None:
+def mark_insight_reprocessed(hardware_id: str, timestamp_ms: int, now_ms: int) -> None:
     """
     Mark an insight as reprocessed by updating its metadata.
 
     Args:
         hardware_id: Device hardware ID
         timestamp_ms: Insight timestamp
+        now_ms: Reprocess timestamp in milliseconds
     """
-    import time
-
-    now_ms = int(time.time() * 1000)
-
     try:
         insights_table.update_item(
             Key={
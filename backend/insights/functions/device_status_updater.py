@@ -17,9 +17,9 @@ from aws_lambda_powertools.utilities.typing import LambdaContext
 
 from shared.dynamodb_helpers import extract_reading_from_stream_record
 from shared.device_status import derive_health_category
-from shared.idempotency import generate_reading_id
+from shared.log_serializer import json_deserializer, json_serializer
 
-logger = Logger()
+logger = Logger(json_serializer=json_serializer, json_deserializer=json_deserializer)
 
 
 @logger.inject_lambda_context
@@ -73,15 +73,12 @@ def process_stream_record(record: Dict[str, Any]) -> None:
         logger.debug("Skipping non-INSERT/MODIFY event", extra={"event_name": event_name})
         return
 
-    # Extract the new image from the stream record
-    new_image = record.get("dynamodb", {}).get("NewImage")
-    if not new_image:
+    # Parse the reading from DynamoDB format (empty when NewImage is missing)
+    reading = extract_reading_from_stream_record(record)
+    if not reading:
         logger.warning("Stream record missing NewImage")
         return
 
-    # Parse the reading from DynamoDB format
-    reading = extract_reading_from_stream_record(record)
-
     # Update device status based on the reading
     update_device_status_from_reading(reading)
 
@@ -5,18 +5,31 @@ Processes DynamoDB Stream records from the Readings table to detect meaningful e
 """
 
 import os
-from typing import Dict, Any
+import logging
+import time
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
-from shared.dynamodb_helpers import extract_reading_from_stream_record
+from shared.dynamodb_helpers import extract_reading_from_stream_record, parse_dynamodb_item_subset
 from shared.idempotency import (
     generate_reading_id,
-    is_event_processed,
-    mark_event_processed_if_absent
+    mark_event_processed_if_absent,
+    mark_events_processed_batch,
+    release_event_processed
 )
+from shared.log_serializer import json_deserializer, json_serializer
 
-logger = Logger()
+logger = Logger(json_serializer=json_serializer, json_deserializer=json_deserializer)
+
+# Attributes needed to reserve a reading before it is fully parsed
+_RESERVATION_KEYS = frozenset(("hardware_id", "batch_id", "timestamp_ms"))
+_RESERVATION_INT_KEYS = frozenset(("timestamp_ms",))
+
+# Stop taking new records this long before the invocation times out so
+# unconsumed reservations can still be released
+DEADLINE_MARGIN_MS = 5000
 
 
 @logger.inject_lambda_context
@@ -34,17 +47,48 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
         Response with batch item failures for partial batch failure handling
     """
     from retry_utils import process_stream_batch_with_isolation
+    from shared.event_detection import create_insight_requests_for_critical_events
 
     logger.info("Event Detector Lambda invoked", extra={
         "record_count": len(event.get("Records", []))
     })
 
+    records = event.get("Records", [])
+
+    # Reserve the batch's readings up front with overlapping conditional
+    # writes rather than one round trip per record inside the loop
+    reservations = reserve_stream_readings(records)
+
+    # Critical events are collected across the batch and written in bulk
+    critical_queue: List[Tuple[str, Any]] = []
+
+    deadline = time.monotonic() + (context.get_remaining_time_in_millis() - DEADLINE_MARGIN_MS) / 1000
+    process_record = partial(process_stream_record, critical_queue=critical_queue, reservations=reservations)
+
+    def process_before_deadline(record: Dict[str, Any]) -> None:
+        # Records left once the deadline passes fail so the stream redelivers them
+        if time.monotonic() >= deadline:
+            raise TimeoutError("Stopped before the invocation deadline")
+        process_record(record)
+
     # Process records with error isolation
-    batch_item_failures = process_stream_batch_with_isolation(
-        records=event.get("Records", []),
-        process_func=process_stream_record,
-        logger_instance=logger
-    )
+    try:
+        batch_item_failures = process_stream_batch_with_isolation(
+            records=records,
+            process_func=process_before_deadline,
+            logger_instance=logger
+        )
+    finally:
+        # Reservations are consumed as records are processed; any left were
+        # never reached and would otherwise block the redelivered readings
+        release_unconsumed_reservations(reservations)
+
+    if critical_queue:
+        requests_created = create_insight_requests_for_critical_events(critical_queue)
+        logger.info("Insight requests created for critical events", extra={
+            "critical_events": len(critical_queue),
+            "requests_created": requests_created
+        })
 
     logger.info("Event Detector processing complete", extra={
         "total_records": len(event.get("Records", [])),
@@ -56,12 +100,64 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
     }
 
 
-def process_stream_record(record: Dict[str, Any]) -> None:
+def reserve_stream_readings(records: List[Dict[str, Any]]) -> Dict[str, bool]:
+    """
+    Reserve the INSERT/MODIFY readings of a stream batch for event detection.
+
+    Args:
+        records: DynamoDB Stream records
+
+    Returns:
+        Dict of reading_id to True if newly reserved, False if already processed
+    """
+    readings = []
+    for record in records:
+        if record.get("eventName") not in ("INSERT", "MODIFY"):
+            continue
+        new_image = (record.get("dynamodb") or {}).get("NewImage")
+        if not new_image:
+            continue
+        item = parse_dynamodb_item_subset(new_image, _RESERVATION_KEYS, _RESERVATION_INT_KEYS)
+        reading_id = generate_reading_id(item.get("batch_id", "unknown"), item.get("timestamp_ms", 0))
+        readings.append((reading_id, item.get("hardware_id")))
+
+    if not readings:
+        return {}
+    return mark_events_processed_batch(readings)
+
+
+def release_unconsumed_reservations(reservations: Dict[str, bool]) -> None:
+    """
+    Release readings reserved by reserve_stream_readings but never processed.
+
+    Args:
+        reservations: Batch reservations left after processing
+    """
+    for reading_id, reserved in reservations.items():
+        if not reserved:
+            continue
+        try:
+            release_event_processed(reading_id)
+        except Exception as e:
+            logger.error("Failed to release unconsumed reservation", extra={
+                "reading_id": reading_id,
+                "error": str(e)
+            })
+
+
+def process_stream_record(
+    record: Dict[str, Any],
+    critical_queue: Optional[List[Tuple[str, Any]]] = None,
+    reservations: Optional[Dict[str, bool]] = None
+) -> None:
     """
     Process a single DynamoDB Stream record.
 
     Args:
         record: DynamoDB Stream record
+        critical_queue: Optional batch-level queue for critical event insight requests
+        reservations: Optional batch-level reservations from reserve_stream_readings;
+            each is consumed once, so a repeated reading in the batch is skipped
     """
     event_name = record.get("eventName")
 
@@ -70,22 +166,27 @@ def process_stream_record(record: Dict[str, Any]) -> None:
         logger.debug("Skipping non-INSERT/MODIFY event", extra={"event_name": event_name})
         return
 
-    # Extract the new image from the stream record
-    new_image = record.get("dynamodb", {}).get("NewImage")
-    if not new_image:
+    # Parse the reading from DynamoDB format (empty when NewImage is missing)
+    reading = extract_reading_from_stream_record(record)
+    if not reading:
         logger.warning("Stream record missing NewImage")
         return
 
-    # Parse the reading from DynamoDB format
-    reading = extract_reading_from_stream_record(record)
-
     # Generate reading_id for idempotency check
     batch_id = reading.get("batch_id", "unknown")
     timestamp_ms = reading.get("timestamp_ms", 0)
     reading_id = generate_reading_id(batch_id, timestamp_ms)
 
-    # Check if this reading has already been processed for event detection
-    if is_event_processed(reading_id):
+    # Read the clock once per reading; the mark, detected events and status
+    # update all share this timestamp
+    now_ms = int(time.time() * 1000)
+
+    # Reserve the reading for event detection; the conditional write fails
+    # if it was already processed, so no separate check is needed
+    reserved = reservations.pop(reading_id, None) if reservations is not None else None
+    if reserved is None:
+        reserved = mark_event_processed_if_absent(reading_id, reading.get("hardware_id"), now_ms)
+    if not reserved:
         logger.debug(
             "Reading already processed for event detection",
             extra={"reading_id": reading_id, "hardware_id": reading.get("hardware_id")}
@@ -93,10 +194,20 @@ def process_stream_record(record: Dict[str, Any]) -> None:
         return
 
     # Process the reading for event detection
-    detect_events_for_reading(reading, reading_id)
-
-
-def detect_events_for_reading(reading: Dict[str, Any], reading_id: str) -> None:
+    try:
+        detect_events_for_reading(reading, reading_id, critical_queue=critical_queue, now_ms=now_ms)
+    except Exception:
+        # Release the reservation so the stream retry processes the reading again
+        release_event_processed(reading_id)
+        raise
+
+
+def detect_events_for_reading(
+    reading: Dict[str, Any],
+    reading_id: str,
+    critical_queue: Optional[List[Tuple[str, Any]]] = None,
+    now_ms: Optional[int] = None
+) -> None:
     """
     Detect events for a reading.
 
@@ -105,22 +216,23 @@ def detect_events_for_reading(reading: Dict[str, Any], reading_id: str) -> None:
     Args:
         reading: Reading dict
         reading_id: Reading ID for idempotency
+        critical_queue: Optional batch-level queue; when given, insight requests for
+            critical events are deferred to the caller instead of written per event
+        now_ms: Current time in milliseconds, read from the clock if not given
+
+    Raises:
+        Exception: If the detected events can't be committed
     """
     from shared.event_detection import (
         get_recent_readings,
-        detect_watering_event,
-        detect_drying_cycle,
-        detect_temperature_stress,
-        detect_humidity_anomaly,
-        detect_environmental_change,
-        check_cooldown,
-        persist_event,
-        update_device_status_after_event,
+        run_all_detectors,
+        commit_events_atomic,
         create_insight_request_for_critical_event
     )
 
     hardware_id = reading.get("hardware_id")
     timestamp_ms = reading.get("timestamp_ms")
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
 
     logger.info(
         "Processing reading for event detection",
@@ -137,56 +249,58 @@ def detect_events_for_reading(reading: Dict[str, Any], reading_id: str) -> None:
 
     events_detected = []
 
-    # Run all detection algorithms
-    detectors = [
-        ("watering", lambda: detect_watering_event(recent_readings, reading)),
-        ("drying", lambda: detect_drying_cycle(recent_readings, reading)),
-        ("temperature_stress", lambda: detect_temperature_stress(reading)),
-        ("humidity_anomaly", lambda: detect_humidity_anomaly(recent_readings, reading)),
-        ("environmental_change", lambda: detect_environmental_change(recent_readings, reading))
-    ]
-
-    for detector_name, detector_func in detectors:
+    # Run all detection algorithms, then commit the detected events together
+    # with the device status update; the transaction enforces the cooldowns
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    detected = run_all_detectors(recent_readings, reading, now_ms)
+    committed = []
+    if detected:
         try:
-            event = detector_func()
-            if event:
-                # Check cooldown before persisting
-                if not check_cooldown(hardware_id, event.event_type, timestamp_ms):
-                    if persist_event(event):
-                        events_detected.append(event)
-                        logger.info(
-                            f"{detector_name} event detected",
-                            extra={
-                                "hardware_id": hardware_id,
-                                "event_type": event.event_type.value,
-                                "start_time_ms": event.start_time_ms
-                            }
-                        )
-
-                        # Create insight request for critical events
-                        create_insight_request_for_critical_event(hardware_id, event.event_type)
-                else:
-                    logger.debug(
-                        f"{detector_name} event in cooldown, skipping",
-                        extra={
-                            "hardware_id": hardware_id,
-                            "event_type": event.event_type.value
-                        }
-                    )
+            committed = commit_events_atomic([event for _, event in detected], timestamp_ms, now_ms)
         except Exception as e:
+            # Re-raised so the caller releases the reading and the stream
+            # retries it instead of dropping the events
             logger.error(
-                f"Error in {detector_name} detection",
+                "Error committing detected events",
                 extra={
                     "hardware_id": hardware_id,
                     "error": str(e),
                     "error_type": type(e).__name__
                 }
             )
-            # Continue with other detectors
+            raise
+
+    for (detector_name, event), was_committed in zip(detected, committed):
+        event_type = event.event_type
+        if was_committed:
+            events_detected.append(event)
+
+            # Create insight request for critical events
+            if critical_queue is not None:
+                critical_queue.append((hardware_id, event_type))
+            else:
+                create_insight_request_for_critical_event(hardware_id, event_type)
+        elif debug_enabled:
+            logger.debug(
+                "%s event in cooldown or already recorded, skipping",
+                detector_name,
+                extra={
+                    "hardware_id": hardware_id,
+                    "event_type": event_type.value
+                }
+            )
 
-    # Update device status if any events were detected
+    # Device status was updated in the same transaction as the events
     if events_detected:
-        update_device_status_after_event(hardware_id, timestamp_ms)
-
-    # Mark reading as processed for event detection
-    mark_event_processed_if_absent(reading_id, hardware_id)
+        logger.info(
+            "Events detected for reading",
+            extra={
+                "hardware_id": hardware_id,
+                "reading_id": reading_id,
+                "events": [
+                    {"event_type": event.event_type.value, "start_time_ms": event.start_time_ms}
+                    for event in events_detected
+                ]
+            }
+        )
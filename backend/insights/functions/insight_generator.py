@@ -8,12 +8,21 @@ Generates LLM-powered natural language insights:
 """
 
 import os
+import re
 import json
+import math
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 import boto3
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
 from boto3.dynamodb.conditions import Key
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
@@ -27,25 +36,74 @@ from models import (
     InsightRequestType, InsightRequestStatus, SensorStats, DeviceStatus
 )
 from device_status import update_device_status_field
+from log_serializer import json_deserializer, json_serializer
 
-logger = Logger()
+logger = Logger(json_serializer=json_serializer, json_deserializer=json_deserializer)
 
 # DynamoDB clients
-dynamodb = boto3.resource('dynamodb')
+# Keep-alive reuses TLS connections across warm invocations; the pool covers
+# INSIGHT_WORKERS request threads plus their nested fetch threads
+boto_config = Config(
+    tcp_keepalive=True,
+    max_pool_connections=32,
+    retries={'mode': 'adaptive', 'max_attempts': 3}
+)
+dynamodb = boto3.resource('dynamodb', config=boto_config)
 device_status_table = dynamodb.Table(os.environ.get('DEVICE_STATUS_TABLE', 'plant_device_status'))
 device_profiles_table = dynamodb.Table(os.environ.get('DEVICE_PROFILES_TABLE', 'plant_device_profiles'))
 aggregates_table = dynamodb.Table(os.environ.get('AGGREGATES_TABLE', 'plant_aggregates'))
 events_table = dynamodb.Table(os.environ.get('EVENTS_TABLE', 'plant_events'))
 insights_table = dynamodb.Table(os.environ.get('INSIGHTS_TABLE', 'plant_insights'))
 insight_requests_table = dynamodb.Table(os.environ.get('INSIGHT_REQUESTS_TABLE', 'plant_insight_requests'))
+insight_batches_table = dynamodb.Table(os.environ.get('INSIGHT_BATCHES_TABLE', 'plant_insight_batches'))
+
+# Disease diagnosis terms the LLM must never surface. Any word starting with
+# a keyword is replaced ("diseased", "rotting", "moldy", "bacterial"); words
+# starting with an allowed prefix ("rotate", "rotor") are left alone, and
+# "carrot" is not matched because keywords must start the word
+DISEASE_KEYWORDS = ['disease', 'infection', 'pathogen', 'fungus', 'bacteria', 'virus', 'blight', 'rot', 'mold']
+DISEASE_KEYWORD_ALLOWED_PREFIXES = ['rotat', 'rotor', 'rotary', 'rotund']
+DISEASE_KEYWORD_PATTERN = re.compile(
+    r'\b(?!(?:' + '|'.join(map(re.escape, DISEASE_KEYWORD_ALLOWED_PREFIXES)) + r'))'
+    r'(?:' + '|'.join(map(re.escape, DISEASE_KEYWORDS)) + r')\w*',
+    re.IGNORECASE
+)
+
+# LLM HTTP session; reused so warm invocations and concurrent workers skip
+# the TCP/TLS handshake. Retries are handled in call_llm_api.
+llm_session = requests.Session()
+llm_session.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0))
 
 # LLM Configuration
 LLM_API_KEY = os.environ.get('LLM_API_KEY', '')
-LLM_MODEL = os.environ.get('LLM_MODEL', 'gpt-3.5-turbo')  # Cost-effective model
+LLM_MODEL = os.environ.get('LLM_MODEL', 'gpt-4o-mini')  # Cost-effective model with JSON mode
+# JSON mode constrains the model to emit a single valid JSON object
+LLM_RESPONSE_FORMAT = {"type": "json_object"}
+LLM_API_BASE_URL = "https://api.openai.com/v1"
 MAX_LLM_RETRIES = 3
 ACTIVE_DEVICE_THRESHOLD_HOURS = 24
 EVENT_DRIVEN_DAILY_CAP = 6
 EVENT_BATCHING_WINDOW_HOURS = 1
+INSIGHT_WORKERS = 10
+
+# Enum values used in DynamoDB expressions, bound once at import
+STATUS_PENDING = InsightRequestStatus.PENDING.value
+STATUS_PROCESSING = InsightRequestStatus.PROCESSING.value
+STATUS_DONE = InsightRequestStatus.DONE.value
+STATUS_FAILED = InsightRequestStatus.FAILED.value
+REQUEST_TYPE_EVENT = InsightRequestType.EVENT.value
+LLM_BATCH_SIZE = 4  # Devices per batched prompt; keep <= 8, accuracy drops beyond
+LLM_MAX_TOKENS_PER_DEVICE = 1000
+MIN_VALID_HOURS_FOR_LLM = 12  # Below this an LLM answer would be forced to low confidence anyway
+INSIGHT_BATCH_MAX_DEVICES = 500  # Keeps each batch record well under the 400KB item limit
+INSIGHT_BATCH_RECORD_TTL_DAYS = 7
+DEVICE_PROFILE_CACHE_TTL_SECONDS = 300
+DEVICE_PROFILE_CACHE_MAX_SIZE = 1024
+
+# Device profiles change rarely; keep found profiles across warm invocations.
+# Maps hardware_id -> (expires_at_monotonic, DeviceProfile)
+_device_profile_cache: Dict[str, Tuple[float, DeviceProfile]] = {}
+_device_profile_cache_lock = threading.Lock()
 
 
 def get_active_devices(threshold_hours: int = ACTIVE_DEVICE_THRESHOLD_HOURS) -> List[str]:
@@ -61,28 +119,43 @@ def get_active_devices(threshold_hours: int = ACTIVE_DEVICE_THRESHOLD_HOURS) ->
     now_ms = int(time.time() * 1000)
     threshold_ms = now_ms - (threshold_hours * 60 * 60 * 1000)
 
-    active_devices = []
+    # Devices are bucketed by UTC ingest day; walk every bucket that can
+    # still hold a timestamp inside the threshold window
+    today = datetime.fromtimestamp(now_ms / 1000, tz=timezone.utc).date()
+    bucket_count = math.ceil(threshold_hours / 24) + 1
+    buckets = [(today - timedelta(days=offset)).isoformat() for offset in range(bucket_count)]
+
+    active_devices = set()
 
     try:
-        # Scan device status table for active devices
-        # Note: In production, consider using a GSI or maintaining an active devices list
-        response = device_status_table.scan()
+        for bucket in buckets:
+            query_kwargs = {
+                'IndexName': 'ActiveDevicesIndex',
+                'KeyConditionExpression': Key('active_bucket').eq(bucket) & Key('last_seen_ingest_time_ms').gte(threshold_ms)
+            }
 
-        for item in response.get('Items', []):
-            last_seen = item.get('last_seen_ingest_time_ms')
-            if last_seen and last_seen >= threshold_ms:
-                active_devices.append(item['hardware_id'])
+            while True:
+                response = device_status_table.query(**query_kwargs)
+
+                for item in response.get('Items', []):
+                    active_devices.add(item['hardware_id'])
+
+                last_key = response.get('LastEvaluatedKey')
+                if not last_key:
+                    break
+                query_kwargs['ExclusiveStartKey'] = last_key
 
         logger.info(f"Found {len(active_devices)} active devices", extra={
             "threshold_hours": threshold_hours,
-            "device_count": len(active_devices)
+            "device_count": len(active_devices),
+            "buckets_queried": len(buckets)
         })
 
     except Exception as e:
         logger.error(f"Error enumerating active devices: {e}")
         raise
 
-    return active_devices
+    return sorted(active_devices)
 
 
 def create_insight_requests(hardware_ids: List[str], request_type: InsightRequestType) -> int:
@@ -99,21 +172,32 @@ def create_insight_requests(hardware_ids: List[str], request_type: InsightReques
     now_ms = int(time.time() * 1000)
     created_count = 0
 
-    for hardware_id in hardware_ids:
-        try:
-            request = InsightRequest(
-                hardware_id=hardware_id,
-                request_time_ms=now_ms,
-                request_type=request_type,
-                status=InsightRequestStatus.PENDING
-            )
-
-            insight_requests_table.put_item(Item=request.to_dynamodb_item())
-            created_count += 1
+    try:
+        # batch_writer flushes 25 items per BatchWriteItem and retries
+        # unprocessed items, instead of one PutItem round-trip per device.
+        # Requests only count as created once the writer has flushed them.
+        queued_count = 0
+        with insight_requests_table.batch_writer() as batch:
+            for hardware_id in hardware_ids:
+                try:
+                    request = InsightRequest(
+                        hardware_id=hardware_id,
+                        request_time_ms=now_ms,
+                        request_type=request_type,
+                        status=InsightRequestStatus.PENDING
+                    )
+
+                    batch.put_item(Item=request.to_dynamodb_item())
+                    queued_count += 1
+
+                except Exception as e:
+                    logger.error(f"Error creating insight request for {hardware_id}: {e}")
+                    continue
+
+        created_count = queued_count
 
-        except Exception as e:
-            logger.error(f"Error creating insight request for {hardware_id}: {e}")
-            continue
+    except Exception as e:
+        logger.error(f"Error flushing insight requests: {e}")
 
     logger.info(f"Created {created_count} insight requests", extra={
         "request_type": request_type.value,
@@ -136,17 +220,27 @@ def get_pending_insight_requests(batch_size: int = 10) -> List[InsightRequest]:
     pending_requests = []
 
     try:
-        # Scan for pending requests
-        # Note: In production, use GSI on status for efficient queries
-        response = insight_requests_table.scan(
-            FilterExpression='#status = :pending',
-            ExpressionAttributeNames={'#status': 'status'},
-            ExpressionAttributeValues={':pending': InsightRequestStatus.PENDING.value},
-            Limit=batch_size
-        )
+        # Query the PENDING partition of StatusIndex, oldest requests first;
+        # finished requests live under other status keys and are never read.
+        # Keep paging until batch_size is reached or the backlog is drained,
+        # since a page can stop short at the 1MB response limit.
+        query_kwargs = {
+            'IndexName': 'StatusIndex',
+            'KeyConditionExpression': Key('status').eq(STATUS_PENDING),
+            'ScanIndexForward': True
+        }
 
-        for item in response.get('Items', []):
-            pending_requests.append(InsightRequest.from_dynamodb_item(item))
+        while len(pending_requests) < batch_size:
+            query_kwargs['Limit'] = batch_size - len(pending_requests)
+            response = insight_requests_table.query(**query_kwargs)
+
+            for item in response.get('Items', []):
+                pending_requests.append(InsightRequest.from_dynamodb_item(item))
+
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                break
+            query_kwargs['ExclusiveStartKey'] = last_key
 
         logger.info(f"Found {len(pending_requests)} pending insight requests")
 
@@ -167,7 +261,7 @@ def mark_request_processing(hardware_id: str, request_time_ms: int) -> None:
             },
             UpdateExpression='SET #status = :processing',
             ExpressionAttributeNames={'#status': 'status'},
-            ExpressionAttributeValues={':processing': InsightRequestStatus.PROCESSING.value}
+            ExpressionAttributeValues={':processing': STATUS_PROCESSING}
         )
     except Exception as e:
         logger.error(f"Error marking request as processing: {e}")
@@ -185,7 +279,7 @@ def mark_request_done(hardware_id: str, request_time_ms: int) -> None:
             UpdateExpression='SET #status = :done, processed_at_ms = :now',
             ExpressionAttributeNames={'#status': 'status'},
             ExpressionAttributeValues={
-                ':done': InsightRequestStatus.DONE.value,
+                ':done': STATUS_DONE,
                 ':now': now_ms
             }
         )
@@ -205,7 +299,7 @@ def mark_request_failed(hardware_id: str, request_time_ms: int, error_message: s
             UpdateExpression='SET #status = :failed, processed_at_ms = :now, error_message = :error',
             ExpressionAttributeNames={'#status': 'status'},
             ExpressionAttributeValues={
-                ':failed': InsightRequestStatus.FAILED.value,
+                ':failed': STATUS_FAILED,
                 ':now': now_ms,
                 ':error': error_message[:256]  # Truncate error message
             }
@@ -214,6 +308,74 @@ def mark_request_failed(hardware_id: str, request_time_ms: int, error_message: s
         logger.error(f"Error marking request as failed: {e}")
 
 
+def mark_request_coalesced(hardware_id: str, request_time_ms: int, coalesced_into_ms: int) -> None:
+    """Mark an InsightRequest as done because a newer request for the device covers it."""
+    now_ms = int(time.time() * 1000)
+    try:
+        insight_requests_table.update_item(
+            Key={
+                'hardware_id': hardware_id,
+                'request_time_ms': request_time_ms
+            },
+            UpdateExpression='SET #status = :done, processed_at_ms = :now, coalesced_into = :target',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':done': STATUS_DONE,
+                ':now': now_ms,
+                ':target': coalesced_into_ms
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error marking request as coalesced: {e}")
+
+
+def coalesce_event_requests(pending_requests: List[InsightRequest]) -> Tuple[List[InsightRequest], int]:
+    """
+    Collapse event-driven requests for the same device within the batching window.
+
+    Within EVENT_BATCHING_WINDOW_HOURS of a device's newest event request,
+    older event requests are superseded: one insight covers them all. The
+    superseded requests are marked DONE with coalesced_into set to the
+    surviving request_time_ms.
+
+    Args:
+        pending_requests: Pending InsightRequests
+
+    Returns:
+        Tuple of (requests still to process, number of requests coalesced)
+    """
+    window_ms = EVENT_BATCHING_WINDOW_HOURS * 60 * 60 * 1000
+
+    event_requests_by_device: Dict[str, List[InsightRequest]] = {}
+    remaining = []
+    for request in pending_requests:
+        if request.request_type == InsightRequestType.EVENT:
+            event_requests_by_device.setdefault(request.hardware_id, []).append(request)
+        else:
+            remaining.append(request)
+
+    coalesced_count = 0
+    for requests_for_device in event_requests_by_device.values():
+        requests_for_device.sort(key=lambda r: r.request_time_ms, reverse=True)
+
+        target = None
+        for request in requests_for_device:
+            if target is not None and target.request_time_ms - request.request_time_ms <= window_ms:
+                mark_request_coalesced(request.hardware_id, request.request_time_ms, target.request_time_ms)
+                coalesced_count += 1
+            else:
+                target = request
+                remaining.append(request)
+
+    if coalesced_count:
+        logger.info(f"Coalesced {coalesced_count} event-driven insight requests", extra={
+            "coalesced_count": coalesced_count,
+            "window_hours": EVENT_BATCHING_WINDOW_HOURS
+        })
+
+    return remaining, coalesced_count
+
+
 def check_event_driven_rate_limit(hardware_id: str) -> bool:
     """
     Check if device has exceeded event-driven insight daily cap.
@@ -228,14 +390,24 @@ def check_event_driven_rate_limit(hardware_id: str) -> bool:
     day_start_ms = now_ms - (24 * 60 * 60 * 1000)
 
     try:
-        # Query insight requests for this device in last 24 hours
-        response = insight_requests_table.query(
-            KeyConditionExpression=Key('hardware_id').eq(hardware_id) & Key('request_time_ms').gte(day_start_ms),
-            FilterExpression='request_type = :event',
-            ExpressionAttributeValues={':event': InsightRequestType.EVENT.value}
-        )
+        # Count event-driven requests for this device in last 24 hours;
+        # Select='COUNT' returns only the count, not the items
+        query_kwargs = {
+            'KeyConditionExpression': Key('hardware_id').eq(hardware_id) & Key('request_time_ms').gte(day_start_ms),
+            'FilterExpression': 'request_type = :event',
+            'ExpressionAttributeValues': {':event': REQUEST_TYPE_EVENT},
+            'Select': 'COUNT'
+        }
 
-        event_driven_count = len(response.get('Items', []))
+        event_driven_count = 0
+        while True:
+            response = insight_requests_table.query(**query_kwargs)
+            event_driven_count += response.get('Count', 0)
+
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key or event_driven_count >= EVENT_DRIVEN_DAILY_CAP:
+                break
+            query_kwargs['ExclusiveStartKey'] = last_key
 
         if event_driven_count >= EVENT_DRIVEN_DAILY_CAP:
             logger.warning(f"Event-driven rate limit exceeded for {hardware_id}", extra={
@@ -271,8 +443,19 @@ def fetch_aggregates_for_insight(hardware_id: str, hours: int = 24) -> List[Aggr
     try:
         # Query hourly aggregates
         device_window = f"{hardware_id}#hourly"
+        # Project only what the prompt and data-sufficiency check consume
         response = aggregates_table.query(
-            KeyConditionExpression=Key('device_window').eq(device_window) & Key('window_start_ms').gte(start_ms)
+            KeyConditionExpression=Key('device_window').eq(device_window) & Key('window_start_ms').gte(start_ms),
+            ProjectionExpression=(
+                'hardware_id, window_type, window_start_ms, window_end_ms, '
+                '#ts.#avg, #ts.valid_count, #hs.#avg, #sm.#avg'
+            ),
+            ExpressionAttributeNames={
+                '#ts': 'temperature_stats',
+                '#hs': 'humidity_stats',
+                '#sm': 'soil_moisture_stats',
+                '#avg': 'avg'
+            }
         )
 
         for item in response.get('Items', []):
@@ -319,8 +502,10 @@ def fetch_recent_events(hardware_id: str, hours: int = 24) -> List[Event]:
     events = []
 
     try:
+        # Skip sensor_values and detection_metadata; the prompt only counts event types
         response = events_table.query(
-            KeyConditionExpression=Key('hardware_id').eq(hardware_id) & Key('start_time_ms').gte(start_ms)
+            KeyConditionExpression=Key('hardware_id').eq(hardware_id) & Key('start_time_ms').gte(start_ms),
+            ProjectionExpression='hardware_id, event_type, start_time_ms, end_time_ms'
         )
 
         for item in response.get('Items', []):
@@ -358,11 +543,26 @@ def fetch_device_profile(hardware_id: str) -> Optional[DeviceProfile]:
     Returns:
         DeviceProfile object or None if not found
     """
+    now = time.monotonic()
+
+    with _device_profile_cache_lock:
+        cached = _device_profile_cache.get(hardware_id)
+        if cached and cached[0] > now:
+            return cached[1]
+
     try:
         response = device_profiles_table.get_item(Key={'hardware_id': hardware_id})
 
         if 'Item' in response:
-            return DeviceProfile.from_dynamodb_item(response['Item'])
+            profile = DeviceProfile.from_dynamodb_item(response['Item'])
+
+            # Only stored profiles are cached so a newly created one is seen
+            with _device_profile_cache_lock:
+                if len(_device_profile_cache) >= DEVICE_PROFILE_CACHE_MAX_SIZE:
+                    _device_profile_cache.clear()
+                _device_profile_cache[hardware_id] = (now + DEVICE_PROFILE_CACHE_TTL_SECONDS, profile)
+
+            return profile
         else:
             # Return default profile
             return DeviceProfile(hardware_id=hardware_id)
@@ -372,35 +572,66 @@ def fetch_device_profile(hardware_id: str) -> Optional[DeviceProfile]:
         return DeviceProfile(hardware_id=hardware_id)
 
 
-def build_insight_prompt(
+INSIGHT_RESPONSE_SCHEMA = """{
+  "summary": "Brief summary of current plant conditions (2-3 sentences)",
+  "recommendations": [
+    {
+      "action": "Specific action to take",
+      "reason": "Why this action is recommended",
+      "urgency": "low|medium|high"
+    }
+  ],
+  "confidence": "low|medium|high",
+  "trend": "improving|declining|stable",
+  "growth_stage_suggestion": "Optional suggestion about growth stage"
+}"""
+
+INSIGHT_GUIDELINES = """Important guidelines:
+- Use simple, beginner-friendly language
+- Provide actionable recommendations
+- NEVER diagnose plant diseases
+- If data is insufficient, set confidence to "low" and explain in summary
+- Focus on environmental conditions and care practices
+- Be encouraging and supportive"""
+
+
+def build_device_context(
     aggregates: List[Aggregate],
     events: List[Event],
-    profile: DeviceProfile,
-    previous_week_aggregates: List[Aggregate]
+    profile: DeviceProfile
 ) -> str:
     """
-    Build structured prompt for LLM insight generation.
+    Build the per-device data section of an insight prompt.
 
     Args:
         aggregates: Recent aggregates (last 24 hours)
         events: Recent events
         profile: Device profile
-        previous_week_aggregates: Aggregates from previous week for trend comparison
 
     Returns:
-        Prompt string
+        Device context string
     """
-    # Calculate summary statistics
-    if aggregates:
-        temp_values = [agg.temperature_stats.avg for agg in aggregates if agg.temperature_stats.avg is not None]
-        humidity_values = [agg.humidity_stats.avg for agg in aggregates if agg.humidity_stats.avg is not None]
-        moisture_values = [agg.soil_moisture_stats.avg for agg in aggregates if agg.soil_moisture_stats.avg is not None]
-
-        avg_temp = sum(temp_values) / len(temp_values) if temp_values else None
-        avg_humidity = sum(humidity_values) / len(humidity_values) if humidity_values else None
-        avg_moisture = sum(moisture_values) / len(moisture_values) if moisture_values else None
-    else:
-        avg_temp = avg_humidity = avg_moisture = None
+    # Calculate summary statistics in a single pass over the aggregates
+    # Integer start keeps DynamoDB Decimal values summable
+    temp_sum = humidity_sum = moisture_sum = 0
+    temp_count = humidity_count = moisture_count = 0
+    for agg in aggregates:
+        value = agg.temperature_stats.avg
+        if value is not None:
+            temp_sum += value
+            temp_count += 1
+        value = agg.humidity_stats.avg
+        if value is not None:
+            humidity_sum += value
+            humidity_count += 1
+        value = agg.soil_moisture_stats.avg
+        if value is not None:
+            moisture_sum += value
+            moisture_count += 1
+
+    avg_temp = temp_sum / temp_count if temp_count else None
+    avg_humidity = humidity_sum / humidity_count if humidity_count else None
+    avg_moisture = moisture_sum / moisture_count if moisture_count else None
 
     # Build current conditions summary
     conditions = []
@@ -436,38 +667,77 @@ def build_insight_prompt(
     if not plant_context:
         plant_context = "Plant information not provided\n"
 
-    # Build prompt
-    prompt = f"""You are a plant care assistant analyzing sensor data from an IoT monitoring system.
-
-{plant_context}
+    return f"""{plant_context}
 Current Conditions (last 24 hours):
 {conditions_str}
 
 Recent Events:
-{events_str}
+{events_str}"""
+
+
+def build_insight_prompt(
+    aggregates: List[Aggregate],
+    events: List[Event],
+    profile: DeviceProfile
+) -> str:
+    """
+    Build structured prompt for LLM insight generation.
+
+    Args:
+        aggregates: Recent aggregates (last 24 hours)
+        events: Recent events
+        profile: Device profile
+
+    Returns:
+        Prompt string
+    """
+    device_context = build_device_context(aggregates, events, profile)
+
+    # Build prompt
+    prompt = f"""You are a plant care assistant analyzing sensor data from an IoT monitoring system.
+
+{device_context}
 
 Please provide a beginner-friendly analysis in JSON format with the following structure:
-{{
-  "summary": "Brief summary of current plant conditions (2-3 sentences)",
-  "recommendations": [
-    {{
-      "action": "Specific action to take",
-      "reason": "Why this action is recommended",
-      "urgency": "low|medium|high"
-    }}
-  ],
-  "confidence": "low|medium|high",
-  "trend": "improving|declining|stable",
-  "growth_stage_suggestion": "Optional suggestion about growth stage"
-}}
+{INSIGHT_RESPONSE_SCHEMA}
 
-Important guidelines:
-- Use simple, beginner-friendly language
-- Provide actionable recommendations
-- NEVER diagnose plant diseases
-- If data is insufficient, set confidence to "low" and explain in summary
-- Focus on environmental conditions and care practices
-- Be encouraging and supportive
+{INSIGHT_GUIDELINES}
+
+Respond ONLY with valid JSON, no additional text."""
+
+    return prompt
+
+
+def build_batch_insight_prompt(hardware_ids: List[str], device_inputs: List[Dict[str, Any]]) -> str:
+    """
+    Build one prompt covering several devices under a shared instruction block.
+
+    Args:
+        hardware_ids: Device hardware IDs, in prompt order
+        device_inputs: Per-device inputs from fetch_insight_inputs, aligned with hardware_ids
+
+    Returns:
+        Prompt string asking for {"insights": [...]} keyed by device_index
+    """
+    sections = []
+    for index, (hardware_id, inputs) in enumerate(zip(hardware_ids, device_inputs)):
+        device_context = build_device_context(inputs['aggregates'], inputs['events'], inputs['profile'])
+        sections.append(f"### DEVICE {index}: hardware_id={hardware_id}\n{device_context}")
+
+    devices_str = "\n\n".join(sections)
+
+    prompt = f"""You are a plant care assistant analyzing sensor data from an IoT monitoring system.
+
+The data below covers {len(hardware_ids)} independent devices. Analyze each device on its own.
+
+{devices_str}
+
+For EACH device, provide a beginner-friendly analysis with the following structure:
+{INSIGHT_RESPONSE_SCHEMA}
+
+Return a JSON object of the form {{"insights": [{{"device_index": 0, ...analysis}}, ...]}} with exactly one entry per device.
+
+{INSIGHT_GUIDELINES}
 
 Respond ONLY with valid JSON, no additional text."""
 
@@ -478,7 +748,8 @@ def call_llm_api(
     prompt: str,
     hardware_id: str,
     max_retries: int = MAX_LLM_RETRIES,
-    request_id: Optional[str] = None
+    request_id: Optional[str] = None,
+    max_tokens: int = LLM_MAX_TOKENS_PER_DEVICE
 ) -> Optional[Dict[str, Any]]:
     """
     Call LLM API with retry logic and exponential backoff.
@@ -488,11 +759,11 @@ def call_llm_api(
         hardware_id: Device hardware ID for logging
         max_retries: Maximum number of retries
         request_id: Optional request ID for correlation
+        max_tokens: Completion token budget
 
     Returns:
         Parsed JSON response or None on failure
     """
-    import requests
     from logging_utils import log_llm_api_call
 
     if not LLM_API_KEY:
@@ -523,14 +794,15 @@ def call_llm_api(
             {"role": "user", "content": prompt}
         ],
         "temperature": 0.7,
-        "max_tokens": 1000
+        "max_tokens": max_tokens,
+        "response_format": LLM_RESPONSE_FORMAT
     }
 
     for attempt in range(1, max_retries + 1):
         call_start_time = time.time()
         try:
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
+            response = llm_session.post(
+                f"{LLM_API_BASE_URL}/chat/completions",
                 headers=headers,
                 json=payload,
                 timeout=30
@@ -539,11 +811,11 @@ def call_llm_api(
             call_duration_ms = int((time.time() - call_start_time) * 1000)
 
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 content = result['choices'][0]['message']['content']
 
                 # Parse JSON response
-                parsed = json.loads(content)
+                parsed = orjson.loads(content)
 
                 # Log successful API call
                 log_llm_api_call(
@@ -611,30 +883,17 @@ def validate_and_sanitize_insight(llm_response: Dict[str, Any]) -> Dict[str, Any
     Returns:
         Validated and sanitized response
     """
-    # Check for disease diagnosis keywords and replace
-    disease_keywords = ['disease', 'infection', 'pathogen', 'fungus', 'bacteria', 'virus', 'blight', 'rot', 'mold']
-
-    summary = llm_response.get('summary', '')
-    for keyword in disease_keywords:
-        if keyword.lower() in summary.lower():
-            summary = summary.replace(keyword, 'condition')
-            logger.warning(f"Replaced disease keyword '{keyword}' in summary")
+    # Replace disease diagnosis keywords
+    summary, replaced = DISEASE_KEYWORD_PATTERN.subn('condition', llm_response.get('summary', ''))
+    if replaced:
+        logger.warning(f"Replaced {replaced} disease keyword(s) in summary")
 
     # Sanitize recommendations
     recommendations = []
     for rec in llm_response.get('recommendations', []):
-        action = rec.get('action', '')
-        reason = rec.get('reason', '')
-
-        for keyword in disease_keywords:
-            if keyword.lower() in action.lower():
-                action = action.replace(keyword, 'condition')
-            if keyword.lower() in reason.lower():
-                reason = reason.replace(keyword, 'condition')
-
         recommendations.append({
-            'action': action,
-            'reason': reason,
+            'action': DISEASE_KEYWORD_PATTERN.sub('condition', rec.get('action', '')),
+            'reason': DISEASE_KEYWORD_PATTERN.sub('condition', rec.get('reason', '')),
             'urgency': rec.get('urgency', 'low')
         })
 
@@ -647,6 +906,205 @@ def validate_and_sanitize_insight(llm_response: Dict[str, Any]) -> Dict[str, Any
     }
 
 
+def fetch_insight_inputs(hardware_id: str) -> Dict[str, Any]:
+    """
+    Fetch everything needed to prompt for one device's insight.
+
+    Args:
+        hardware_id: Device hardware ID
+
+    Returns:
+        Dict with aggregates, events, profile and valid_hours
+    """
+    # The reads are independent, so issue them concurrently. Only the last
+    # 24h of hourly aggregates is read: the prompt has no weekly section.
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        aggregates_future = executor.submit(fetch_aggregates_for_insight, hardware_id, 24)
+        events_future = executor.submit(fetch_recent_events, hardware_id, 24)
+        profile_future = executor.submit(fetch_device_profile, hardware_id)
+
+    aggregates = aggregates_future.result()
+
+    return {
+        'aggregates': aggregates,
+        'events': events_future.result(),
+        'profile': profile_future.result(),
+        # Check data sufficiency
+        'valid_hours': sum(1 for agg in aggregates if agg.temperature_stats.valid_count > 0)
+    }
+
+
+def summarize_insight_inputs(inputs: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Reduce fetched insight inputs to the counts stored alongside an Insight.
+
+    Args:
+        inputs: Inputs returned by fetch_insight_inputs
+
+    Returns:
+        Dict with valid_hours, aggregate_count and event_count
+    """
+    return {
+        'valid_hours': inputs['valid_hours'],
+        'aggregate_count': len(inputs['aggregates']),
+        'event_count': len(inputs['events'])
+    }
+
+
+def store_generated_insight(
+    hardware_id: str,
+    profile: DeviceProfile,
+    summary: Dict[str, int],
+    llm_response: Dict[str, Any],
+    start_time: float,
+    request_id: Optional[str] = None,
+    writer: Any = None
+) -> Insight:
+    """
+    Sanitize an LLM response, persist it as an Insight and update device status.
+
+    Args:
+        hardware_id: Device hardware ID
+        profile: Device profile used for the prompt
+        summary: Counts from summarize_insight_inputs
+        llm_response: Parsed LLM response for this device
+        start_time: time.time() when generation started
+        request_id: Optional request ID for correlation
+        writer: Optional batch writer to buffer the insight put; defaults to insights_table
+
+    Returns:
+        Stored Insight object
+    """
+    from logging_utils import log_insight_generation_success
+
+    valid_hours = summary['valid_hours']
+
+    # Validate and sanitize
+    sanitized = validate_and_sanitize_insight(llm_response)
+
+    # Override confidence if insufficient data
+    if valid_hours < MIN_VALID_HOURS_FOR_LLM:
+        sanitized['confidence'] = 'low'
+        sanitized['summary'] = f"Insufficient data (only {valid_hours} hours of valid readings). " + sanitized['summary']
+
+    # Create Insight object
+    now_ms = int(time.time() * 1000)
+    generation_duration_ms = int((time.time() - start_time) * 1000)
+
+    recommendations = [
+        Recommendation(
+            action=rec['action'],
+            reason=rec['reason'],
+            urgency=rec['urgency']
+        )
+        for rec in sanitized['recommendations']
+    ]
+
+    insight = Insight(
+        hardware_id=hardware_id,
+        timestamp_ms=now_ms,
+        summary=sanitized['summary'],
+        recommendations=recommendations,
+        confidence=ConfidenceLevel(sanitized['confidence']),
+        trend=TrendClassification(sanitized['trend']),
+        growth_stage_suggestion=sanitized.get('growth_stage_suggestion'),
+        evidence={
+            'aggregate_count': summary['aggregate_count'],
+            'event_count': summary['event_count'],
+            'profile_snapshot': profile.to_dynamodb_item()
+        },
+        llm_model=LLM_MODEL,
+        generation_duration_ms=generation_duration_ms
+    )
+
+    # Store insight
+    (writer or insights_table).put_item(Item=insight.to_dynamodb_item())
+
+    # Update device status
+    update_device_status_field(
+        hardware_id=hardware_id,
+        field_name='last_insight_generated_at_ms',
+        field_value=now_ms
+    )
+
+    # Log successful insight generation
+    log_insight_generation_success(
+        logger=logger,
+        hardware_id=hardware_id,
+        confidence=insight.confidence.value,
+        trend=insight.trend.value,
+        generation_duration_ms=generation_duration_ms,
+        request_id=request_id,
+        aggregate_count=summary['aggregate_count'],
+        event_count=summary['event_count']
+    )
+
+    return insight
+
+
+def record_insight_generation_failure(
+    hardware_id: str,
+    error: Exception,
+    start_time: float,
+    request_id: Optional[str] = None
+) -> None:
+    """
+    Log an insight generation failure and record it in device status.
+
+    Args:
+        hardware_id: Device hardware ID
+        error: Exception raised during generation
+        start_time: time.time() when generation started
+        request_id: Optional request ID for correlation
+    """
+    from logging_utils import log_insight_generation_failure
+    from device_status import record_device_error
+
+    generation_duration_ms = int((time.time() - start_time) * 1000)
+
+    # Log failure
+    log_insight_generation_failure(
+        logger=logger,
+        hardware_id=hardware_id,
+        error_message=str(error),
+        error_type=type(error).__name__,
+        generation_duration_ms=generation_duration_ms,
+        request_id=request_id
+    )
+
+    # Record error in device status
+    record_device_error(
+        hardware_id=hardware_id,
+        error_code='INSIGHT_GENERATION_FAILED',
+        error_message=str(error)
+    )
+
+
+def build_low_data_response() -> Dict[str, Any]:
+    """
+    Build the deterministic response used instead of an LLM call for low-data devices.
+
+    store_generated_insight prefixes the summary with the valid-hours notice
+    and forces low confidence.
+
+    Returns:
+        Response dict in the LLM response shape
+    """
+    return {
+        'summary': "Continue monitoring.",
+        'recommendations': [
+            {
+                'action': "Continue monitoring",
+                'reason': "Building baseline data",
+                'urgency': "low"
+            }
+        ],
+        'confidence': 'low',
+        'trend': 'stable',
+        'growth_stage_suggestion': None
+    }
+
+
 def generate_insight_for_device(hardware_id: str, request_id: Optional[str] = None) -> Optional[Insight]:
     """
     Generate insight for a single device.
@@ -660,7 +1118,6 @@ def generate_insight_for_device(hardware_id: str, request_id: Optional[str] = No
     """
     from logging_utils import (
         log_insight_generation_start,
-        log_insight_generation_success,
         log_insight_generation_failure
     )
 
@@ -675,17 +1132,25 @@ def generate_insight_for_device(hardware_id: str, request_id: Optional[str] = No
     )
 
     try:
-        # Fetch data
-        aggregates = fetch_aggregates_for_insight(hardware_id, hours=24)
-        events = fetch_recent_events(hardware_id, hours=24)
-        profile = fetch_device_profile(hardware_id)
-        previous_week_aggregates = fetch_aggregates_for_insight(hardware_id, hours=24 * 7)
-
-        # Check data sufficiency
-        valid_hours = sum(1 for agg in aggregates if agg.temperature_stats.valid_count > 0)
+        inputs = fetch_insight_inputs(hardware_id)
+
+        if inputs['valid_hours'] < MIN_VALID_HOURS_FOR_LLM:
+            # Not enough data for a meaningful analysis; skip the LLM call
+            return store_generated_insight(
+                hardware_id,
+                inputs['profile'],
+                summarize_insight_inputs(inputs),
+                build_low_data_response(),
+                start_time,
+                request_id
+            )
 
         # Build prompt
-        prompt = build_insight_prompt(aggregates, events, profile, previous_week_aggregates)
+        prompt = build_insight_prompt(
+            inputs['aggregates'],
+            inputs['events'],
+            inputs['profile']
+        )
 
         # Call LLM with retry logic
         llm_response = call_llm_api(
@@ -707,90 +1172,432 @@ def generate_insight_for_device(hardware_id: str, request_id: Optional[str] = No
             )
             return None
 
-        # Validate and sanitize
-        sanitized = validate_and_sanitize_insight(llm_response)
+        return store_generated_insight(
+            hardware_id,
+            inputs['profile'],
+            summarize_insight_inputs(inputs),
+            llm_response,
+            start_time,
+            request_id
+        )
+
+    except Exception as e:
+        record_insight_generation_failure(hardware_id, e, start_time, request_id)
+        return None
+
+
+def generate_insights_for_batch(hardware_ids: List[str]) -> List[Optional[Insight]]:
+    """
+    Generate insights for several devices with a single batched LLM prompt.
 
-        # Override confidence if insufficient data
-        if valid_hours < 12:
-            sanitized['confidence'] = 'low'
-            sanitized['summary'] = f"Insufficient data (only {valid_hours} hours of valid readings). " + sanitized['summary']
+    Devices missing from (or malformed in) the batched response fall back to
+    generate_insight_for_device, so one bad section never fails the batch.
+    If the LLM call itself fails after its retries, the prompted devices are
+    recorded as failed instead, so an outage isn't retried once per device.
+
+    Args:
+        hardware_ids: Device hardware IDs (at most LLM_BATCH_SIZE)
+
+    Returns:
+        Insight or None per device, aligned with hardware_ids
+    """
+    if len(hardware_ids) == 1:
+        return [generate_insight_for_device(hardware_ids[0])]
+
+    start_time = time.time()
+    device_inputs: List[Dict[str, Any]] = []
+    responses_by_index: Dict[int, Dict[str, Any]] = {}
+    llm_indices: List[int] = []
+    llm_response = None
+    llm_call_failed = False
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(hardware_ids)) as executor:
+            device_inputs = list(executor.map(fetch_insight_inputs, hardware_ids))
+
+        # Low-data devices get the deterministic response; only the rest are prompted
+        for index, inputs in enumerate(device_inputs):
+            if inputs['valid_hours'] < MIN_VALID_HOURS_FOR_LLM:
+                responses_by_index[index] = build_low_data_response()
+            else:
+                llm_indices.append(index)
+
+        if llm_indices:
+            llm_response = call_llm_api(
+                prompt=build_batch_insight_prompt(
+                    [hardware_ids[i] for i in llm_indices],
+                    [device_inputs[i] for i in llm_indices]
+                ),
+                hardware_id=",".join(hardware_ids[i] for i in llm_indices),
+                max_retries=MAX_LLM_RETRIES,
+                max_tokens=LLM_MAX_TOKENS_PER_DEVICE * len(llm_indices)
+            )
+            # call_llm_api returns None only once every retry has failed
+            llm_call_failed = llm_response is None
+    except Exception as e:
+        logger.warning(f"Batched insight generation failed, falling back to per-device: {e}", extra={
+            "device_count": len(hardware_ids)
+        })
 
-        # Create Insight object
-        now_ms = int(time.time() * 1000)
-        generation_duration_ms = int((time.time() - start_time) * 1000)
+    # Map each returned analysis back to its device; device_index refers to
+    # the position within the prompted subset
+    if isinstance(llm_response, dict) and isinstance(llm_response.get('insights'), list):
+        for entry in llm_response['insights']:
+            if not isinstance(entry, dict):
+                continue
+            index = entry.get('device_index')
+            if isinstance(index, int) and 0 <= index < len(llm_indices):
+                responses_by_index[llm_indices[index]] = entry
+
+    if llm_call_failed:
+        logger.error("Batched LLM call failed, marking prompted devices failed", extra={
+            "device_count": len(llm_indices)
+        })
+    elif len(responses_by_index) < len(hardware_ids):
+        logger.warning("Batched LLM response incomplete, falling back to per-device for missing entries", extra={
+            "device_count": len(hardware_ids),
+            "parsed_count": len(responses_by_index)
+        })
 
-        recommendations = [
-            Recommendation(
-                action=rec['action'],
-                reason=rec['reason'],
-                urgency=rec['urgency']
+    insights: List[Optional[Insight]] = []
+    for index, hardware_id in enumerate(hardware_ids):
+        entry = responses_by_index.get(index)
+        if entry is None and llm_call_failed:
+            record_insight_generation_failure(
+                hardware_id, RuntimeError("LLM API call failed after retries"), start_time
             )
-            for rec in sanitized['recommendations']
-        ]
+            insights.append(None)
+            continue
+        if entry is None:
+            insights.append(generate_insight_for_device(hardware_id))
+            continue
 
-        insight = Insight(
-            hardware_id=hardware_id,
-            timestamp_ms=now_ms,
-            summary=sanitized['summary'],
-            recommendations=recommendations,
-            confidence=ConfidenceLevel(sanitized['confidence']),
-            trend=TrendClassification(sanitized['trend']),
-            growth_stage_suggestion=sanitized.get('growth_stage_suggestion'),
-            evidence={
-                'aggregate_count': len(aggregates),
-                'event_count': len(events),
-                'profile_snapshot': profile.to_dynamodb_item()
-            },
-            llm_model=LLM_MODEL,
-            generation_duration_ms=generation_duration_ms
-        )
+        try:
+            inputs = device_inputs[index]
+            insights.append(store_generated_insight(
+                hardware_id,
+                inputs['profile'],
+                summarize_insight_inputs(inputs),
+                entry,
+                start_time
+            ))
+        except Exception as e:
+            record_insight_generation_failure(hardware_id, e, start_time)
+            insights.append(None)
 
-        # Store insight
-        insights_table.put_item(Item=insight.to_dynamodb_item())
+    return insights
 
-        # Update device status
-        update_device_status_field(
-            hardware_id=hardware_id,
-            field_name='last_insight_generated_at_ms',
-            field_value=now_ms
-        )
 
-        # Log successful insight generation
-        log_insight_generation_success(
-            logger=logger,
-            hardware_id=hardware_id,
-            confidence=insight.confidence.value,
-            trend=insight.trend.value,
-            generation_duration_ms=generation_duration_ms,
-            request_id=request_id,
-            aggregate_count=len(aggregates),
-            event_count=len(events)
-        )
+def _process_batch(batch: List[InsightRequest]) -> List[str]:
+    """
+    Process pending InsightRequests end to end, sharing one LLM prompt.
 
-        return insight
+    Args:
+        batch: Pending InsightRequests (one event request or up to LLM_BATCH_SIZE scheduled ones)
+
+    Returns:
+        "succeeded" or "failed" per request
+    """
+    try:
+        for request in batch:
+            mark_request_processing(request.hardware_id, request.request_time_ms)
 
+        insights = generate_insights_for_batch([request.hardware_id for request in batch])
     except Exception as e:
-        generation_duration_ms = int((time.time() - start_time) * 1000)
+        logger.error(f"Error processing insight requests: {e}", extra={
+            "hardware_ids": [request.hardware_id for request in batch]
+        })
+        insights = [None] * len(batch)
 
-        # Log failure
-        log_insight_generation_failure(
-            logger=logger,
-            hardware_id=hardware_id,
-            error_message=str(e),
-            error_type=type(e).__name__,
-            generation_duration_ms=generation_duration_ms,
-            request_id=request_id
-        )
+    outcomes = []
+    for request, insight in zip(batch, insights):
+        if insight:
+            mark_request_done(request.hardware_id, request.request_time_ms)
+            outcomes.append("succeeded")
+        else:
+            mark_request_failed(request.hardware_id, request.request_time_ms, "Insight generation failed")
+            outcomes.append("failed")
 
-        # Record error in device status
-        from device_status import record_device_error
-        record_device_error(
-            hardware_id=hardware_id,
-            error_code='INSIGHT_GENERATION_FAILED',
-            error_message=str(e)
-        )
+    return outcomes
 
-        return None
+
+def group_requests_for_llm(pending_requests: List[InsightRequest]) -> List[List[InsightRequest]]:
+    """
+    Group pending requests into LLM prompt batches.
+
+    Scheduled requests are batch-prompted LLM_BATCH_SIZE at a time; event
+    requests stay single so critical insights keep their own prompt.
+
+    Args:
+        pending_requests: Pending InsightRequests
+
+    Returns:
+        List of request batches
+    """
+    scheduled = [r for r in pending_requests if r.request_type == InsightRequestType.SCHEDULED]
+    batches = [[r] for r in pending_requests if r.request_type != InsightRequestType.SCHEDULED]
+
+    for i in range(0, len(scheduled), LLM_BATCH_SIZE):
+        batches.append(scheduled[i:i + LLM_BATCH_SIZE])
+
+    return batches
+
+
+def submit_scheduled_insight_batch(hardware_ids: List[str]) -> bool:
+    """
+    Submit scheduled insight prompts to the OpenAI Batch API.
+
+    Batch jobs are billed at half the synchronous rate and complete within
+    24h, which suits the twice-daily scheduled run. Results are collected by
+    collect_insight_batches.
+
+    Low-data devices are left out of the batch and stored with the
+    deterministic response once submission succeeds, so a failed submission
+    leaves the whole chunk to the caller's fallback.
+
+    Args:
+        hardware_ids: Active device hardware IDs (at most INSIGHT_BATCH_MAX_DEVICES)
+
+    Returns:
+        True if every device was stored or submitted, False if the caller
+        should fall back to InsightRequests
+    """
+    if not LLM_API_KEY or not hardware_ids:
+        return False
+
+    try:
+        with ThreadPoolExecutor(max_workers=INSIGHT_WORKERS) as executor:
+            device_inputs = list(executor.map(fetch_insight_inputs, hardware_ids))
+
+        lines = []
+        devices = {}
+        low_data_devices = []
+        for hardware_id, inputs in zip(hardware_ids, device_inputs):
+            if inputs['valid_hours'] < MIN_VALID_HOURS_FOR_LLM:
+                low_data_devices.append((hardware_id, inputs))
+                continue
+
+            prompt = build_insight_prompt(
+                inputs['aggregates'],
+                inputs['events'],
+                inputs['profile']
+            )
+            lines.append(json.dumps({
+                "custom_id": hardware_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": LLM_MODEL,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.7,
+                    "max_tokens": LLM_MAX_TOKENS_PER_DEVICE,
+                    "response_format": LLM_RESPONSE_FORMAT
+                }
+            }))
+            devices[hardware_id] = summarize_insight_inputs(inputs)
+
+        if lines:
+            submit_insight_batch_file(lines, devices)
+
+    except Exception as e:
+        logger.error(f"Error submitting insight batch: {e}", extra={
+            "device_count": len(hardware_ids)
+        })
+        return False
+
+    for hardware_id, inputs in low_data_devices:
+        start_time = time.time()
+        try:
+            store_generated_insight(
+                hardware_id,
+                inputs['profile'],
+                summarize_insight_inputs(inputs),
+                build_low_data_response(),
+                start_time
+            )
+        except Exception as e:
+            record_insight_generation_failure(hardware_id, e, start_time)
+
+    return True
+
+
+def submit_insight_batch_file(lines: List[str], devices: Dict[str, Dict[str, int]]) -> str:
+    """
+    Upload batch request lines, create the Batch API job and record it.
+
+    Args:
+        lines: JSONL request lines, one per device
+        devices: Input summary per prompted device, kept for collection
+
+    Returns:
+        Batch ID
+
+    Raises:
+        requests.HTTPError: If the upload or batch creation is rejected
+        ClientError: If the batch record can't be written
+    """
+    headers = {"Authorization": f"Bearer {LLM_API_KEY}"}
+
+    upload = llm_session.post(
+        f"{LLM_API_BASE_URL}/files",
+        headers=headers,
+        data={"purpose": "batch"},
+        files={"file": ("insight_requests.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl")},
+        timeout=60
+    )
+    upload.raise_for_status()
+
+    created = llm_session.post(
+        f"{LLM_API_BASE_URL}/batches",
+        headers=headers,
+        json={
+            "input_file_id": upload.json()["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h"
+        },
+        timeout=30
+    )
+    created.raise_for_status()
+    batch_id = created.json()["id"]
+
+    now_ms = int(time.time() * 1000)
+    insight_batches_table.put_item(Item={
+        'batch_id': batch_id,
+        'status': 'submitted',
+        'submitted_at_ms': now_ms,
+        'devices': devices,
+        'ttl': int(now_ms / 1000) + INSIGHT_BATCH_RECORD_TTL_DAYS * 24 * 60 * 60
+    })
+
+    logger.info(f"Submitted insight batch {batch_id}", extra={
+        "batch_id": batch_id,
+        "device_count": len(lines)
+    })
+
+    return batch_id
+
+
+def collect_insight_batches() -> Dict[str, int]:
+    """
+    Collect results of submitted insight batches that have finished.
+
+    Completed batches are written to the insights table through a batch
+    writer. Devices without a usable result, including every device of a
+    failed or expired batch, get a scheduled InsightRequest so the
+    synchronous path picks them up. A batch is only moved out of
+    "submitted" once, so its devices are never re-queued twice.
+
+    Returns:
+        Counts of batches collected, insights stored and devices re-queued
+    """
+    counts = {"batches_collected": 0, "insights_stored": 0, "devices_requeued": 0}
+    headers = {"Authorization": f"Bearer {LLM_API_KEY}"}
+
+    query_kwargs = {
+        'IndexName': 'StatusIndex',
+        'KeyConditionExpression': Key('status').eq('submitted')
+    }
+
+    while True:
+        response = insight_batches_table.query(**query_kwargs)
+
+        for record in response.get('Items', []):
+            batch_id = record['batch_id']
+            devices = record.get('devices', {})
+
+            try:
+                status_response = llm_session.get(f"{LLM_API_BASE_URL}/batches/{batch_id}", headers=headers, timeout=30)
+                status_response.raise_for_status()
+                batch = status_response.json()
+            except Exception as e:
+                logger.error(f"Error retrieving insight batch {batch_id}: {e}")
+                continue
+
+            if batch.get('status') not in ('completed', 'failed', 'expired', 'cancelled'):
+                continue
+
+            start_time = time.time()
+            stored = set()
+
+            if batch.get('status') == 'completed' and batch.get('output_file_id'):
+                try:
+                    output = llm_session.get(
+                        f"{LLM_API_BASE_URL}/files/{batch['output_file_id']}/content",
+                        headers=headers,
+                        timeout=60
+                    )
+                    output.raise_for_status()
+
+                    # Only counted as stored once the writer has flushed them
+                    written = []
+                    with insights_table.batch_writer() as writer:
+                        for line in output.content.splitlines():
+                            if not line.strip():
+                                continue
+
+                            result = orjson.loads(line)
+                            hardware_id = result.get('custom_id')
+                            body = (result.get('response') or {}).get('body') or {}
+                            if hardware_id not in devices or not body.get('choices'):
+                                continue
+
+                            try:
+                                llm_response = orjson.loads(body['choices'][0]['message']['content'])
+                                summary = {key: int(value) for key, value in devices[hardware_id].items()}
+                                store_generated_insight(
+                                    hardware_id,
+                                    fetch_device_profile(hardware_id),
+                                    summary,
+                                    llm_response,
+                                    start_time,
+                                    writer=writer
+                                )
+                                written.append(hardware_id)
+                            except Exception as e:
+                                record_insight_generation_failure(hardware_id, e, start_time)
+                    stored.update(written)
+
+                except Exception as e:
+                    logger.error(f"Error collecting insight batch {batch_id}: {e}")
+
+            # Settle the batch before re-queuing; the condition lets only one
+            # poll move it out of submitted, and a failed update leaves it to
+            # the next poll without having re-queued anything
+            try:
+                insight_batches_table.update_item(
+                    Key={'batch_id': batch_id},
+                    UpdateExpression='SET #status = :status, collected_at_ms = :now, stored_count = :stored',
+                    ConditionExpression='#status = :submitted',
+                    ExpressionAttributeNames={'#status': 'status'},
+                    ExpressionAttributeValues={
+                        ':status': 'collected' if batch.get('status') == 'completed' else batch.get('status'),
+                        ':submitted': 'submitted',
+                        ':now': int(time.time() * 1000),
+                        ':stored': len(stored)
+                    }
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    logger.error(f"Error updating insight batch {batch_id}: {e}")
+                continue
+
+            # Anything the batch did not produce falls back to the synchronous path
+            missing = [hardware_id for hardware_id in devices if hardware_id not in stored]
+            if missing:
+                create_insight_requests(missing, InsightRequestType.SCHEDULED)
+
+            counts["batches_collected"] += 1
+            counts["insights_stored"] += len(stored)
+            counts["devices_requeued"] += len(missing)
+
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+        query_kwargs['ExclusiveStartKey'] = last_key
+
+    logger.info("Insight batch collection complete", extra=counts)
+
+    return counts
 
 
 @logger.inject_lambda_context
@@ -798,9 +1605,11 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
     """
     Lambda handler for generating LLM-powered insights.
 
-    Handles two invocation modes:
-    1. Scheduled invocation (EventBridge): Creates InsightRequests for active devices
-    2. Request processing: Processes pending InsightRequest items
+    Handles three invocation modes:
+    1. Scheduled invocation (EventBridge): Submits a Batch API job for active devices
+       (falls back to creating InsightRequests if submission fails)
+    2. Batch poll (source "insight.batch_poll"): Collects finished Batch API jobs
+    3. Request processing: Processes pending InsightRequest items
 
     Args:
         event: Lambda event containing scheduled trigger or processing request
@@ -814,18 +1623,44 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
     # Determine invocation mode
     source = event.get('source', '')
 
-    if source == 'aws.events':
-        # Scheduled invocation - create insight requests
+    if source == 'insight.batch_poll':
+        # Collect finished Batch API jobs from earlier scheduled runs
+        logger.info("Collecting scheduled insight batches")
+
+        counts = collect_insight_batches()
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "message": "Insight batches collected",
+                **counts
+            })
+        }
+
+    elif source == 'aws.events':
+        # Scheduled invocation - submit prompts to the Batch API, falling
+        # back to insight requests when a batch cannot be submitted
         logger.info("Processing scheduled insight generation")
 
         active_devices = get_active_devices()
-        created_count = create_insight_requests(active_devices, InsightRequestType.SCHEDULED)
+
+        batched_count = 0
+        unbatched_devices = []
+        for i in range(0, len(active_devices), INSIGHT_BATCH_MAX_DEVICES):
+            chunk = active_devices[i:i + INSIGHT_BATCH_MAX_DEVICES]
+            if submit_scheduled_insight_batch(chunk):
+                batched_count += len(chunk)
+            else:
+                unbatched_devices.extend(chunk)
+
+        created_count = create_insight_requests(unbatched_devices, InsightRequestType.SCHEDULED) if unbatched_devices else 0
 
         return {
             "statusCode": 200,
             "body": json.dumps({
-                "message": "Insight requests created",
+                "message": "Scheduled insight generation started",
                 "active_devices": len(active_devices),
+                "devices_batched": batched_count,
                 "requests_created": created_count
             })
         }
@@ -835,28 +1670,27 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
         logger.info("Processing pending insight requests")
 
         pending_requests = get_pending_insight_requests(batch_size=10)
+        pending_requests, coalesced_count = coalesce_event_requests(pending_requests)
 
         results = {
             "processed": 0,
             "succeeded": 0,
-            "failed": 0
+            "failed": 0,
+            "coalesced": coalesced_count
         }
 
-        for request in pending_requests:
-            results["processed"] += 1
-
-            # Mark as processing
-            mark_request_processing(request.hardware_id, request.request_time_ms)
-
-            # Generate insight
-            insight = generate_insight_for_device(request.hardware_id)
-
-            if insight:
-                mark_request_done(request.hardware_id, request.request_time_ms)
-                results["succeeded"] += 1
-            else:
-                mark_request_failed(request.hardware_id, request.request_time_ms, "Insight generation failed")
-                results["failed"] += 1
+        # Each request is independent and dominated by DynamoDB and LLM
+        # round-trips, so run them concurrently. Per-request log keys go in each
+        # helper's extra dict: logger.append_keys is shared across these threads,
+        # and thread_safe_append_keys needs Powertools 3.x while the requirements
+        # still allow 2.30+
+        with ThreadPoolExecutor(max_workers=INSIGHT_WORKERS) as executor:
+            futures = [executor.submit(_process_batch, batch) for batch in group_requests_for_llm(pending_requests)]
+
+            for future in as_completed(futures):
+                for outcome in future.result():
+                    results["processed"] += 1
+                    results[outcome] += 1
 
         logger.info("Insight request processing complete", extra=results)
 
@@ -6,34 +6,103 @@ Maintains operational metrics in DynamoDB for dashboard queries:
 - Updates time-bucketed rollup counters atomically
 - Tracks system-level metrics (throughput, lag, device counts)
 
+When ROLLUP_QUEUE_URL is set, stream batches publish their merged counter
+deltas to SQS instead of writing them, and queue_handler (run as a single
+concurrent consumer) merges deltas across shards and performs the writes.
+This keeps hot minute/hour bucket rows down to one writer.
+
 CRITICAL: This Lambda MUST NOT write to any source tables (Readings, Events, Aggregates, Insights).
 It ONLY writes to the Rollups table to prevent infinite stream loops.
 """
 
 import os
 import time
-from typing import Dict, Any, List, Set
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, Any, FrozenSet, List, Optional, Set, Tuple
 import boto3
+import orjson
+from botocore.config import Config
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
-from shared.dynamodb_helpers import extract_reading_from_stream_record, parse_dynamodb_item
+from shared.dynamodb_helpers import parse_dynamodb_item_subset
 from shared.rollup_helpers import (
+    BatchAccumulator,
+    distinct_slot,
     get_minute_bucket,
-    get_hour_bucket,
-    update_rollup_counter
+    get_hour_bucket
 )
+from shared.log_serializer import json_deserializer, json_serializer
+
+logger = Logger(json_serializer=json_serializer, json_deserializer=json_deserializer)
 
-logger = Logger()
+# Counter chunks are flushed concurrently; the pool is reused across warm invocations
+ROLLUP_WRITER_WORKERS = int(os.environ.get("ROLLUP_WRITER_WORKERS", "32"))
+rollup_writer = ThreadPoolExecutor(max_workers=ROLLUP_WRITER_WORKERS)
 
-# Initialize DynamoDB client
-dynamodb_client = boto3.client("dynamodb")
+# Initialize DynamoDB client with a connection per writer thread
+dynamodb_client = boto3.client("dynamodb", config=Config(max_pool_connections=ROLLUP_WRITER_WORKERS))
 
 # Get table name from environment
 ROLLUPS_TABLE_NAME = os.environ.get("ROLLUPS_TABLE_NAME", "plant_rollups")
 
-# Track devices reporting in this batch for approximate device count
-devices_seen_in_batch: Set[str] = set()
+# Optional queue for handing counter deltas to the rollup queue writer
+ROLLUP_QUEUE_URL = os.environ.get("ROLLUP_QUEUE_URL")
+sqs_client = boto3.client("sqs") if ROLLUP_QUEUE_URL else None
+
+# SendMessageBatch limits: 10 entries and 256 KB total per call, so each
+# message body is kept under a tenth of that
+SQS_BATCH_MAX_ENTRIES = 10
+SQS_MESSAGE_TARGET_BYTES = 24_000
+
+# Entries SendMessageBatch reports as failed are resent this many times in total
+SQS_PUBLISH_MAX_ATTEMPTS = 3
+SQS_PUBLISH_RETRY_BASE_SECONDS = 0.1
+
+# Stream event names that carry a NewImage worth counting
+_MUTATING_EVENTS = frozenset(("INSERT", "MODIFY"))
+
+# Sensor status marking a reading invalid
+_OUT_OF_RANGE = "out_of_range"
+
+# Attributes each metric handler reads, per source table. Stream images are
+# parsed down to these so wide items aren't fully deserialized.
+_READING_KEYS = frozenset((
+    "hardware_id", "ingest_time_ms", "timestamp_ms",
+    "temperature_status", "humidity_status", "pressure_status", "soil_moisture_status"
+))
+_EVENT_KEYS = frozenset(("event_type", "created_at_ms", "start_time_ms"))
+_AGGREGATE_KEYS = frozenset(("window_type", "computed_at_ms", "window_start_ms"))
+_INSIGHT_KEYS = frozenset((
+    "timestamp_ms", "generation_duration_ms", "confidence", "summary", "recommendations"
+))
+
+# Shared read-only dimension dicts, one per (name, value); the value sets are
+# small enums, the size cap only guards against unexpected cardinality
+_DIMENSION_CACHE: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+_DIMENSION_CACHE_MAX_SIZE = 256
+_NO_DIMENSIONS: Dict[str, Any] = {}
+
+# Millisecond fields are integral; parse them as int rather than Decimal
+_INT_KEYS = frozenset((
+    "ingest_time_ms", "timestamp_ms", "created_at_ms", "start_time_ms",
+    "computed_at_ms", "window_start_ms", "generation_duration_ms"
+))
+
+
+@dataclass(slots=True)
+class BatchContext:
+    """
+    Per-invocation state shared by the metric handlers.
+
+    Attributes:
+        accumulator: Counter increments merged across the batch
+        devices_seen: Hardware IDs seen in this batch, for the approximate device count
+    """
+    accumulator: BatchAccumulator = field(default_factory=BatchAccumulator)
+    devices_seen: Set[str] = field(default_factory=set)
 
 
 @logger.inject_lambda_context
@@ -56,31 +125,111 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
         "record_count": len(event.get("Records", []))
     })
 
-    # Reset devices seen in batch
-    global devices_seen_in_batch
-    devices_seen_in_batch = set()
+    # Counter increments are merged across the batch and written once at the end
+    ctx = BatchContext()
 
     # Process records with error isolation
     batch_item_failures = process_stream_batch_with_isolation(
         records=event.get("Records", []),
-        process_func=process_stream_record,
+        process_func=partial(process_stream_record, ctx=ctx),
         logger_instance=logger
     )
 
     # After processing all records, update devices_reporting_count
-    if devices_seen_in_batch:
-        try:
-            update_devices_reporting_count()
-        except Exception as e:
-            logger.error(
-                "Failed to update devices_reporting_count",
-                extra={"error": str(e), "error_type": type(e).__name__}
-            )
+    if ctx.devices_seen:
+        update_devices_reporting_count(ctx)
+
+    counters_written = 0
+    counters_published = 0
+    counter_increments = ctx.accumulator.increments
+    try:
+        if ROLLUP_QUEUE_URL:
+            counters_published = publish_rollup_deltas(ctx.accumulator.export_deltas())
+        else:
+            counters_written = ctx.accumulator.flush(dynamodb_client, ROLLUPS_TABLE_NAME, executor=rollup_writer)
+    except Exception as e:
+        # The batch's counters only exist in memory; fail the whole batch so
+        # the stream redelivers it instead of dropping them
+        logger.error(
+            "Failed to flush rollup counters",
+            extra={"error": str(e), "error_type": type(e).__name__}
+        )
+        raise
 
     logger.info("Rollup Updater processing complete", extra={
         "total_records": len(event.get("Records", [])),
         "failed_records": len(batch_item_failures),
-        "devices_seen": len(devices_seen_in_batch)
+        "devices_seen": len(ctx.devices_seen),
+        "counter_increments": counter_increments,
+        "counters_written": counters_written,
+        "counters_published": counters_published
+    })
+
+    return {
+        "batchItemFailures": batch_item_failures
+    }
+
+
+@logger.inject_lambda_context
+def queue_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """
+    Lambda handler for the rollup delta queue.
+
+    Merges counter deltas published by stream invocations and writes them to
+    the Rollups table. Deployed with a concurrency of two (the lowest SQS
+    maximum concurrency), so bucket rows see at most two writers; a
+    transaction conflict between them falls back to individual ADD updates.
+
+    Args:
+        event: SQS event containing Records
+        context: Lambda context
+
+    Returns:
+        Response with batch item failures for partial batch failure handling
+    """
+    records = event.get("Records", [])
+    accumulator = BatchAccumulator()
+    batch_item_failures = []
+
+    for record in records:
+        try:
+            deltas = orjson.loads(record["body"])
+            if not isinstance(deltas, list):
+                raise TypeError("message body is not a list of deltas")
+            # Every delta is validated against a scratch accumulator first, so
+            # a malformed message merges nothing that would be counted again
+            # on redelivery
+            scratch = BatchAccumulator()
+            for delta in deltas:
+                scratch.add_delta(delta)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(
+                "Malformed rollup delta message",
+                extra={"message_id": record.get("messageId"), "error": str(e)}
+            )
+            batch_item_failures.append({"itemIdentifier": record.get("messageId")})
+            continue
+
+        for delta in deltas:
+            accumulator.add_delta(delta)
+
+    try:
+        counters_written = accumulator.flush(dynamodb_client, ROLLUPS_TABLE_NAME, executor=rollup_writer)
+    except Exception as e:
+        # Merged deltas can't be traced back to their messages, so every
+        # message is returned to the queue (and eventually the DLQ)
+        logger.error(
+            "Failed to write rollup deltas",
+            extra={"message_count": len(records), "error": str(e), "error_type": type(e).__name__}
+        )
+        return {
+            "batchItemFailures": [{"itemIdentifier": record.get("messageId")} for record in records]
+        }
+
+    logger.info("Rollup delta queue processing complete", extra={
+        "message_count": len(records),
+        "failed_messages": len(batch_item_failures),
+        "counters_written": counters_written
     })
 
     return {
@@ -88,7 +237,70 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
     }
 
 
-def process_stream_record(record: Dict[str, Any]) -> None:
+def publish_rollup_deltas(deltas: List[Dict[str, Any]]) -> int:
+    """
+    Publish counter deltas to the rollup queue.
+
+    Deltas are packed into JSON-array message bodies under
+    SQS_MESSAGE_TARGET_BYTES and sent SQS_BATCH_MAX_ENTRIES messages per
+    SendMessageBatch call.
+
+    Entries SQS reports as failed are resent with backoff, up to
+    SQS_PUBLISH_MAX_ATTEMPTS sends in total.
+
+    Args:
+        deltas: Deltas from BatchAccumulator.export_deltas
+
+    Returns:
+        Number of deltas published
+
+    Raises:
+        RuntimeError: If some messages still failed after every attempt
+    """
+    bodies = []
+    current: List[str] = []
+    current_bytes = 2
+    for delta in deltas:
+        encoded = orjson.dumps(delta).decode()
+        if current and current_bytes + len(encoded) + 1 > SQS_MESSAGE_TARGET_BYTES:
+            bodies.append(current)
+            current, current_bytes = [], 2
+        current.append(encoded)
+        current_bytes += len(encoded) + 1
+    if current:
+        bodies.append(current)
+
+    published = 0
+    for start in range(0, len(bodies), SQS_BATCH_MAX_ENTRIES):
+        chunk = bodies[start:start + SQS_BATCH_MAX_ENTRIES]
+        entries = [
+            {"Id": str(i), "MessageBody": "[" + ",".join(body) + "]"}
+            for i, body in enumerate(chunk)
+        ]
+
+        for attempt in range(SQS_PUBLISH_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(SQS_PUBLISH_RETRY_BASE_SECONDS * (2 ** (attempt - 1)))
+            response = sqs_client.send_message_batch(QueueUrl=ROLLUP_QUEUE_URL, Entries=entries)
+
+            failed_ids = {entry["Id"] for entry in response.get("Failed", [])}
+            published += sum(len(chunk[int(entry["Id"])]) for entry in entries if entry["Id"] not in failed_ids)
+            entries = [entry for entry in entries if entry["Id"] in failed_ids]
+            if not entries:
+                break
+
+        if entries:
+            failed_deltas = sum(len(chunk[int(entry["Id"])]) for entry in entries)
+            logger.error("Failed to publish rollup deltas", extra={
+                "message_count": len(entries),
+                "delta_count": failed_deltas
+            })
+            raise RuntimeError(f"Failed to publish {failed_deltas} rollup deltas")
+
+    return published
+
+
+def process_stream_record(record: Dict[str, Any], ctx: BatchContext) -> None:
     """
     Process a single DynamoDB Stream record.
 
@@ -96,43 +308,79 @@ def process_stream_record(record: Dict[str, Any]) -> None:
 
     Args:
         record: DynamoDB Stream record
+        ctx: Per-invocation batch state to record increments in
     """
     event_name = record.get("eventName")
 
     # Only process INSERT and MODIFY events
-    if event_name not in ["INSERT", "MODIFY"]:
+    if event_name not in _MUTATING_EVENTS:
         logger.debug("Skipping non-INSERT/MODIFY event", extra={"event_name": event_name})
         return
 
     # Extract the new image from the stream record
-    new_image = record.get("dynamodb", {}).get("NewImage")
+    stream_data = record.get("dynamodb")
+    new_image = stream_data.get("NewImage") if stream_data else None
     if not new_image:
         logger.warning("Stream record missing NewImage")
         return
 
-    # Determine source table from event source ARN
+    # Resolve the pre-bound processor for the source table from the event source ARN
     event_source_arn = record.get("eventSourceARN", "")
-    source_table = extract_table_name_from_arn(event_source_arn)
+    processor = resolve_stream_route(event_source_arn)
+    if processor is None:
+        logger.warning("Unknown source table", extra={
+            "source_table": extract_table_name_from_arn(event_source_arn)
+        })
+        return
 
-    logger.debug("Processing stream record", extra={
-        "source_table": source_table,
-        "event_name": event_name
-    })
+    processor(new_image, event_name, ctx)
 
-    # Parse the item from DynamoDB format
-    item = parse_dynamodb_item(new_image)
 
-    # Route to appropriate handler based on source table
-    if "reading" in source_table.lower():
-        process_reading_metrics(item, event_name)
-    elif "event" in source_table.lower():
-        process_event_metrics(item, event_name)
-    elif "aggregate" in source_table.lower():
-        process_aggregate_metrics(item, event_name)
-    elif "insight" in source_table.lower():
-        process_insight_metrics(item, event_name)
-    else:
-        logger.warning("Unknown source table", extra={"source_table": source_table})
+def _make_processor(
+    handler: Callable[[Dict[str, Any], str, BatchContext], None],
+    keys: FrozenSet[str]
+) -> Callable[[Dict[str, Any], str, BatchContext], None]:
+    """
+    Bind a metric handler to the attribute set it reads.
+
+    Args:
+        handler: Metric handler for one source table
+        keys: Attributes the handler reads
+
+    Returns:
+        Processor taking (new_image, event_name, ctx)
+    """
+    def process(new_image: Dict[str, Any], event_name: str, ctx: BatchContext) -> None:
+        # Parse only the attributes the handler reads
+        handler(parse_dynamodb_item_subset(new_image, keys, _INT_KEYS), event_name, ctx)
+
+    process.__name__ = handler.__name__
+    return process
+
+
+def resolve_stream_route(arn: str) -> Optional[Callable[[Dict[str, Any], str, BatchContext], None]]:
+    """
+    Resolve the metric processor for a stream ARN.
+
+    Every record from a shard carries the same ARN, so the table-name match
+    runs once per stream and later records hit the cache.
+
+    Args:
+        arn: Event source ARN
+
+    Returns:
+        Processor for the source table, or None if it is not recognized
+    """
+    try:
+        return _arn_routes[arn]
+    except KeyError:
+        pass
+
+    table_name = extract_table_name_from_arn(arn).lower()
+    route = next((processor for token, processor in _STREAM_ROUTES.items() if token in table_name), None)
+
+    _arn_routes[arn] = route
+    return route
 
 
 def extract_table_name_from_arn(arn: str) -> str:
@@ -149,14 +397,60 @@ def extract_table_name_from_arn(arn: str) -> str:
     if not arn:
         return ""
 
-    parts = arn.split("/")
+    parts = arn.split("/", 2)
     if len(parts) >= 2:
         return parts[1]
 
     return ""
 
 
-def process_reading_metrics(item: Dict[str, Any], event_name: str) -> None:
+def _dimension(name: str, value: Any) -> Dict[str, Any]:
+    """
+    Return a shared single-entry dimensions dict for a metric.
+
+    Callers must treat the result as read-only.
+
+    Args:
+        name: Dimension name
+        value: Dimension value; a falsy value means no dimensions
+
+    Returns:
+        {name: value}, or an empty dict when value is falsy
+    """
+    if not value:
+        return _NO_DIMENSIONS
+
+    key = (name, value)
+    dimensions = _DIMENSION_CACHE.get(key)
+    if dimensions is None:
+        if len(_DIMENSION_CACHE) >= _DIMENSION_CACHE_MAX_SIZE:
+            _DIMENSION_CACHE.clear()
+        dimensions = _DIMENSION_CACHE[key] = {name: value}
+    return dimensions
+
+
+def _first_timestamp(item: Dict[str, Any], *keys: str) -> Any:
+    """
+    Return the first set timestamp among keys.
+
+    A missing or zero timestamp falls through to the next key, so an item
+    whose primary timestamp was stored as 0 is bucketed by its fallback.
+
+    Args:
+        item: Parsed item
+        keys: Attribute names in priority order
+
+    Returns:
+        First non-zero value, or None
+    """
+    for key in keys:
+        value = item.get(key)
+        if value:
+            return value
+    return None
+
+
+def process_reading_metrics(item: Dict[str, Any], event_name: str, ctx: BatchContext) -> None:
     """
     Process metrics for a reading record.
 
@@ -170,6 +464,7 @@ def process_reading_metrics(item: Dict[str, Any], event_name: str) -> None:
     Args:
         item: Parsed reading item
         event_name: DynamoDB event name (INSERT or MODIFY)
+        ctx: Per-invocation batch state to record increments in
     """
     hardware_id = item.get("hardware_id")
     ingest_time_ms = item.get("ingest_time_ms")
@@ -189,16 +484,12 @@ def process_reading_metrics(item: Dict[str, Any], event_name: str) -> None:
     # Track readings_ingested_count
     if event_name == "INSERT":
         # New reading ingested
-        update_rollup_counter(
-            dynamodb_client,
-            ROLLUPS_TABLE_NAME,
+        ctx.accumulator.add(
             "minute",
             minute_bucket,
             "readings_ingested_count"
         )
-        update_rollup_counter(
-            dynamodb_client,
-            ROLLUPS_TABLE_NAME,
+        ctx.accumulator.add(
             "hour",
             hour_bucket,
             "readings_ingested_count"
@@ -212,16 +503,12 @@ def process_reading_metrics(item: Dict[str, Any], event_name: str) -> None:
 
     elif event_name == "MODIFY":
         # Modified reading indicates deduplication
-        update_rollup_counter(
-            dynamodb_client,
-            ROLLUPS_TABLE_NAME,
+        ctx.accumulator.add(
             "minute",
             minute_bucket,
             "readings_deduped_count"
         )
-        update_rollup_counter(
-            dynamodb_client,
-            ROLLUPS_TABLE_NAME,
+        ctx.accumulator.add(
             "hour",
             hour_bucket,
             "readings_deduped_count"
@@ -233,30 +520,23 @@ def process_reading_metrics(item: Dict[str, Any], event_name: str) -> None:
             "hour_bucket": hour_bucket
         })
 
-    # Check for invalid sensor data
-    is_invalid = False
-    sensor_statuses = [
-        item.get("temperature_status"),
-        item.get("humidity_status"),
-        item.get("pressure_status"),
-        item.get("soil_moisture_status")
-    ]
-
-    # If any sensor is marked as out_of_range or if critical fields are missing
-    if "out_of_range" in sensor_statuses or not timestamp_ms:
-        is_invalid = True
+    # Invalid if critical fields are missing or any sensor is marked out_of_range;
+    # short-circuits on the first hit without building a list per reading
+    is_invalid = (
+        not timestamp_ms
+        or item.get("temperature_status") == _OUT_OF_RANGE
+        or item.get("humidity_status") == _OUT_OF_RANGE
+        or item.get("pressure_status") == _OUT_OF_RANGE
+        or item.get("soil_moisture_status") == _OUT_OF_RANGE
+    )
 
     if is_invalid:
-        update_rollup_counter(
-            dynamodb_client,
-            ROLLUPS_TABLE_NAME,
+        ctx.accumulator.add(
             "minute",
             minute_bucket,
             "readings_invalid_count"
         )
-        update_rollup_counter(
-            dynamodb_client,
-            ROLLUPS_TABLE_NAME,
+        ctx.accumulator.add(
             "hour",
             hour_bucket,
             "readings_invalid_count"
@@ -270,45 +550,37 @@ def process_reading_metrics(item: Dict[str, Any], event_name: str) -> None:
 
     # Track device for approximate device count
     if hardware_id:
-        devices_seen_in_batch.add(hardware_id)
+        ctx.devices_seen.add(hardware_id)
 
     # Track pipeline lag
     if timestamp_ms:
         lag_seconds = (now_ms - timestamp_ms) / 1000.0
         if lag_seconds >= 0:  # Only track positive lag
-            update_rollup_counter(
-                dynamodb_client,
-                ROLLUPS_TABLE_NAME,
+            ctx.accumulator.add(
                 "minute",
                 minute_bucket,
                 "pipeline_lag_seconds_sum",
                 sum_increment=lag_seconds
             )
-            update_rollup_counter(
-                dynamodb_client,
-                ROLLUPS_TABLE_NAME,
+            ctx.accumulator.add(
                 "minute",
                 minute_bucket,
                 "pipeline_lag_seconds_count"
             )
-            update_rollup_counter(
-                dynamodb_client,
-                ROLLUPS_TABLE_NAME,
+            ctx.accumulator.add(
                 "hour",
                 hour_bucket,
                 "pipeline_lag_seconds_sum",
                 sum_increment=lag_seconds
             )
-            update_rollup_counter(
-                dynamodb_client,
-                ROLLUPS_TABLE_NAME,
+            ctx.accumulator.add(
                 "hour",
                 hour_bucket,
                 "pipeline_lag_seconds_count"
             )
 
 
-def process_event_metrics(item: Dict[str, Any], event_name: str) -> None:
+def process_event_metrics(item: Dict[str, Any], event_name: str, ctx: BatchContext) -> None:
     """
     Process metrics for an event record.
 
@@ -318,9 +590,10 @@ def process_event_metrics(item: Dict[str, Any], event_name: str) -> None:
     Args:
         item: Parsed event item
         event_name: DynamoDB event name (INSERT or MODIFY)
+        ctx: Per-invocation batch state to record increments in
     """
     event_type = item.get("event_type")
-    created_at_ms = item.get("created_at_ms") or item.get("start_time_ms")
+    created_at_ms = _first_timestamp(item, "created_at_ms", "start_time_ms")
 
     if not created_at_ms:
         logger.warning("Event missing timestamp", extra={"event_type": event_type})
@@ -335,19 +608,15 @@ def process_event_metrics(item: Dict[str, Any], event_name: str) -> None:
     hour_bucket = get_hour_bucket(created_at_ms)
 
     # Track events_detected_count with event_type dimension
-    dimensions = {"event_type": event_type} if event_type else {}
+    dimensions = _dimension("event_type", event_type)
 
-    update_rollup_counter(
-        dynamodb_client,
-        ROLLUPS_TABLE_NAME,
+    ctx.accumulator.add(
         "minute",
         minute_bucket,
         "events_detected_count",
         dimensions=dimensions
     )
-    update_rollup_counter(
-        dynamodb_client,
-        ROLLUPS_TABLE_NAME,
+    ctx.accumulator.add(
         "hour",
         hour_bucket,
         "events_detected_count",
@@ -361,7 +630,7 @@ def process_event_metrics(item: Dict[str, Any], event_name: str) -> None:
     })
 
 
-def process_aggregate_metrics(item: Dict[str, Any], event_name: str) -> None:
+def process_aggregate_metrics(item: Dict[str, Any], event_name: str, ctx: BatchContext) -> None:
     """
     Process metrics for an aggregate record.
 
@@ -371,9 +640,10 @@ def process_aggregate_metrics(item: Dict[str, Any], event_name: str) -> None:
     Args:
         item: Parsed aggregate item
         event_name: DynamoDB event name (INSERT or MODIFY)
+        ctx: Per-invocation batch state to record increments in
     """
     window_type = item.get("window_type")
-    computed_at_ms = item.get("computed_at_ms") or item.get("window_start_ms")
+    computed_at_ms = _first_timestamp(item, "computed_at_ms", "window_start_ms")
 
     if not computed_at_ms:
         logger.warning("Aggregate missing timestamp", extra={"window_type": window_type})
@@ -385,19 +655,15 @@ def process_aggregate_metrics(item: Dict[str, Any], event_name: str) -> None:
     hour_bucket = get_hour_bucket(computed_at_ms)
 
     # Track aggregates_computed_count with window_type dimension
-    dimensions = {"window_type": window_type} if window_type else {}
+    dimensions = _dimension("window_type", window_type)
 
-    update_rollup_counter(
-        dynamodb_client,
-        ROLLUPS_TABLE_NAME,
+    ctx.accumulator.add(
         "minute",
         minute_bucket,
         "aggregates_computed_count",
         dimensions=dimensions
     )
-    update_rollup_counter(
-        dynamodb_client,
-        ROLLUPS_TABLE_NAME,
+    ctx.accumulator.add(
         "hour",
         hour_bucket,
         "aggregates_computed_count",
@@ -411,7 +677,7 @@ def process_aggregate_metrics(item: Dict[str, Any], event_name: str) -> None:
     })
 
 
-def process_insight_metrics(item: Dict[str, Any], event_name: str) -> None:
+def process_insight_metrics(item: Dict[str, Any], event_name: str, ctx: BatchContext) -> None:
     """
     Process metrics for an insight record.
 
@@ -423,6 +689,7 @@ def process_insight_metrics(item: Dict[str, Any], event_name: str) -> None:
     Args:
         item: Parsed insight item
         event_name: DynamoDB event name (INSERT or MODIFY)
+        ctx: Per-invocation batch state to record increments in
     """
     timestamp_ms = item.get("timestamp_ms")
     generation_duration_ms = item.get("generation_duration_ms")
@@ -447,19 +714,15 @@ def process_insight_metrics(item: Dict[str, Any], event_name: str) -> None:
     status = "success" if (has_summary or has_recommendations) else "failure"
 
     # Track insights_generated_count with status dimension
-    dimensions = {"status": status}
+    dimensions = _dimension("status", status)
 
-    update_rollup_counter(
-        dynamodb_client,
-        ROLLUPS_TABLE_NAME,
+    ctx.accumulator.add(
         "minute",
         minute_bucket,
         "insights_generated_count",
         dimensions=dimensions
     )
-    update_rollup_counter(
-        dynamodb_client,
-        ROLLUPS_TABLE_NAME,
+    ctx.accumulator.add(
         "hour",
         hour_bucket,
         "insights_generated_count",
@@ -474,32 +737,24 @@ def process_insight_metrics(item: Dict[str, Any], event_name: str) -> None:
 
     # Track generation duration if available
     if generation_duration_ms is not None and generation_duration_ms > 0:
-        update_rollup_counter(
-            dynamodb_client,
-            ROLLUPS_TABLE_NAME,
+        ctx.accumulator.add(
             "minute",
             minute_bucket,
             "insight_generation_duration_ms_sum",
             sum_increment=generation_duration_ms
         )
-        update_rollup_counter(
-            dynamodb_client,
-            ROLLUPS_TABLE_NAME,
+        ctx.accumulator.add(
             "minute",
             minute_bucket,
             "insight_generation_count"
         )
-        update_rollup_counter(
-            dynamodb_client,
-            ROLLUPS_TABLE_NAME,
+        ctx.accumulator.add(
             "hour",
             hour_bucket,
             "insight_generation_duration_ms_sum",
             sum_increment=generation_duration_ms
         )
-        update_rollup_counter(
-            dynamodb_client,
-            ROLLUPS_TABLE_NAME,
+        ctx.accumulator.add(
             "hour",
             hour_bucket,
             "insight_generation_count"
@@ -512,8 +767,21 @@ def process_insight_metrics(item: Dict[str, Any], event_name: str) -> None:
         })
 
 
+# Source-table name token -> processor, built once at import. Tokens are
+# checked in this order, so a stack prefix containing a later token (e.g.
+# "insights") doesn't hijack the readings, events or aggregates tables
+_STREAM_ROUTES = {
+    "reading": _make_processor(process_reading_metrics, _READING_KEYS),
+    "event": _make_processor(process_event_metrics, _EVENT_KEYS),
+    "aggregate": _make_processor(process_aggregate_metrics, _AGGREGATE_KEYS),
+    "insight": _make_processor(process_insight_metrics, _INSIGHT_KEYS),
+}
+
+# Resolved routes by stream ARN, kept across warm invocations
+_arn_routes: Dict[str, Optional[Callable[[Dict[str, Any], str, BatchContext], None]]] = {}
+
 
-def update_devices_reporting_count() -> None:
+def update_devices_reporting_count(ctx: BatchContext) -> None:
     """
     Update the approximate count of devices reporting in this batch.
 
@@ -522,33 +790,34 @@ def update_devices_reporting_count() -> None:
 
     Uses the current time for bucketing since this is a system-level metric
     computed at processing time, not event time.
+
+    Args:
+        ctx: Per-invocation batch state to record increments in
     """
     now_ms = int(time.time() * 1000)
     minute_bucket = get_minute_bucket(now_ms)
     hour_bucket = get_hour_bucket(now_ms)
 
-    device_count = len(devices_seen_in_batch)
+    device_count = len(ctx.devices_seen)
+    device_slots = {distinct_slot(hardware_id) for hardware_id in ctx.devices_seen}
 
-    # Update devices_reporting_count
-    # Note: This is an approximate count since we're incrementing by the number
-    # of unique devices seen in this batch. Multiple batches may see the same device.
-    # For a more accurate count, the dashboard should deduplicate or use this as
-    # an activity indicator rather than an exact unique device count.
-    update_rollup_counter(
-        dynamodb_client,
-        ROLLUPS_TABLE_NAME,
+    # count is incremented by the number of unique devices seen in this batch,
+    # so overlapping batches double-count it; treat it as an activity indicator.
+    # The slots set is a union across batches, so its size gives an approximate
+    # unique device count for the bucket (see distinct_slot).
+    ctx.accumulator.add(
         "minute",
         minute_bucket,
         "devices_reporting_count",
-        count_increment=device_count
+        count_increment=device_count,
+        slots=device_slots
     )
-    update_rollup_counter(
-        dynamodb_client,
-        ROLLUPS_TABLE_NAME,
+    ctx.accumulator.add(
         "hour",
         hour_bucket,
         "devices_reporting_count",
-        count_increment=device_count
+        count_increment=device_count,
+        slots=device_slots
     )
 
     logger.debug("Updated devices_reporting_count", extra={
@@ -0,0 +1,26 @@
+"""
+Shared AWS client configuration.
+
+Provides module-level DynamoDB client and resource singletons configured for
+Lambda reuse: TCP keep-alive so warm-but-idle containers don't redo the
+TCP/TLS handshake, a connection pool sized for concurrent callers, and
+short timeouts so a stalled connection is retried quickly. Adaptive retry
+mode adds client-side rate limiting on throttles, so callers should not wrap
+these clients in their own retry loops.
+"""
+
+import boto3
+from botocore.config import Config
+
+# Client configuration shared by every DynamoDB caller
+DDB_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=50,
+    connect_timeout=1,
+    read_timeout=3,
+    retries={"mode": "adaptive", "total_max_attempts": 5}
+)
+
+# Created once per container and reused across warm invocations
+dynamodb = boto3.client("dynamodb", config=DDB_CONFIG)
+dynamodb_resource = boto3.resource("dynamodb", config=DDB_CONFIG)
@@ -9,10 +9,45 @@ Provides functions for:
 - Status summary computation
 """
 
-from typing import Optional, List
-from datetime import datetime
+import time
+from typing import Any, Dict, Optional, List
+import boto3
 from shared.models import DeviceStatus, HealthCategory, ErrorRecord
 
+# Maximum error records kept in last_errors (Requirement 23.19)
+MAX_DEVICE_ERRORS = 10
+
+# DynamoDB resource and Table handles are created on first use and reused
+# across calls and warm invocations
+_dynamodb_resource = None
+_table_cache: Dict[str, Any] = {}
+
+
+def _get_table(table_name: str) -> Any:
+    """
+    Get a cached DynamoDB Table handle.
+
+    Args:
+        table_name: DynamoDB table name
+
+    Returns:
+        boto3 Table resource
+    """
+    global _dynamodb_resource
+
+    table = _table_cache.get(table_name)
+    if table is None:
+        if _dynamodb_resource is None:
+            _dynamodb_resource = boto3.resource('dynamodb')
+        table = _table_cache[table_name] = _dynamodb_resource.Table(table_name)
+
+    return table
+
+
+def _now_ms() -> int:
+    """Current wall-clock time in epoch milliseconds, without float math."""
+    return time.time_ns() // 1_000_000
+
 
 def derive_health_category(
     last_seen_ingest_time_ms: Optional[int],
@@ -37,7 +72,7 @@ def derive_health_category(
         HealthCategory enum value
     """
     if current_time_ms is None:
-        current_time_ms = int(datetime.utcnow().timestamp() * 1000)
+        current_time_ms = _now_ms()
 
     # Failing takes precedence if error within 24 hours
     if last_error_at_ms is not None:
@@ -71,8 +106,8 @@ def truncate_error_message(message: str, max_length: int = 256) -> str:
     Returns:
         Truncated message
     """
-    if len(message) <= max_length:
-        return message
+    # A slice covering the whole string returns the original object, so no
+    # length check is needed for short messages
     return message[:max_length]
 
 
@@ -81,7 +116,7 @@ def append_error_to_list(
     timestamp_ms: int,
     error_code: str,
     error_message: str,
-    max_errors: int = 10
+    max_errors: int = MAX_DEVICE_ERRORS
 ) -> List[ErrorRecord]:
     """
     Append error to error list, maintaining max size and truncating message.
@@ -118,6 +153,25 @@ def append_error_to_list(
     return updated_errors
 
 
+def build_error_entry(timestamp_ms: int, error_code: str, error_message: str) -> Dict[str, Any]:
+    """
+    Build a last_errors entry in DynamoDB item format.
+
+    Args:
+        timestamp_ms: Error timestamp
+        error_code: Error code
+        error_message: Error message (will be truncated)
+
+    Returns:
+        Error entry dict ready to be written to DynamoDB
+    """
+    return {
+        'timestamp_ms': timestamp_ms,
+        'error_code': error_code,
+        'error_message': truncate_error_message(error_message)
+    }
+
+
 def update_device_status_with_error(
     device_status: DeviceStatus,
     error_code: str,
@@ -142,7 +196,7 @@ def update_device_status_with_error(
         Updated device status
     """
     if error_timestamp_ms is None:
-        error_timestamp_ms = int(datetime.utcnow().timestamp() * 1000)
+        error_timestamp_ms = _now_ms()
 
     device_status.last_error_at_ms = error_timestamp_ms
     device_status.last_error_code = error_code
@@ -174,13 +228,9 @@ def update_device_status_field(
         field_value: Value to set
         table_name: DynamoDB table name (defaults to plant_device_status)
     """
-    import boto3
-    import time
+    table = _get_table(table_name)
 
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(table_name)
-
-    now_ms = int(time.time() * 1000)
+    now_ms = _now_ms()
 
     try:
         table.update_item(
@@ -189,7 +239,8 @@ def update_device_status_field(
             ExpressionAttributeValues={
                 ':val': field_value,
                 ':now': now_ms
-            }
+            },
+            ReturnValues='NONE'
         )
     except Exception as e:
         # Log error but don't fail the operation
@@ -214,62 +265,41 @@ def record_device_error(
         error_message: Error message (will be truncated to 256 chars)
         table_name: DynamoDB table name (defaults to plant_device_status)
     """
-    import boto3
-    import time
-
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(table_name)
+    table = _get_table(table_name)
 
-    now_ms = int(time.time() * 1000)
-    truncated_message = truncate_error_message(error_message)
+    now_ms = _now_ms()
 
     try:
-        # First, get current errors list
-        response = table.get_item(Key={'hardware_id': hardware_id})
-
-        existing_errors = []
-        if 'Item' in response:
-            existing_errors_raw = response['Item'].get('last_errors', [])
-            existing_errors = [
-                ErrorRecord(
-                    timestamp_ms=err['timestamp_ms'],
-                    error_code=err['error_code'],
-                    error_message=err['error_message']
-                )
-                for err in existing_errors_raw
-            ]
-
-        # Append new error
-        updated_errors = append_error_to_list(
-            existing_errors,
-            now_ms,
-            error_code,
-            truncated_message
-        )
-
-        # Convert to DynamoDB format
-        errors_list = [
-            {
-                'timestamp_ms': err.timestamp_ms,
-                'error_code': err.error_code,
-                'error_message': err.error_message
-            }
-            for err in updated_errors
-        ]
-
-        # Update device status
-        table.update_item(
+        # Append atomically server-side; no read, and no lost update when two
+        # pipelines record errors for the same device concurrently
+        response = table.update_item(
             Key={'hardware_id': hardware_id},
-            UpdateExpression='SET last_error_at_ms = :error_at, last_error_code = :error_code, last_errors = :errors, updated_at_ms = :now',
+            UpdateExpression='SET last_error_at_ms = :error_at, last_error_code = :error_code, '
+                             'last_errors = list_append(if_not_exists(last_errors, :empty), :new_error), '
+                             'updated_at_ms = :now',
             ExpressionAttributeValues={
                 ':error_at': now_ms,
                 ':error_code': error_code,
-                ':errors': errors_list,
+                ':new_error': [build_error_entry(now_ms, error_code, error_message)],
+                ':empty': [],
                 ':now': now_ms
-            }
+            },
+            ReturnValues='UPDATED_NEW'
         )
+
+        # Trim the oldest entries once the list grows past the cap. The
+        # size condition makes this a no-op if another append raced in.
+        error_count = len(response.get('Attributes', {}).get('last_errors', []))
+        if error_count > MAX_DEVICE_ERRORS:
+            excess = error_count - MAX_DEVICE_ERRORS
+            table.update_item(
+                Key={'hardware_id': hardware_id},
+                UpdateExpression='REMOVE ' + ', '.join(f'last_errors[{i}]' for i in range(excess)),
+                ConditionExpression='size(last_errors) = :count',
+                ExpressionAttributeValues={':count': error_count},
+                ReturnValues='NONE'
+            )
     except Exception as e:
         # Log error but don't fail the operation
         import logging
         logging.error(f"Error recording device error for {hardware_id}: {e}")
-
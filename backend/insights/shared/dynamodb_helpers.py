@@ -2,19 +2,46 @@
 DynamoDB Stream record parsing utilities.
 """
 
-from typing import Dict, Any
-from boto3.dynamodb.types import TypeDeserializer
+from typing import Dict, Any, FrozenSet
+from boto3.dynamodb.types import TypeDeserializer, Binary, DYNAMODB_CONTEXT
 
 
 # Initialize the deserializer
 deserializer = TypeDeserializer()
 
 
+def _deserialize_value(value: Dict[str, Any]) -> Any:
+    """Deserialize one typed attribute value via the tag dispatch table."""
+    for tag, raw in value.items():
+        func = _TAG_FUNCS.get(tag)
+        if func is None:
+            return deserializer.deserialize(value)
+        return func(raw)
+    return deserializer.deserialize(value)
+
+
+# Type-tag -> converter, built once. Mirrors TypeDeserializer's conversions
+# without its per-value getattr dispatch; unknown tags fall back to it.
+_TAG_FUNCS = {
+    'S': lambda v: v,
+    'N': DYNAMODB_CONTEXT.create_decimal,
+    'BOOL': lambda v: v,
+    'NULL': lambda v: None,
+    'B': Binary,
+    'SS': set,
+    'NS': lambda v: set(map(DYNAMODB_CONTEXT.create_decimal, v)),
+    'BS': lambda v: set(map(Binary, v)),
+    'L': lambda v: [_deserialize_value(item) for item in v],
+    'M': lambda v: {k: _deserialize_value(item) for k, item in v.items()},
+}
+
+
 def parse_dynamodb_item(dynamodb_item: Dict[str, Any]) -> Dict[str, Any]:
     """
     Parse a DynamoDB item from stream format to Python dict.
 
-    Uses boto3's TypeDeserializer for proper type conversion.
+    Uses the same type conversions as boto3's TypeDeserializer, dispatched
+    through a precomputed tag table.
 
     Args:
         dynamodb_item: DynamoDB item in stream format (with type descriptors like 'S', 'N', etc.)
@@ -25,9 +52,39 @@ def parse_dynamodb_item(dynamodb_item: Dict[str, Any]) -> Dict[str, Any]:
     if not dynamodb_item:
         return {}
 
+    return {key: _deserialize_value(value) for key, value in dynamodb_item.items()}
+
+
+def parse_dynamodb_item_subset(
+    dynamodb_item: Dict[str, Any],
+    keys: FrozenSet[str],
+    int_keys: FrozenSet[str] = frozenset()
+) -> Dict[str, Any]:
+    """
+    Parse only the named attributes of a DynamoDB item from stream format.
+
+    Attributes outside keys are skipped without being deserialized, so wide
+    items cost only as much as the fields the caller reads.
+
+    Args:
+        dynamodb_item: DynamoDB item in stream format
+        keys: Attribute names to parse
+        int_keys: Numeric attributes to convert straight to int instead of Decimal
+
+    Returns:
+        Parsed item containing only the requested attributes that are present
+    """
+    if not dynamodb_item:
+        return {}
+
     python_dict = {}
     for key, value in dynamodb_item.items():
-        python_dict[key] = deserializer.deserialize(value)
+        if key not in keys:
+            continue
+        if key in int_keys and 'N' in value:
+            python_dict[key] = int(value['N'])
+        else:
+            python_dict[key] = _deserialize_value(value)
 
     return python_dict
 
@@ -1,46 +1,142 @@
 """Event detection logic."""
 import os
 import time
-from typing import List, Dict, Any, Optional
-import boto3
+from dataclasses import dataclass
+from decimal import Decimal
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Tuple
+from boto3.dynamodb.types import TypeSerializer
 from botocore.exceptions import ClientError
 from aws_lambda_powertools import Logger
+from .aws_clients import dynamodb, dynamodb_resource
 from .models import Event, EventType
 
 logger = Logger(child=True)
-dynamodb = boto3.client("dynamodb")
-dynamodb_resource = boto3.resource("dynamodb")
+_serializer = TypeSerializer()
 
 READINGS_TABLE = os.environ.get("READINGS_TABLE", "plant_readings")
 EVENTS_TABLE = os.environ.get("EVENTS_TABLE", "plant_events")
 DEVICE_STATUS_TABLE = os.environ.get("DEVICE_STATUS_TABLE", "plant_device_status")
 INSIGHT_REQUESTS_TABLE = os.environ.get("INSIGHT_REQUESTS_TABLE", "plant_insight_requests")
 
+readings_table = dynamodb_resource.Table(READINGS_TABLE)
+events_table = dynamodb_resource.Table(EVENTS_TABLE)
+insight_requests_table = dynamodb_resource.Table(INSIGHT_REQUESTS_TABLE)
+
+# Sort key for (timestamp, value) samples
+_sample_timestamp = itemgetter(0)
+
 COOLDOWN_WATERING = 60 * 60 * 1000
 COOLDOWN_TEMPERATURE_STRESS = 30 * 60 * 1000
 COOLDOWN_HUMIDITY_ANOMALY = 30 * 60 * 1000
 COOLDOWN_ENVIRONMENTAL_CHANGE = 2 * 60 * 60 * 1000
 
-
-def get_recent_readings(hardware_id: str, since_ms: int, limit: int = 100) -> List[Dict[str, Any]]:
-    """Fetch recent readings."""
+# Start time of the latest known event per (hardware_id, event_type value).
+# Lives for the container's lifetime so events the cache already proves are in
+# cooldown skip the transaction; a miss falls through to the transaction's
+# cooldown condition. The size cap only guards memory across many devices.
+_last_event_start: Dict[Tuple[str, str], int] = {}
+_LAST_EVENT_CACHE_MAX_SIZE = 4096
+
+# The event commit transaction updates the device status row that other
+# writers also touch, so conflict cancellations are retried with backoff
+EVENT_COMMIT_MAX_ATTEMPTS = 3
+EVENT_COMMIT_RETRY_BASE_SECONDS = 0.05
+
+
+def get_recent_readings(
+    hardware_id: str,
+    since_ms: int,
+    limit: int = 100,
+    until_ms: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fetch recent readings, oldest first.
+
+    Without until_ms, returns the first `limit` readings from since_ms on.
+    With until_ms, returns the last `limit` readings before until_ms.
+    """
     try:
-        table = dynamodb_resource.Table(READINGS_TABLE)
-        response = table.query(
-            KeyConditionExpression="hardware_id = :hw_id AND timestamp_ms >= :since",
-            ExpressionAttributeValues={":hw_id": hardware_id, ":since": since_ms},
+        if until_ms is None:
+            response = readings_table.query(
+                KeyConditionExpression="hardware_id = :hw_id AND timestamp_ms >= :since",
+                ExpressionAttributeValues={":hw_id": hardware_id, ":since": since_ms},
+                Limit=limit,
+                ScanIndexForward=True
+            )
+            return response.get("Items", [])
+
+        response = readings_table.query(
+            KeyConditionExpression="hardware_id = :hw_id AND timestamp_ms BETWEEN :since AND :until",
+            ExpressionAttributeValues={":hw_id": hardware_id, ":since": since_ms, ":until": until_ms - 1},
             Limit=limit,
-            ScanIndexForward=True
+            ScanIndexForward=False
         )
-        return response.get("Items", [])
+        return response.get("Items", [])[::-1]
     except ClientError as e:
         logger.error("Error fetching readings", extra={"error": str(e)})
         return []
 
 
 
+@dataclass(slots=True)
+class ReadingColumns:
+    """Usable samples per sensor, extracted once from a list of readings."""
+    soil_moisture: List[Tuple[int, Any]]
+    humidity: List[Tuple[int, Any]]
+    environment: List[Tuple[int, Any, Any, Any]]
+
+
+def _created_at(now_ms: Optional[int]) -> int:
+    """Creation time for a detected event, reading the clock only if the caller didn't."""
+    return now_ms if now_ms is not None else int(time.time() * 1000)
+
+
+def readings_to_columns(readings: List[Dict[str, Any]]) -> ReadingColumns:
+    """
+    Split readings into per-sensor sample columns.
+
+    Missing values and non-ok statuses are filtered here, once, so detectors
+    walk flat tuples instead of re-reading and re-checking every dict.
+
+    Args:
+        readings: Readings as returned by get_recent_readings
+
+    Returns:
+        (timestamp, value) soil moisture and humidity columns, and
+        (timestamp, temperature, humidity, pressure) environment samples
+    """
+    soil_moisture = []
+    humidity = []
+    environment = []
+
+    for r in readings:
+        timestamp = r.get("timestamp_ms")
+
+        moisture = r.get("soil_moisture")
+        if moisture is not None and r.get("soil_moisture_status", "ok") == "ok":
+            soil_moisture.append((timestamp, moisture))
+
+        hum = r.get("humidity")
+        if hum is None or r.get("humidity_status", "ok") != "ok":
+            continue
+        humidity.append((timestamp, hum))
+
+        temp = r.get("temperature")
+        pressure = r.get("pressure")
+        if (temp is not None and r.get("temperature_status", "ok") == "ok" and
+            pressure is not None and r.get("pressure_status", "ok") == "ok"):
+            environment.append((timestamp, temp, hum, pressure))
+
+    return ReadingColumns(soil_moisture, humidity, environment)
+
+
 def detect_watering_event(readings: List[Dict[str, Any]], current_reading: Dict[str, Any]) -> Optional[Event]:
     """Detect watering events."""
+    return _detect_watering_event(readings_to_columns(readings), current_reading)
+
+
+def _detect_watering_event(columns: ReadingColumns, current_reading: Dict[str, Any], now_ms: Optional[int] = None) -> Optional[Event]:
     hardware_id = current_reading.get("hardware_id")
     current_timestamp = current_reading.get("timestamp_ms")
     current_moisture = current_reading.get("soil_moisture")
@@ -49,66 +145,98 @@ def detect_watering_event(readings: List[Dict[str, Any]], current_reading: Dict[
     if current_moisture is None or current_status != "ok":
         return None
 
-    valid_readings = [
-        r for r in readings
-        if r.get("soil_moisture") is not None
-        and r.get("soil_moisture_status", "ok") == "ok"
-        and r.get("timestamp_ms") < current_timestamp
-    ]
+    thirty_min_ago = current_timestamp - (30 * 60 * 1000)
+    sixty_min_ago = current_timestamp - (60 * 60 * 1000)
 
-    if not valid_readings:
+    # Single walk: filter valid samples and track both windows' min moisture,
+    # earliest timestamp and, for the 60 minute window, rises between samples
+    has_valid = False
+    count_30 = count_60 = 0
+    min_30 = min_60 = None
+    start_30 = start_60 = None
+    positive_slopes = 0
+    prev_timestamp = prev_moisture = None
+    in_order = True
+    recent_60min = []
+
+    for timestamp, moisture in columns.soil_moisture:
+        if timestamp >= current_timestamp:
+            continue
+        has_valid = True
+        if timestamp < sixty_min_ago:
+            continue
+
+        recent_60min.append((timestamp, moisture))
+        count_60 += 1
+        if min_60 is None or moisture < min_60:
+            min_60 = moisture
+        if start_60 is None or timestamp < start_60:
+            start_60 = timestamp
+        if prev_timestamp is not None:
+            if timestamp < prev_timestamp:
+                in_order = False
+            elif moisture > prev_moisture:
+                positive_slopes += 1
+        prev_timestamp, prev_moisture = timestamp, moisture
+
+        if timestamp >= thirty_min_ago:
+            count_30 += 1
+            if min_30 is None or moisture < min_30:
+                min_30 = moisture
+            if start_30 is None or timestamp < start_30:
+                start_30 = timestamp
+
+    if not has_valid:
         return None
 
-    thirty_min_ago = current_timestamp - (30 * 60 * 1000)
-    recent_30min = [r for r in valid_readings if r.get("timestamp_ms") >= thirty_min_ago]
-
-    if recent_30min:
-        min_moisture = min(r.get("soil_moisture") for r in recent_30min)
-        increase = current_moisture - min_moisture
+    if count_30:
+        increase = current_moisture - min_30
 
         if increase > 15.0:
-            start_time = min(r.get("timestamp_ms") for r in recent_30min)
             return Event(
                 hardware_id=hardware_id,
                 event_type=EventType.WATERING_EVENT,
-                start_time_ms=start_time,
+                start_time_ms=start_30,
                 end_time_ms=current_timestamp,
-                sensor_values={"soil_moisture_before": min_moisture, "soil_moisture_after": current_moisture, "increase_pct": increase},
+                sensor_values={"soil_moisture_before": min_30, "soil_moisture_after": current_moisture, "increase_pct": increase},
                 detection_metadata={"detection_mode": "rapid_spike", "window_minutes": 30},
-                created_at_ms=int(time.time() * 1000)
+                created_at_ms=_created_at(now_ms)
             )
 
-    sixty_min_ago = current_timestamp - (60 * 60 * 1000)
-    recent_60min = [r for r in valid_readings if r.get("timestamp_ms") >= sixty_min_ago]
-
-    if len(recent_60min) >= 2:
-        min_moisture = min(r.get("soil_moisture") for r in recent_60min)
-        increase = current_moisture - min_moisture
+    if count_60 >= 2:
+        increase = current_moisture - min_60
 
         if increase >= 10.0:
-            all_samples = recent_60min + [current_reading]
-            all_samples.sort(key=lambda x: x.get("timestamp_ms"))
-
-            positive_slopes = sum(1 for i in range(len(all_samples) - 1) if all_samples[i + 1].get("soil_moisture") > all_samples[i].get("soil_moisture"))
+            if in_order:
+                # The current reading is newer than every sample in the window
+                if current_moisture > prev_moisture:
+                    positive_slopes += 1
+            else:
+                # Readings arrive sorted from the query; only re-sort if they didn't
+                all_samples = recent_60min + [(current_timestamp, current_moisture)]
+                all_samples.sort(key=_sample_timestamp)
+                positive_slopes = sum(1 for i in range(len(all_samples) - 1) if all_samples[i + 1][1] > all_samples[i][1])
 
             if positive_slopes >= 2:
-                start_time = min(r.get("timestamp_ms") for r in recent_60min)
                 return Event(
                     hardware_id=hardware_id,
                     event_type=EventType.WATERING_EVENT,
-                    start_time_ms=start_time,
+                    start_time_ms=start_60,
                     end_time_ms=current_timestamp,
-                    sensor_values={"soil_moisture_before": min_moisture, "soil_moisture_after": current_moisture, "increase_pct": increase},
+                    sensor_values={"soil_moisture_before": min_60, "soil_moisture_after": current_moisture, "increase_pct": increase},
                     detection_metadata={"detection_mode": "gradual_rise", "window_minutes": 60},
-                    created_at_ms=int(time.time() * 1000)
+                    created_at_ms=_created_at(now_ms)
                 )
 
     return None
 
 
-
 def detect_drying_cycle(readings: List[Dict[str, Any]], current_reading: Dict[str, Any]) -> Optional[Event]:
     """Detect drying cycle."""
+    return _detect_drying_cycle(readings_to_columns(readings), current_reading)
+
+
+def _detect_drying_cycle(columns: ReadingColumns, current_reading: Dict[str, Any], now_ms: Optional[int] = None) -> Optional[Event]:
     hardware_id = current_reading.get("hardware_id")
     current_timestamp = current_reading.get("timestamp_ms")
     current_moisture = current_reading.get("soil_moisture")
@@ -117,44 +245,67 @@ def detect_drying_cycle(readings: List[Dict[str, Any]], current_reading: Dict[st
         return None
 
     six_hours_ago = current_timestamp - (6 * 60 * 60 * 1000)
-    valid_readings = [
-        r for r in readings
-        if r.get("soil_moisture") is not None
-        and r.get("soil_moisture_status", "ok") == "ok"
-        and r.get("timestamp_ms") >= six_hours_ago
-        and r.get("timestamp_ms") < current_timestamp
-    ]
+
+    # Single walk: filter the window and track max moisture, earliest
+    # timestamp and declines between consecutive samples
+    valid_readings = []
+    max_moisture = current_moisture
+    start_time = None
+    declining_count = 0
+    prev_timestamp = prev_moisture = None
+    in_order = True
+
+    for timestamp, moisture in columns.soil_moisture:
+        if timestamp < six_hours_ago or timestamp >= current_timestamp:
+            continue
+
+        valid_readings.append((timestamp, moisture))
+        if moisture > max_moisture:
+            max_moisture = moisture
+        if start_time is None or timestamp < start_time:
+            start_time = timestamp
+        if prev_timestamp is not None:
+            if timestamp < prev_timestamp:
+                in_order = False
+            elif moisture < prev_moisture:
+                declining_count += 1
+        prev_timestamp, prev_moisture = timestamp, moisture
 
     if not valid_readings:
         return None
 
-    all_samples = valid_readings + [current_reading]
-    all_samples.sort(key=lambda x: x.get("timestamp_ms"))
-
-    if len(all_samples) < 3:
+    sample_count = len(valid_readings) + 1
+    if sample_count < 3:
         return None
 
-    max_moisture = max(r.get("soil_moisture") for r in all_samples)
     total_drop = max_moisture - current_moisture
 
     if total_drop > 10.0:
-        declining_count = sum(1 for i in range(len(all_samples) - 1) if all_samples[i + 1].get("soil_moisture") < all_samples[i].get("soil_moisture"))
-
-        if declining_count >= (len(all_samples) - 1) * 0.7:
+        if in_order:
+            # The current reading is newer than every sample in the window
+            if current_moisture < prev_moisture:
+                declining_count += 1
+        else:
+            # Readings arrive sorted from the query; only re-sort if they didn't
+            all_samples = valid_readings + [(current_timestamp, current_moisture)]
+            all_samples.sort(key=_sample_timestamp)
+            declining_count = sum(1 for i in range(len(all_samples) - 1) if all_samples[i + 1][1] < all_samples[i][1])
+
+        if declining_count >= (sample_count - 1) * 0.7:
             return Event(
                 hardware_id=hardware_id,
                 event_type=EventType.DRYING_CYCLE,
-                start_time_ms=all_samples[0].get("timestamp_ms"),
+                start_time_ms=start_time,
                 end_time_ms=current_timestamp,
                 sensor_values={"soil_moisture_start": max_moisture, "soil_moisture_end": current_moisture, "total_drop_pct": total_drop},
                 detection_metadata={"window_hours": 6},
-                created_at_ms=int(time.time() * 1000)
+                created_at_ms=_created_at(now_ms)
             )
 
     return None
 
 
-def detect_temperature_stress(current_reading: Dict[str, Any]) -> Optional[Event]:
+def detect_temperature_stress(current_reading: Dict[str, Any], now_ms: Optional[int] = None) -> Optional[Event]:
     """Detect temperature stress."""
     temperature = current_reading.get("temperature")
 
@@ -170,7 +321,7 @@ def detect_temperature_stress(current_reading: Dict[str, Any]) -> Optional[Event
             end_time_ms=current_reading.get("timestamp_ms"),
             sensor_values={"temperature": temperature, "stress_type": stress_type},
             detection_metadata={},
-            created_at_ms=int(time.time() * 1000)
+            created_at_ms=_created_at(now_ms)
         )
 
     return None
@@ -178,35 +329,46 @@ def detect_temperature_stress(current_reading: Dict[str, Any]) -> Optional[Event
 
 def detect_humidity_anomaly(readings: List[Dict[str, Any]], current_reading: Dict[str, Any]) -> Optional[Event]:
     """Detect humidity anomaly."""
+    return _detect_humidity_anomaly(readings_to_columns(readings), current_reading)
+
+
+def _detect_humidity_anomaly(columns: ReadingColumns, current_reading: Dict[str, Any], now_ms: Optional[int] = None) -> Optional[Event]:
     current_humidity = current_reading.get("humidity")
 
     if current_humidity is None or current_reading.get("humidity_status", "ok") != "ok":
         return None
 
-    one_hour_ago = current_reading.get("timestamp_ms") - (60 * 60 * 1000)
-    valid_readings = [
-        r for r in readings
-        if r.get("humidity") is not None
-        and r.get("humidity_status", "ok") == "ok"
-        and r.get("timestamp_ms") >= one_hour_ago
-        and r.get("timestamp_ms") < current_reading.get("timestamp_ms")
-    ]
+    current_timestamp = current_reading.get("timestamp_ms")
+    one_hour_ago = current_timestamp - (60 * 60 * 1000)
 
-    if not valid_readings:
+    # Single walk tracking the window's humidity range, seeded with the current reading
+    has_valid = False
+    min_humidity = max_humidity = current_humidity
+
+    for timestamp, humidity in columns.humidity:
+        if timestamp < one_hour_ago or timestamp >= current_timestamp:
+            continue
+
+        has_valid = True
+        if humidity < min_humidity:
+            min_humidity = humidity
+        elif humidity > max_humidity:
+            max_humidity = humidity
+
+    if not has_valid:
         return None
 
-    all_humidity = [r.get("humidity") for r in valid_readings] + [current_humidity]
-    humidity_change = max(all_humidity) - min(all_humidity)
+    humidity_change = max_humidity - min_humidity
 
     if humidity_change > 20.0:
         return Event(
             hardware_id=current_reading.get("hardware_id"),
             event_type=EventType.HUMIDITY_ANOMALY,
             start_time_ms=one_hour_ago,
-            end_time_ms=current_reading.get("timestamp_ms"),
+            end_time_ms=current_timestamp,
             sensor_values={"change_pct": humidity_change},
             detection_metadata={},
-            created_at_ms=int(time.time() * 1000)
+            created_at_ms=_created_at(now_ms)
         )
 
     return None
@@ -214,6 +376,10 @@ def detect_humidity_anomaly(readings: List[Dict[str, Any]], current_reading: Dic
 
 def detect_environmental_change(readings: List[Dict[str, Any]], current_reading: Dict[str, Any]) -> Optional[Event]:
     """Detect environmental change."""
+    return _detect_environmental_change(readings_to_columns(readings), current_reading)
+
+
+def _detect_environmental_change(columns: ReadingColumns, current_reading: Dict[str, Any], now_ms: Optional[int] = None) -> Optional[Event]:
     current_temp = current_reading.get("temperature")
     current_humidity = current_reading.get("humidity")
     current_pressure = current_reading.get("pressure")
@@ -223,41 +389,101 @@ def detect_environmental_change(readings: List[Dict[str, Any]], current_reading:
         current_pressure is None or current_reading.get("pressure_status", "ok") != "ok"):
         return None
 
-    two_hours_ago = current_reading.get("timestamp_ms") - (2 * 60 * 60 * 1000)
-    valid_readings = [
-        r for r in readings
-        if (r.get("temperature") is not None and r.get("temperature_status", "ok") == "ok" and
-            r.get("humidity") is not None and r.get("humidity_status", "ok") == "ok" and
-            r.get("pressure") is not None and r.get("pressure_status", "ok") == "ok" and
-            r.get("timestamp_ms") >= two_hours_ago and
-            r.get("timestamp_ms") < current_reading.get("timestamp_ms"))
-    ]
-
-    if not valid_readings:
+    current_timestamp = current_reading.get("timestamp_ms")
+    two_hours_ago = current_timestamp - (2 * 60 * 60 * 1000)
+
+    # Single walk tracking all three ranges, seeded with the current reading
+    has_valid = False
+    min_temp = max_temp = current_temp
+    min_humidity = max_humidity = current_humidity
+    min_pressure = max_pressure = current_pressure
+
+    for timestamp, temp, humidity, pressure in columns.environment:
+        if timestamp < two_hours_ago or timestamp >= current_timestamp:
+            continue
+
+        has_valid = True
+        if temp < min_temp:
+            min_temp = temp
+        elif temp > max_temp:
+            max_temp = temp
+        if humidity < min_humidity:
+            min_humidity = humidity
+        elif humidity > max_humidity:
+            max_humidity = humidity
+        if pressure < min_pressure:
+            min_pressure = pressure
+        elif pressure > max_pressure:
+            max_pressure = pressure
+
+    if not has_valid:
         return None
 
-    all_temps = [r.get("temperature") for r in valid_readings] + [current_temp]
-    all_humidity = [r.get("humidity") for r in valid_readings] + [current_humidity]
-    all_pressure = [r.get("pressure") for r in valid_readings] + [current_pressure]
-
-    temp_change = max(all_temps) - min(all_temps)
-    humidity_change = max(all_humidity) - min(all_humidity)
-    pressure_change = max(all_pressure) - min(all_pressure)
+    temp_change = max_temp - min_temp
+    humidity_change = max_humidity - min_humidity
+    pressure_change = max_pressure - min_pressure
 
     if temp_change > 10.0 and humidity_change > 15.0 and pressure_change > 10.0:
         return Event(
             hardware_id=current_reading.get("hardware_id"),
             event_type=EventType.ENVIRONMENTAL_CHANGE,
             start_time_ms=two_hours_ago,
-            end_time_ms=current_reading.get("timestamp_ms"),
+            end_time_ms=current_timestamp,
             sensor_values={"temperature_change": temp_change, "humidity_change": humidity_change, "pressure_change": pressure_change},
             detection_metadata={},
-            created_at_ms=int(time.time() * 1000)
+            created_at_ms=_created_at(now_ms)
         )
 
     return None
 
 
+# Detector name -> detector taking (columns, current_reading, now_ms), in run order
+_DETECTORS = (
+    ("watering", _detect_watering_event),
+    ("drying", _detect_drying_cycle),
+    ("temperature_stress", lambda columns, current_reading, now_ms: detect_temperature_stress(current_reading, now_ms)),
+    ("humidity_anomaly", _detect_humidity_anomaly),
+    ("environmental_change", _detect_environmental_change),
+)
+
+
+def run_all_detectors(
+    readings: List[Dict[str, Any]],
+    current_reading: Dict[str, Any],
+    now_ms: Optional[int] = None
+) -> List[Tuple[str, Event]]:
+    """
+    Run every event detector over a reading and its recent context.
+
+    Detectors are pure CPU work over data already fetched, so they run in
+    sequence over columns extracted once; a failing detector is logged and
+    skipped.
+
+    Returns:
+        (detector_name, event) pairs for the detectors that fired
+    """
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    columns = readings_to_columns(readings)
+    detected = []
+    for detector_name, detector in _DETECTORS:
+        try:
+            event = detector(columns, current_reading, now_ms)
+        except Exception as e:
+            logger.error(
+                "Error in %s detection",
+                detector_name,
+                extra={
+                    "hardware_id": current_reading.get("hardware_id"),
+                    "error": str(e),
+                    "error_type": type(e).__name__
+                }
+            )
+            continue
+        if event:
+            detected.append((detector_name, event))
+    return detected
+
 
 def get_cooldown_period(event_type: EventType) -> int:
     """Get cooldown period."""
@@ -271,37 +497,30 @@ def get_cooldown_period(event_type: EventType) -> int:
     return cooldowns.get(event_type, 0)
 
 
-def check_cooldown(hardware_id: str, event_type: EventType, current_time_ms: int) -> bool:
-    """Check if event type is in cooldown."""
-    cooldown_ms = get_cooldown_period(event_type)
-    if cooldown_ms == 0:
-        return False
+def _remember_event_start(hardware_id: str, event_type: EventType, start_time_ms: int) -> None:
+    """Record an event start time in the local cooldown cache, keeping the latest."""
+    key = (hardware_id, event_type.value)
+    if start_time_ms <= _last_event_start.get(key, -1):
+        return
+    if key not in _last_event_start and len(_last_event_start) >= _LAST_EVENT_CACHE_MAX_SIZE:
+        _last_event_start.clear()
+    _last_event_start[key] = start_time_ms
 
-    try:
-        table = dynamodb_resource.Table(EVENTS_TABLE)
-        since_ms = current_time_ms - cooldown_ms
-
-        response = table.query(
-            KeyConditionExpression="hardware_id = :hw_id AND start_time_ms >= :since",
-            FilterExpression="event_type = :event_type",
-            ExpressionAttributeValues={":hw_id": hardware_id, ":since": since_ms, ":event_type": event_type.value},
-            Limit=1
-        )
 
-        return len(response.get("Items", [])) > 0
-    except ClientError as e:
-        logger.error("Error checking cooldown", extra={"error": str(e)})
-        return False
+def _cached_in_cooldown(hardware_id: str, event_type: EventType, since_ms: int) -> bool:
+    """Check the local cache for an event of this type starting at or after since_ms."""
+    start = _last_event_start.get((hardware_id, event_type.value))
+    return start is not None and start >= since_ms
 
 
 def persist_event(event: Event) -> bool:
     """Persist event."""
     try:
-        table = dynamodb_resource.Table(EVENTS_TABLE)
-        table.put_item(
+        events_table.put_item(
             Item=event.to_dynamodb_item(),
             ConditionExpression="attribute_not_exists(hardware_id) AND attribute_not_exists(start_time_ms)"
         )
+        _remember_event_start(event.hardware_id, event.event_type, event.start_time_ms)
         return True
     except ClientError as e:
         if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
@@ -310,52 +529,251 @@ def persist_event(event: Event) -> bool:
         raise
 
 
-def update_device_status_after_event(hardware_id: str, event_time_ms: int) -> None:
-    """Update device status."""
-    try:
+def _to_attribute_value(value: Any) -> Dict[str, Any]:
+    """Serialize a value for the low-level client, converting floats to Decimal."""
+    if isinstance(value, float):
+        value = Decimal(str(value))
+    elif isinstance(value, dict):
+        return {"M": {k: _to_attribute_value(v) for k, v in value.items()}}
+    elif isinstance(value, list):
+        return {"L": [_to_attribute_value(v) for v in value]}
+    return _serializer.serialize(value)
+
+
+def last_event_attribute(event_type: EventType) -> str:
+    """Device status attribute holding the start time of the last event of a type."""
+    return f"last_{event_type.value.lower()}_at_ms"
+
+
+def _commit_events_transaction(events: List[Event], event_time_ms: int, now_ms: Optional[int] = None) -> bool:
+    """
+    Put events and update their device's status in one transaction.
+
+    Each Put is guarded against duplicates. The single device status Update
+    records every event type's start time and, for types with a cooldown, is
+    conditioned on the previous event of that type being older than the window.
+
+    Args:
+        events: Events for one device, at most one per event type
+        event_time_ms: Timestamp of the reading that produced the events
+        now_ms: Current time in milliseconds, read from the clock if not given
+
+    Returns:
+        True if committed, False if any event already exists or any type is in cooldown
+
+    Raises:
+        ClientError: If the transaction fails for any other reason, including
+            conflicts that persist after EVENT_COMMIT_MAX_ATTEMPTS attempts
+    """
+    if now_ms is None:
         now_ms = int(time.time() * 1000)
-        dynamodb.update_item(
-            TableName=DEVICE_STATUS_TABLE,
-            Key={"hardware_id": {"S": hardware_id}},
-            UpdateExpression="SET last_event_detected_at_ms = :now, last_processed_event_time_ms = :event_time, updated_at_ms = :now",
-            ExpressionAttributeValues={":now": {"N": str(now_ms)}, ":event_time": {"N": str(event_time_ms)}}
-        )
-    except ClientError as e:
-        logger.error("Error updating device status", extra={"error": str(e)})
+    set_clauses = ["last_event_detected_at_ms = :now", "last_processed_event_time_ms = :event_time", "updated_at_ms = :now"]
+    conditions = []
+    names = {}
+    values = {":now": {"N": str(now_ms)}, ":event_time": {"N": str(event_time_ms)}}
+
+    for i, event in enumerate(events):
+        names[f"#last_{i}"] = last_event_attribute(event.event_type)
+        values[f":start_{i}"] = {"N": str(event.start_time_ms)}
+        set_clauses.append(f"#last_{i} = :start_{i}")
+
+        cooldown_ms = get_cooldown_period(event.event_type)
+        if cooldown_ms:
+            values[f":cooldown_since_{i}"] = {"N": str(event_time_ms - cooldown_ms)}
+            conditions.append(f"(attribute_not_exists(#last_{i}) OR #last_{i} < :cooldown_since_{i})")
+
+    status_update = {
+        "TableName": DEVICE_STATUS_TABLE,
+        "Key": {"hardware_id": {"S": events[0].hardware_id}},
+        "UpdateExpression": "SET " + ", ".join(set_clauses),
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values
+    }
+    if conditions:
+        status_update["ConditionExpression"] = " AND ".join(conditions)
+
+    transact_items = [
+        {
+            "Put": {
+                "TableName": EVENTS_TABLE,
+                "Item": {k: _to_attribute_value(v) for k, v in event.to_dynamodb_item().items()},
+                "ConditionExpression": "attribute_not_exists(hardware_id) AND attribute_not_exists(start_time_ms)"
+            }
+        }
+        for event in events
+    ]
+    transact_items.append({"Update": status_update})
+
+    for attempt in range(1, EVENT_COMMIT_MAX_ATTEMPTS + 1):
+        try:
+            dynamodb.transact_write_items(TransactItems=transact_items)
+            break
+        except ClientError as e:
+            reasons = []
+            if e.response["Error"]["Code"] == "TransactionCanceledException":
+                reasons = [reason.get("Code") for reason in e.response.get("CancellationReasons", [])]
+                if "ConditionalCheckFailed" in reasons:
+                    # Duplicate event or type still in cooldown
+                    return False
+            if "TransactionConflict" in reasons and attempt < EVENT_COMMIT_MAX_ATTEMPTS:
+                time.sleep(EVENT_COMMIT_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+                continue
+            logger.error("Error committing events", extra={
+                "error": str(e),
+                "event_count": len(events),
+                "attempts": attempt
+            })
+            raise
+
+    for event in events:
+        _remember_event_start(event.hardware_id, event.event_type, event.start_time_ms)
+    return True
+
+
+def _known_in_cooldown(event: Event, event_time_ms: int) -> bool:
+    """Check whether the local cache already proves the event's type is in cooldown."""
+    cooldown_ms = get_cooldown_period(event.event_type)
+    return bool(cooldown_ms) and _cached_in_cooldown(event.hardware_id, event.event_type, event_time_ms - cooldown_ms)
+
+
+def commit_event_atomic(event: Event, event_time_ms: int, now_ms: Optional[int] = None) -> bool:
+    """
+    Persist an event and update device status in one transaction.
+
+    The event Put is guarded against duplicates, and the device status Update
+    enforces the event type's cooldown server-side against a per-type
+    last-event timestamp, replacing the separate cooldown query.
+
+    Args:
+        event: Detected event
+        event_time_ms: Timestamp of the reading that produced the event
+        now_ms: Current time in milliseconds, read from the clock if not given
+
+    Returns:
+        True if committed, False if the event already exists or its type is in cooldown
+    """
+    if _known_in_cooldown(event, event_time_ms):
+        # A recent event is already known; the transaction's condition would fail
+        return False
+
+    return _commit_events_transaction([event], event_time_ms, now_ms)
+
+
+def commit_events_atomic(events: List[Event], event_time_ms: int, now_ms: Optional[int] = None) -> List[bool]:
+    """
+    Persist a reading's events and update device status with one transaction.
+
+    All events are written together with a single combined device status
+    Update. If the transaction is cancelled because one event is a duplicate
+    or in cooldown, the events are retried one transaction each, so the
+    others still commit.
+
+    Args:
+        events: Events detected for one reading
+        event_time_ms: Timestamp of the reading that produced the events
+        now_ms: Current time in milliseconds, read from the clock if not given
+
+    Returns:
+        Committed flag per event, in input order
+    """
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+
+    committed = [False] * len(events)
+    pending = [i for i, event in enumerate(events) if not _known_in_cooldown(event, event_time_ms)]
+
+    # One status update can only carry one timestamp per event type
+    if len(pending) > 1 and len({events[i].event_type for i in pending}) == len(pending):
+        if _commit_events_transaction([events[i] for i in pending], event_time_ms, now_ms):
+            for i in pending:
+                committed[i] = True
+            return committed
+
+    for i in pending:
+        committed[i] = commit_event_atomic(events[i], event_time_ms, now_ms)
+    return committed
+
+
+def is_critical_event(event_type: EventType) -> bool:
+    """Check if an event type warrants an event-driven insight request."""
+    return event_type == EventType.TEMPERATURE_STRESS
+
+
+def _insight_request_allowed(table: Any, hardware_id: str, now_ms: int) -> bool:
+    """Check the pending-request batching window and the daily event-driven cap."""
+    one_hour_ago = now_ms - (60 * 60 * 1000)
+    one_day_ago = now_ms - (24 * 60 * 60 * 1000)
+
+    # One query over the day covers both checks; the hour window is a subset
+    query_kwargs = {
+        "KeyConditionExpression": "hardware_id = :hw_id AND request_time_ms >= :since",
+        "ProjectionExpression": "request_time_ms, #status, request_type",
+        "ExpressionAttributeNames": {"#status": "status"},
+        "ExpressionAttributeValues": {":hw_id": hardware_id, ":since": one_day_ago}
+    }
+
+    event_requests = 0
+    while True:
+        response = table.query(**query_kwargs)
+        for item in response.get("Items", []):
+            if item.get("status") == "pending" and item["request_time_ms"] >= one_hour_ago:
+                return False
+            if item.get("request_type") == "event":
+                event_requests += 1
+
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        query_kwargs["ExclusiveStartKey"] = last_key
+
+    return event_requests < 6
 
 
 def create_insight_request_for_critical_event(hardware_id: str, event_type: EventType) -> None:
     """Create insight request for critical events."""
-    if event_type != EventType.TEMPERATURE_STRESS:
+    if not is_critical_event(event_type):
         return
 
     try:
         now_ms = int(time.time() * 1000)
-        one_hour_ago = now_ms - (60 * 60 * 1000)
-        one_day_ago = now_ms - (24 * 60 * 60 * 1000)
+        if not _insight_request_allowed(insight_requests_table, hardware_id, now_ms):
+            return
 
-        table = dynamodb_resource.Table(INSIGHT_REQUESTS_TABLE)
+        insight_requests_table.put_item(Item={"hardware_id": hardware_id, "request_time_ms": now_ms, "request_type": "event", "event_type": event_type.value, "status": "pending"})
+    except ClientError as e:
+        logger.error("Error creating insight request", extra={"error": str(e)})
 
-        response = table.query(
-            KeyConditionExpression="hardware_id = :hw_id AND request_time_ms >= :since",
-            FilterExpression="#status = :pending",
-            ExpressionAttributeNames={"#status": "status"},
-            ExpressionAttributeValues={":hw_id": hardware_id, ":since": one_hour_ago, ":pending": "pending"},
-            Limit=1
-        )
 
-        if response.get("Items"):
-            return
+def create_insight_requests_for_critical_events(critical_events: List[Tuple[str, EventType]]) -> int:
+    """
+    Create insight requests for critical events collected over a stream batch.
 
-        response = table.query(
-            KeyConditionExpression="hardware_id = :hw_id AND request_time_ms >= :since",
-            FilterExpression="request_type = :event_type",
-            ExpressionAttributeValues={":hw_id": hardware_id, ":since": one_day_ago, ":event_type": "event"}
-        )
+    At most one request is created per device, since a pending request already
+    covers every critical event inside the batching window. Eligible requests
+    are written together through a batch writer.
+    """
+    first_event_by_device: Dict[str, EventType] = {}
+    for hardware_id, event_type in critical_events:
+        if is_critical_event(event_type):
+            first_event_by_device.setdefault(hardware_id, event_type)
 
-        if len(response.get("Items", [])) >= 6:
-            return
+    if not first_event_by_device:
+        return 0
 
-        table.put_item(Item={"hardware_id": hardware_id, "request_time_ms": now_ms, "request_type": "event", "event_type": event_type.value, "status": "pending"})
+    created = 0
+    try:
+        now_ms = int(time.time() * 1000)
+        eligible = [
+            (hardware_id, event_type)
+            for hardware_id, event_type in first_event_by_device.items()
+            if _insight_request_allowed(insight_requests_table, hardware_id, now_ms)
+        ]
+
+        with insight_requests_table.batch_writer() as batch:
+            for hardware_id, event_type in eligible:
+                batch.put_item(Item={"hardware_id": hardware_id, "request_time_ms": now_ms, "request_type": "event", "event_type": event_type.value, "status": "pending"})
+        created = len(eligible)
     except ClientError as e:
-        logger.error("Error creating insight request", extra={"error": str(e)})
+        logger.error("Error creating insight requests", extra={"error": str(e)})
+
+    return created
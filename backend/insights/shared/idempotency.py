@@ -6,19 +6,52 @@ Provides functions to check and mark readings as processed for different pipelin
 
 import os
 import time
-from typing import Optional
-import boto3
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
 from botocore.exceptions import ClientError
 from aws_lambda_powertools import Logger
 
-logger = Logger(child=True)
+# Imported both as part of the shared package and as a top-level module by
+# handlers that put shared/ on sys.path
+try:
+    from .aws_clients import dynamodb
+except ImportError:
+    from aws_clients import dynamodb
 
-# DynamoDB client
-dynamodb = boto3.client("dynamodb")
+logger = Logger(child=True)
 
 # Table name from environment
 PROCESSED_READINGS_TABLE = os.environ.get("PROCESSED_READINGS_TABLE", "plant_processed_readings")
 
+# String set attribute holding every stage a reading has completed
+STAGES_ATTR = "stages_processed"
+
+
+class Stage(str, Enum):
+    """Pipeline stages, recorded together in one string set attribute per reading."""
+    EVENT = "event"
+    AGGREGATE = "aggregate"
+    STATUS = "status"
+
+    @property
+    def legacy_attribute(self) -> str:
+        """Per-stage timestamp marker written before the stage set existed."""
+        return f"{self.value}_processed_at_ms"
+
+
+# One read fetches every stage's marker; legacy markers are still honoured
+# until they expire via TTL
+PROCESSED_FLAGS_PROJECTION = ", ".join(["reading_id", STAGES_ATTR] + [stage.legacy_attribute for stage in Stage])
+
+PROCESSED_MARKER_TTL_SECONDS = 30 * 24 * 60 * 60
+
+# Conditional marks for a stream batch are issued concurrently; the pool is
+# reused across warm invocations and stays under the client's connection pool
+MARK_WORKERS = 16
+_mark_executor = ThreadPoolExecutor(max_workers=MARK_WORKERS)
+
+
 
 def generate_reading_id(batch_id: str, timestamp_ms: int) -> str:
     """
@@ -34,62 +67,93 @@ def generate_reading_id(batch_id: str, timestamp_ms: int) -> str:
     return f"{batch_id}#{timestamp_ms}"
 
 
-def is_event_processed(reading_id: str) -> bool:
+def get_processed_flags(reading_id: str) -> Dict[str, Any]:
     """
-    Check if reading has already been processed for event detection.
+    Get the processed markers for all pipeline stages of a reading.
+
+    Read with a single GetItem projecting every stage's marker. Stream
+    processing does not need this: the conditional mark itself reports
+    duplicates. It is kept for callers that need to peek without reserving.
 
     Args:
         reading_id: Reading ID
 
     Returns:
-        True if already processed, False otherwise
+        Raw item with the stage set and any legacy markers (empty if none)
     """
     try:
         response = dynamodb.get_item(
             TableName=PROCESSED_READINGS_TABLE,
             Key={"reading_id": {"S": reading_id}},
-            ProjectionExpression="event_processed_at_ms"
+            ProjectionExpression=PROCESSED_FLAGS_PROJECTION
         )
-
-        item = response.get("Item", {})
-        return "event_processed_at_ms" in item
+        return response.get("Item", {})
 
     except ClientError as e:
         logger.error(
-            "Error checking event processed status",
+            "Error checking processed status",
             extra={"reading_id": reading_id, "error": str(e)}
         )
         # On error, assume not processed to avoid data loss
-        return False
+        return {}
 
 
-def mark_event_processed_if_absent(reading_id: str, hardware_id: str) -> bool:
+def is_stage_processed(reading_id: str, stage: Stage) -> bool:
     """
-    Mark reading as processed for event detection using conditional write.
+    Check if reading has already been processed for a pipeline stage.
 
-    Only marks if not already marked to ensure idempotency.
+    Args:
+        reading_id: Reading ID
+        stage: Pipeline stage
+
+    Returns:
+        True if already processed, False otherwise
+    """
+    flags = get_processed_flags(reading_id)
+    return stage.value in flags.get(STAGES_ATTR, {}).get("SS", ()) or stage.legacy_attribute in flags
+
+
+def mark_stage_processed_if_absent(reading_id: str, hardware_id: str, stage: Stage, now_ms: Optional[int] = None) -> bool:
+    """
+    Mark reading as processed for a pipeline stage using conditional write.
+
+    Every stage adds itself to the same string set, so the marker item holds
+    one attribute for all stages instead of one timestamp per stage. The
+    conditional write doubles as the duplicate check: callers reserve the
+    reading with it before processing instead of reading the marker first.
 
     Args:
         reading_id: Reading ID
         hardware_id: Device hardware ID
+        stage: Pipeline stage
+        now_ms: Current time in milliseconds, read from the clock if not given
 
     Returns:
         True if successfully marked (was not already marked), False if already marked
     """
-    now_ms = int(time.time() * 1000)
-    ttl = int(time.time()) + (30 * 24 * 60 * 60)  # 30 days from now
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    ttl = now_ms // 1000 + PROCESSED_MARKER_TTL_SECONDS
 
     try:
         dynamodb.update_item(
             TableName=PROCESSED_READINGS_TABLE,
             Key={"reading_id": {"S": reading_id}},
-            UpdateExpression="SET event_processed_at_ms = :now, hardware_id = :hw_id, ttl = :ttl",
-            ConditionExpression="attribute_not_exists(event_processed_at_ms)",
+            UpdateExpression="ADD #stages :stage SET hardware_id = :hw_id, last_processed_at_ms = :now, #ttl = :ttl",
+            ConditionExpression="NOT contains(#stages, :stage_name) AND attribute_not_exists(#legacy)",
+            ExpressionAttributeNames={
+                "#stages": STAGES_ATTR,
+                "#legacy": stage.legacy_attribute,
+                "#ttl": "ttl"
+            },
             ExpressionAttributeValues={
+                ":stage": {"SS": [stage.value]},
+                ":stage_name": {"S": stage.value},
                 ":now": {"N": str(now_ms)},
                 ":hw_id": {"S": hardware_id},
                 ":ttl": {"N": str(ttl)}
-            }
+            },
+            ReturnValues="NONE"
         )
         return True
 
@@ -97,88 +161,143 @@ def mark_event_processed_if_absent(reading_id: str, hardware_id: str) -> bool:
         if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
             # Already processed
             logger.debug(
-                "Reading already marked as event processed",
-                extra={"reading_id": reading_id}
+                "Reading already marked as processed",
+                extra={"reading_id": reading_id, "stage": stage.value}
             )
             return False
         else:
             logger.error(
-                "Error marking reading as event processed",
-                extra={"reading_id": reading_id, "error": str(e)}
+                "Error marking reading as processed",
+                extra={"reading_id": reading_id, "stage": stage.value, "error": str(e)}
             )
             raise
 
 
-def is_aggregate_processed(reading_id: str) -> bool:
+def mark_stage_processed_batch(
+    readings: List[Tuple[str, str]],
+    stage: Stage,
+    now_ms: Optional[int] = None
+) -> Dict[str, bool]:
     """
-    Check if reading has already been processed for aggregation.
+    Reserve many readings for a pipeline stage with concurrent conditional writes.
+
+    Each reading still gets its own conditional UpdateItem (BatchWriteItem
+    cannot carry conditions), but the round trips overlap instead of adding up.
 
     Args:
-        reading_id: Reading ID
+        readings: (reading_id, hardware_id) pairs; repeated reading IDs are marked once
+        stage: Pipeline stage
+        now_ms: Current time in milliseconds, read from the clock if not given
 
     Returns:
-        True if already processed, False otherwise
+        Dict of reading_id to True if newly marked, False if already marked.
+        Readings whose write failed are omitted so callers can retry them singly.
+    """
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    unique = list(dict(readings).items())
+
+    def mark(entry: Tuple[str, str]) -> Tuple[str, Optional[bool]]:
+        reading_id, hardware_id = entry
+        try:
+            return reading_id, mark_stage_processed_if_absent(reading_id, hardware_id, stage, now_ms)
+        except Exception:
+            # Already logged; the caller falls back to marking this reading itself
+            return reading_id, None
+
+    return {
+        reading_id: marked
+        for reading_id, marked in _mark_executor.map(mark, unique)
+        if marked is not None
+    }
+
+
+def release_stage_processed(reading_id: str, stage: Stage) -> None:
+    """
+    Remove a stage's mark so the reading is processed again on retry.
+
+    Used when processing fails after the reading was reserved with
+    mark_stage_processed_if_absent.
+
+    Args:
+        reading_id: Reading ID
+        stage: Pipeline stage
     """
     try:
-        response = dynamodb.get_item(
+        dynamodb.update_item(
             TableName=PROCESSED_READINGS_TABLE,
             Key={"reading_id": {"S": reading_id}},
-            ProjectionExpression="aggregate_processed_at_ms"
+            UpdateExpression="DELETE #stages :stage",
+            ExpressionAttributeNames={"#stages": STAGES_ATTR},
+            ExpressionAttributeValues={":stage": {"SS": [stage.value]}},
+            ReturnValues="NONE"
         )
 
-        item = response.get("Item", {})
-        return "aggregate_processed_at_ms" in item
-
     except ClientError as e:
         logger.error(
-            "Error checking aggregate processed status",
-            extra={"reading_id": reading_id, "error": str(e)}
+            "Error releasing processed mark",
+            extra={"reading_id": reading_id, "stage": stage.value, "error": str(e)}
         )
-        return False
+        raise
 
 
-def mark_aggregate_processed_if_absent(reading_id: str, hardware_id: str) -> bool:
+def is_event_processed(reading_id: str) -> bool:
     """
-    Mark reading as processed for aggregation using conditional write.
+    Check if reading has already been processed for event detection.
+
+    Args:
+        reading_id: Reading ID
+
+    Returns:
+        True if already processed, False otherwise
+    """
+    return is_stage_processed(reading_id, Stage.EVENT)
+
+
+def mark_event_processed_if_absent(reading_id: str, hardware_id: str, now_ms: Optional[int] = None) -> bool:
+    """
+    Mark reading as processed for event detection using conditional write.
+
+    Only marks if not already marked to ensure idempotency.
 
     Args:
         reading_id: Reading ID
         hardware_id: Device hardware ID
+        now_ms: Current time in milliseconds, read from the clock if not given
 
     Returns:
-        True if successfully marked, False if already marked
+        True if successfully marked (was not already marked), False if already marked
     """
-    now_ms = int(time.time() * 1000)
-    ttl = int(time.time()) + (30 * 24 * 60 * 60)  # 30 days
+    return mark_stage_processed_if_absent(reading_id, hardware_id, Stage.EVENT, now_ms)
 
-    try:
-        dynamodb.update_item(
-            TableName=PROCESSED_READINGS_TABLE,
-            Key={"reading_id": {"S": reading_id}},
-            UpdateExpression="SET aggregate_processed_at_ms = :now, hardware_id = :hw_id, ttl = :ttl",
-            ConditionExpression="attribute_not_exists(aggregate_processed_at_ms)",
-            ExpressionAttributeValues={
-                ":now": {"N": str(now_ms)},
-                ":hw_id": {"S": hardware_id},
-                ":ttl": {"N": str(ttl)}
-            }
-        )
-        return True
 
-    except ClientError as e:
-        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
-            return False
-        else:
-            logger.error(
-                "Error marking reading as aggregate processed",
-                extra={"reading_id": reading_id, "error": str(e)}
-            )
-            raise
+def mark_events_processed_batch(readings: List[Tuple[str, str]], now_ms: Optional[int] = None) -> Dict[str, bool]:
+    """
+    Reserve a stream batch's readings for event detection concurrently.
 
+    Args:
+        readings: (reading_id, hardware_id) pairs
+        now_ms: Current time in milliseconds, read from the clock if not given
 
-def is_status_processed(reading_id: str) -> bool:
+    Returns:
+        Dict of reading_id to True if newly marked, False if already marked
     """
-    Check if reading has already been processed for status update.
+    return mark_stage_processed_batch(readings, Stage.EVENT, now_ms)
+
+
+def release_event_processed(reading_id: str) -> None:
+    """
+    Release a reading's event detection mark after a processing failure.
+
+    Args:
+        reading_id: Reading ID
+    """
+    release_stage_processed(reading_id, Stage.EVENT)
+
+
+def is_aggregate_processed(reading_id: str) -> bool:
+    """
+    Check if reading has already been processed for aggregation.
 
     Args:
         reading_id: Reading ID
@@ -186,58 +305,47 @@ def is_status_processed(reading_id: str) -> bool:
     Returns:
         True if already processed, False otherwise
     """
-    try:
-        response = dynamodb.get_item(
-            TableName=PROCESSED_READINGS_TABLE,
-            Key={"reading_id": {"S": reading_id}},
-            ProjectionExpression="status_processed_at_ms"
-        )
+    return is_stage_processed(reading_id, Stage.AGGREGATE)
 
-        item = response.get("Item", {})
-        return "status_processed_at_ms" in item
 
-    except ClientError as e:
-        logger.error(
-            "Error checking status processed status",
-            extra={"reading_id": reading_id, "error": str(e)}
-        )
-        return False
+def mark_aggregate_processed_if_absent(reading_id: str, hardware_id: str, now_ms: Optional[int] = None) -> bool:
+    """
+    Mark reading as processed for aggregation using conditional write.
+
+    Args:
+        reading_id: Reading ID
+        hardware_id: Device hardware ID
+        now_ms: Current time in milliseconds, read from the clock if not given
+
+    Returns:
+        True if successfully marked, False if already marked
+    """
+    return mark_stage_processed_if_absent(reading_id, hardware_id, Stage.AGGREGATE, now_ms)
+
+
+def is_status_processed(reading_id: str) -> bool:
+    """
+    Check if reading has already been processed for status update.
 
+    Args:
+        reading_id: Reading ID
 
-def mark_status_processed_if_absent(reading_id: str, hardware_id: str) -> bool:
+    Returns:
+        True if already processed, False otherwise
+    """
+    return is_stage_processed(reading_id, Stage.STATUS)
+
+
+def mark_status_processed_if_absent(reading_id: str, hardware_id: str, now_ms: Optional[int] = None) -> bool:
     """
     Mark reading as processed for status update using conditional write.
 
     Args:
         reading_id: Reading ID
         hardware_id: Device hardware ID
+        now_ms: Current time in milliseconds, read from the clock if not given
 
     Returns:
         True if successfully marked, False if already marked
     """
-    now_ms = int(time.time() * 1000)
-    ttl = int(time.time()) + (30 * 24 * 60 * 60)  # 30 days
-
-    try:
-        dynamodb.update_item(
-            TableName=PROCESSED_READINGS_TABLE,
-            Key={"reading_id": {"S": reading_id}},
-            UpdateExpression="SET status_processed_at_ms = :now, hardware_id = :hw_id, ttl = :ttl",
-            ConditionExpression="attribute_not_exists(status_processed_at_ms)",
-            ExpressionAttributeValues={
-                ":now": {"N": str(now_ms)},
-                ":hw_id": {"S": hardware_id},
-                ":ttl": {"N": str(ttl)}
-            }
-        )
-        return True
-
-    except ClientError as e:
-        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
-            return False
-        else:
-            logger.error(
-                "Error marking reading as status processed",
-                extra={"reading_id": reading_id, "error": str(e)}
-            )
-            raise
+    return mark_stage_processed_if_absent(reading_id, hardware_id, Stage.STATUS, now_ms)
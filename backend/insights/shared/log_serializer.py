@@ -0,0 +1,21 @@
+"""
+Shared JSON serializer for Powertools loggers.
+
+Handlers pass these to ``Logger(json_serializer=..., json_deserializer=...)``
+so every structured log line is encoded by orjson instead of stdlib json.
+Values orjson can't encode natively (Decimal from DynamoDB items, custom
+objects) fall back to ``str``, matching Powertools' default ``json_default``.
+"""
+
+from typing import Any, Dict
+
+import orjson
+
+_DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+json_deserializer = orjson.loads
+
+
+def json_serializer(record: Dict[str, Any]) -> str:
+    """Serialize a log record to a JSON string."""
+    return orjson.dumps(record, default=str, option=_DUMPS_OPTIONS).decode()
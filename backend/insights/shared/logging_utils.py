@@ -4,9 +4,35 @@ Logging utilities for structured logging across all Lambda functions.
 Provides helper functions for consistent structured logging with AWS Lambda Powertools.
 """
 
-from typing import Dict, Any, Optional
+import logging
+from typing import Dict, Any, Iterable, Optional
 from aws_lambda_powertools import Logger
 
+# Unit conversion factors for skew reporting
+_MS_TO_SEC = 1e-3
+_SEC_TO_MIN = 1.0 / 60.0
+
+# Constant portion of each helper's extra dict, built once at import
+_CLOCK_SKEW_BASE = {"warning_type": "clock_skew"}
+_LATE_ARRIVAL_BASE = {"event_type": "late_arrival"}
+_EVENT_DETECTION_BASE = {"event_category": "event_detection"}
+_EVENT_COOLDOWN_BASE = {"event_category": "event_cooldown"}
+_AGGREGATE_UPDATE_BASE = {"event_category": "aggregate_update"}
+_INSIGHT_START_BASE = {"event_category": "insight_generation", "phase": "start"}
+_INSIGHT_SUCCESS_BASE = {
+    "event_category": "insight_generation",
+    "phase": "success",
+    "outcome": "success"
+}
+_INSIGHT_FAILURE_BASE = {
+    "event_category": "insight_generation",
+    "phase": "failure",
+    "outcome": "failure"
+}
+_LLM_API_CALL_BASE = {"event_category": "llm_api_call"}
+_STREAM_ERROR_BASE = {"event_category": "stream_processing_error"}
+_DEVICE_STATUS_BASE = {"event_category": "device_status_update"}
+
 
 def log_clock_skew_warning(
     logger: Logger,
@@ -25,19 +51,21 @@ def log_clock_skew_warning(
         ingest_time_ms: Ingest timestamp from backend
         reading_id: Optional reading ID for correlation
     """
-    skew_seconds = (event_time_ms - ingest_time_ms) / 1000.0
-    skew_minutes = skew_seconds / 60.0
+    if not logger.isEnabledFor(logging.WARNING):
+        return
+
+    skew_seconds = (event_time_ms - ingest_time_ms) * _MS_TO_SEC
+    skew_minutes = skew_seconds * _SEC_TO_MIN
 
     logger.warning(
         "Clock skew detected - event_time ahead of ingest_time",
-        extra={
+        extra=_CLOCK_SKEW_BASE | {
             "hardware_id": hardware_id,
             "reading_id": reading_id,
             "event_time_ms": event_time_ms,
             "ingest_time_ms": ingest_time_ms,
             "skew_seconds": skew_seconds,
-            "skew_minutes": skew_minutes,
-            "warning_type": "clock_skew"
+            "skew_minutes": skew_minutes
         }
     )
 
@@ -65,11 +93,24 @@ def log_late_arrival(
         within_lateness_window: Whether within 24-hour lateness window
         reading_id: Optional reading ID for correlation
     """
-    log_level = "info" if within_lateness_window else "warning"
-    action = "triggering_rebuild" if within_lateness_window else "skipping_aggregate_update"
+    log_level = logging.INFO if within_lateness_window else logging.WARNING
+    if not logger.isEnabledFor(log_level):
+        return
 
-    l
-    "event_type": "late_arrival"
+    action = "triggering_rebuild" if within_lateness_window else "skipping_aggregate_update"
+    log_func = logger.info if within_lateness_window else logger.warning
+    log_func(
+        "Late data arrival - %s",
+        action,
+        extra=_LATE_ARRIVAL_BASE | {
+            "hardware_id": hardware_id,
+            "reading_id": reading_id,
+            "reading_timestamp_ms": reading_timestamp_ms,
+            "window_start_ms": window_start_ms,
+            "window_end_ms": window_end_ms,
+            "lateness_hours": lateness_hours,
+            "within_lateness_window": within_lateness_window,
+            "action": action
         }
     )
 
@@ -95,12 +136,14 @@ def log_event_detection(
         detection_metadata: Optional metadata about detection
         reading_id: Optional reading ID that triggered detection
     """
-    extra_data = {
+    if not logger.isEnabledFor(logging.INFO):
+        return
+
+    extra_data = _EVENT_DETECTION_BASE | {
         "hardware_id": hardware_id,
         "reading_id": reading_id,
         "event_type": event_type,
-        "start_time_ms": start_time_ms,
-        "event_category": "event_detection"
+        "start_time_ms": start_time_ms
     }
 
     if end_time_ms:
@@ -111,7 +154,8 @@ def log_event_detection(
         extra_data["detection_metadata"] = detection_metadata
 
     logger.info(
-        f"Event detected: {event_type}",
+        "Event detected: %s",
+        event_type,
         extra=extra_data
     )
 
@@ -135,15 +179,18 @@ def log_event_cooldown_skip(
         cooldown_minutes: Cooldown period in minutes
         reading_id: Optional reading ID
     """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+
     logger.debug(
-        f"Event skipped due to cooldown: {event_type}",
-        extra={
+        "Event skipped due to cooldown: %s",
+        event_type,
+        extra=_EVENT_COOLDOWN_BASE | {
             "hardware_id": hardware_id,
             "reading_id": reading_id,
             "event_type": event_type,
             "last_event_time_ms": last_event_time_ms,
-            "cooldown_minutes": cooldown_minutes,
-            "event_category": "event_cooldown"
+            "cooldown_minutes": cooldown_minutes
         }
     )
 
@@ -171,21 +218,25 @@ def log_aggregate_update(
         reading_count: Optional count of readings in aggregate
         reading_id: Optional reading ID that triggered update
     """
-    extra_data = {
+    if not logger.isEnabledFor(logging.INFO):
+        return
+
+    extra_data = _AGGREGATE_UPDATE_BASE | {
         "hardware_id": hardware_id,
         "reading_id": reading_id,
         "window_type": window_type,
         "window_start_ms": window_start_ms,
         "window_end_ms": window_end_ms,
-        "update_type": update_type,
-        "event_category": "aggregate_update"
+        "update_type": update_type
     }
 
     if reading_count is not None:
         extra_data["reading_count"] = reading_count
 
     logger.info(
-        f"Aggregate updated: {window_type} {update_type}",
+        "Aggregate updated: %s %s",
+        window_type,
+        update_type,
         extra=extra_data
     )
 
@@ -207,12 +258,10 @@ def log_insight_generation_start(
     """
     logger.info(
         "Starting insight generation",
-        extra={
+        extra=_INSIGHT_START_BASE | {
             "hardware_id": hardware_id,
             "request_id": request_id,
-            "request_type": request_type,
-            "event_category": "insight_generation",
-            "phase": "start"
+            "request_type": request_type
         }
     )
 
@@ -240,15 +289,12 @@ def log_insight_generation_success(
         aggregate_count: Optional count of aggregates used
         event_count: Optional count of events used
     """
-    extra_data = {
+    extra_data = _INSIGHT_SUCCESS_BASE | {
         "hardware_id": hardware_id,
         "request_id": request_id,
         "confidence": confidence,
         "trend": trend,
-        "generation_duration_ms": generation_duration_ms,
-        "event_category": "insight_generation",
-        "phase": "success",
-        "outcome": "success"
+        "generation_duration_ms": generation_duration_ms
     }
 
     if aggregate_count is not None:
@@ -282,14 +328,11 @@ def log_insight_generation_failure(
         generation_duration_ms: Optional generation duration before failure
         request_id: Optional request ID for correlation
     """
-    extra_data = {
+    extra_data = _INSIGHT_FAILURE_BASE | {
         "hardware_id": hardware_id,
         "request_id": request_id,
         "error_message": error_message[:256],  # Truncate
-        "error_type": error_type,
-        "event_category": "insight_generation",
-        "phase": "failure",
-        "outcome": "failure"
+        "error_type": error_type
     }
 
     if generation_duration_ms is not None:
@@ -324,13 +367,12 @@ def log_llm_api_call(
         error_message: Optional error message if failed
         request_id: Optional request ID for correlation
     """
-    extra_data = {
+    extra_data = _LLM_API_CALL_BASE | {
         "hardware_id": hardware_id,
         "request_id": request_id,
         "attempt": attempt,
         "max_retries": max_retries,
-        "success": success,
-        "event_category": "llm_api_call"
+        "success": success
     }
 
     if duration_ms is not None:
@@ -338,14 +380,18 @@ def log_llm_api_call(
 
     if success:
         logger.info(
-            f"LLM API call succeeded (attempt {attempt}/{max_retries})",
+            "LLM API call succeeded (attempt %d/%d)",
+            attempt,
+            max_retries,
             extra=extra_data
         )
     else:
         extra_data["error_message"] = error_message[:256] if error_message else None
         log_func = logger.warning if attempt < max_retries else logger.error
         log_func(
-            f"LLM API call failed (attempt {attempt}/{max_retries})",
+            "LLM API call failed (attempt %d/%d)",
+            attempt,
+            max_retries,
             extra=extra_data
         )
 
@@ -371,13 +417,12 @@ def log_stream_processing_error(
     """
     logger.error(
         "Stream record processing failed",
-        extra={
+        extra=_STREAM_ERROR_BASE | {
             "sequence_number": sequence_number,
             "hardware_id": hardware_id,
             "reading_id": reading_id,
             "error_message": error_message[:256],
-            "error_type": error_type,
-            "event_category": "stream_processing_error"
+            "error_type": error_type
         }
     )
 
@@ -385,7 +430,7 @@ def log_stream_processing_error(
 def log_device_status_update(
     logger: Logger,
     hardware_id: str,
-    fields_updated: Dict[str, Any],
+    fields_updated: Iterable[str],
     update_source: str  # "event_detector", "aggregator", "insight_generator", etc.
 ) -> None:
     """
@@ -394,15 +439,19 @@ def log_device_status_update(
     Args:
         logger: Logger instance
         hardware_id: Device hardware ID
-        fields_updated: Dict of fields that were updated
+        fields_updated: Names of the fields that were updated (a dict or its
+            keys view works too)
         update_source: Source of the update
     """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+
     logger.debug(
-        f"Device status updated by {update_source}",
-        extra={
+        "Device status updated by %s",
+        update_source,
+        extra=_DEVICE_STATUS_BASE | {
             "hardware_id": hardware_id,
-            "fields_updated": list(fields_updated.keys()),
-            "update_source": update_source,
-            "event_category": "device_status_update"
+            "fields_updated": tuple(fields_updated),
+            "update_source": update_source
         }
     )
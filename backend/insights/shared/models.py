@@ -17,6 +17,7 @@ from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Any
 from enum import Enum
 from datetime import datetime
+from operator import attrgetter
 
 
 class SensorStatus(str, Enum):
@@ -43,15 +44,27 @@ class SensorStatusSummary(str, Enum):
     MISSING = "missing"
 
 
-@dataclass
+# Member -> stored value, so item building skips the Enum.value descriptor
+_SUMMARY_VALUES = {e: e.value for e in SensorStatusSummary}
+
+
+_ERROR_RECORD_KEYS = ("timestamp_ms", "error_code", "error_message")
+_error_record_values = attrgetter(*_ERROR_RECORD_KEYS)
+
+
+@dataclass(slots=True)
 class ErrorRecord:
     """Individual error record in Device Status."""
     timestamp_ms: int
     error_code: str
     error_message: str  # truncated to 256 chars
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dict for storage."""
+        return dict(zip(_ERROR_RECORD_KEYS, _error_record_values(self)))
+
 
-@dataclass
+@dataclass(slots=True)
 class DeviceStatus:
     """
     Per-device health status record.
@@ -80,47 +93,31 @@ class DeviceStatus:
         item = {
             "hardware_id": self.hardware_id,
             "expected_interval_sec": self.expected_interval_sec,
-            "sensor_status_summary": self.sensor_status_summary.value,
+            "sensor_status_summary": _SUMMARY_VALUES[self.sensor_status_summary],
         }
+        optional_pairs = (
+            ("last_seen_event_time_ms", self.last_seen_event_time_ms),
+            ("last_seen_ingest_time_ms", self.last_seen_ingest_time_ms),
+            ("last_processed_event_time_ms", self.last_processed_event_time_ms),
+            ("ingest_event_skew_seconds", self.ingest_event_skew_seconds),
+            ("pipeline_lag_seconds", self.pipeline_lag_seconds),
+            ("coverage_pct_last_hour", self.coverage_pct_last_hour),
+            ("last_event_detected_at_ms", self.last_event_detected_at_ms),
+            ("last_aggregate_computed_at_ms", self.last_aggregate_computed_at_ms),
+            ("last_insight_generated_at_ms", self.last_insight_generated_at_ms),
+            ("last_error_at_ms", self.last_error_at_ms),
+            ("last_error_code", self.last_error_code),
+            ("updated_at_ms", self.updated_at_ms),
+        )
+        item.update((k, v) for k, v in optional_pairs if v is not None)
 
-        if self.last_seen_event_time_ms is not None:
-            item["last_seen_event_time_ms"] = self.last_seen_event_time_ms
-        if self.last_seen_ingest_time_ms is not None:
-            item["last_seen_ingest_time_ms"] = self.last_seen_ingest_time_ms
-        if self.last_processed_event_time_ms is not None:
-            item["last_processed_event_time_ms"] = self.last_processed_event_time_ms
-        if self.ingest_event_skew_seconds is not None:
-            item["ingest_event_skew_seconds"] = self.ingest_event_skew_seconds
-        if self.pipeline_lag_seconds is not None:
-            item["pipeline_lag_seconds"] = self.pipeline_lag_seconds
-        if self.coverage_pct_last_hour is not None:
-            item["coverage_pct_last_hour"] = self.coverage_pct_last_hour
-        if self.last_event_detected_at_ms is not None:
-            item["last_event_detected_at_ms"] = self.last_event_detected_at_ms
-        if self.last_aggregate_computed_at_ms is not None:
-            item["last_aggregate_computed_at_ms"] = self.last_aggregate_computed_at_ms
-        if self.last_insight_generated_at_ms is not None:
-            item["last_insight_generated_at_ms"] = self.last_insight_generated_at_ms
-        if self.last_error_at_ms is not None:
-            item["last_error_at_ms"] = self.last_error_at_ms
-        if self.last_error_code is not None:
-            item["last_error_code"] = self.last_error_code
         if self.last_errors:
-            item["last_errors"] = [
-                {
-                    "timestamp_ms": err.timestamp_ms,
-                    "error_code": err.error_code,
-                    "error_message": err.error_message
-                }
-                for err in self.last_errors
-            ]
-        if self.updated_at_ms is not None:
-            item["updated_at_ms"] = self.updated_at_ms
+            item["last_errors"] = list(map(ErrorRecord.to_dict, self.last_errors))
 
         return item
 
 
-@dataclass
+@dataclass(slots=True)
 class Reading:
     """Sensor reading from a device."""
     hardware_id: str
@@ -146,7 +143,14 @@ class EventType(str, Enum):
     ENVIRONMENTAL_CHANGE = "Environmental_Change"
 
 
-@dataclass
+_EVENT_TYPE_VALUES = {e: e.value for e in EventType}
+
+
+_STATS_BASE_KEYS = ("valid_count", "total_count", "sum", "sumsq")
+_stats_base_values = attrgetter(*_STATS_BASE_KEYS)
+
+
+@dataclass(slots=True)
 class SensorStats:
     """Statistical summary for a sensor over a time window."""
     min: Optional[float] = None
@@ -161,12 +165,7 @@ class SensorStats:
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dict for DynamoDB storage."""
-        result = {
-            "valid_count": self.valid_count,
-            "total_count": self.total_count,
-            "sum": self.sum,
-            "sumsq": self.sumsq
-        }
+        result = dict(zip(_STATS_BASE_KEYS, _stats_base_values(self)))
         if self.min is not None:
             result["min"] = self.min
         if self.max is not None:
@@ -192,7 +191,7 @@ class SensorStats:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Aggregate:
     """Time-series aggregate for a device and time window."""
     hardware_id: str
@@ -229,16 +228,27 @@ class Aggregate:
         return item
 
 
-class EventType(str, Enum):
-    """Event types detected by the system."""
-    WATERING_EVENT = "Watering_Event"
-    DRYING_CYCLE = "Drying_Cycle"
-    TEMPERATURE_STRESS = "Temperature_Stress"
-    HUMIDITY_ANOMALY = "Humidity_Anomaly"
-    ENVIRONMENTAL_CHANGE = "Environmental_Change"
+# Upper bound for the time part of an event type sort key
+EVENT_TIME_KEY_MAX = "9" * 13
 
 
-@dataclass
+def event_type_time_key(event_type: str, start_time_ms: int) -> str:
+    """
+    Build the event_type#start_time sort key of the device event type index.
+
+    The timestamp is zero-padded so keys sort chronologically within a type.
+
+    Args:
+        event_type: EventType value
+        start_time_ms: Event start time in milliseconds
+
+    Returns:
+        Sort key string
+    """
+    return f"{event_type}#{int(start_time_ms):013d}"
+
+
+@dataclass(slots=True)
 class Event:
     """Detected event from sensor data."""
     hardware_id: str
@@ -251,11 +261,13 @@ class Event:
 
     def to_dynamodb_item(self) -> Dict[str, Any]:
         """Convert to DynamoDB item format."""
+        event_type = _EVENT_TYPE_VALUES[self.event_type]
         item = {
             "hardware_id": self.hardware_id,
             "start_time_ms": self.start_time_ms,
             "end_time_ms": self.end_time_ms,
-            "event_type": self.event_type.value,
+            "event_type": event_type,
+            "event_type_start_time": event_type_time_key(event_type, self.start_time_ms),
             "sensor_values": self.sensor_values,
             "detection_metadata": self.detection_metadata,
         }
@@ -264,7 +276,7 @@ class Event:
         return item
 
 
-@dataclass
+@dataclass(slots=True)
 class DeviceProfile:
     """
     Per-device learned patterns and configuration.
@@ -287,20 +299,17 @@ class DeviceProfile:
             "hardware_id": self.hardware_id,
             "expected_interval_sec": self.expected_interval_sec,
         }
-        if self.plant_type is not None:
-            item["plant_type"] = self.plant_type
-        if self.soil_type is not None:
-            item["soil_type"] = self.soil_type
-        if self.pot_size_liters is not None:
-            item["pot_size_liters"] = self.pot_size_liters
-        if self.baseline_moisture_range is not None:
-            item["baseline_moisture_range"] = self.baseline_moisture_range
-        if self.typical_watering_interval_sec is not None:
-            item["typical_watering_interval_sec"] = self.typical_watering_interval_sec
+        optional_pairs = (
+            ("plant_type", self.plant_type),
+            ("soil_type", self.soil_type),
+            ("pot_size_liters", self.pot_size_liters),
+            ("baseline_moisture_range", self.baseline_moisture_range),
+            ("typical_watering_interval_sec", self.typical_watering_interval_sec),
+            ("updated_at_ms", self.updated_at_ms),
+        )
+        item.update((k, v) for k, v in optional_pairs if v is not None)
         if self.last_watering_events:
             item["last_watering_events"] = self.last_watering_events
-        if self.updated_at_ms is not None:
-            item["updated_at_ms"] = self.updated_at_ms
         return item
 
     @staticmethod
@@ -333,7 +342,14 @@ class TrendClassification(str, Enum):
     STABLE = "stable"
 
 
-@dataclass
+# Stored value -> member, so item parsing skips Enum.__call__
+_CONFIDENCE_BY_VALUE = {e.value: e for e in ConfidenceLevel}
+_TREND_BY_VALUE = {e.value: e for e in TrendClassification}
+_CONFIDENCE_VALUES = {e: e.value for e in ConfidenceLevel}
+_TREND_VALUES = {e: e.value for e in TrendClassification}
+
+
+@dataclass(slots=True)
 class Recommendation:
     """Individual recommendation in an insight."""
     action: str
@@ -358,7 +374,7 @@ class Recommendation:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Insight:
     """
     LLM-generated natural language insight.
@@ -383,17 +399,16 @@ class Insight:
             "timestamp_ms": self.timestamp_ms,
             "summary": self.summary,
             "recommendations": [rec.to_dict() for rec in self.recommendations],
-            "confidence": self.confidence.value,
-            "trend": self.trend.value,
+            "confidence": _CONFIDENCE_VALUES[self.confidence],
+            "trend": _TREND_VALUES[self.trend],
         }
-        if self.growth_stage_suggestion is not None:
-            item["growth_stage_suggestion"] = self.growth_stage_suggestion
-        if self.evidence is not None:
-            item["evidence"] = self.evidence
-        if self.llm_model is not None:
-            item["llm_model"] = self.llm_model
-        if self.generation_duration_ms is not None:
-            item["generation_duration_ms"] = self.generation_duration_ms
+        optional_pairs = (
+            ("growth_stage_suggestion", self.growth_stage_suggestion),
+            ("evidence", self.evidence),
+            ("llm_model", self.llm_model),
+            ("generation_duration_ms", self.generation_duration_ms),
+        )
+        item.update((k, v) for k, v in optional_pairs if v is not None)
         return item
 
     @staticmethod
@@ -404,8 +419,8 @@ class Insight:
             timestamp_ms=item["timestamp_ms"],
             summary=item["summary"],
             recommendations=[Recommendation.from_dict(rec) for rec in item["recommendations"]],
-            confidence=ConfidenceLevel(item["confidence"]),
-            trend=TrendClassification(item["trend"]),
+            confidence=_CONFIDENCE_BY_VALUE[item["confidence"]],
+            trend=_TREND_BY_VALUE[item["trend"]],
             growth_stage_suggestion=item.get("growth_stage_suggestion"),
             evidence=item.get("evidence"),
             llm_model=item.get("llm_model"),
@@ -427,7 +442,13 @@ class InsightRequestStatus(str, Enum):
     FAILED = "failed"
 
 
-@dataclass
+_REQUEST_TYPE_BY_VALUE = {e.value: e for e in InsightRequestType}
+_REQUEST_STATUS_BY_VALUE = {e.value: e for e in InsightRequestStatus}
+_REQUEST_TYPE_VALUES = {e: e.value for e in InsightRequestType}
+_REQUEST_STATUS_VALUES = {e: e.value for e in InsightRequestStatus}
+
+
+@dataclass(slots=True)
 class InsightRequest:
     """
     Request for insight generation.
@@ -447,15 +468,15 @@ class InsightRequest:
         item = {
             "hardware_id": self.hardware_id,
             "request_time_ms": self.request_time_ms,
-            "request_type": self.request_type.value,
-            "status": self.status.value,
+            "request_type": _REQUEST_TYPE_VALUES[self.request_type],
+            "status": _REQUEST_STATUS_VALUES[self.status],
         }
-        if self.event_type is not None:
-            item["event_type"] = self.event_type
-        if self.processed_at_ms is not None:
-            item["processed_at_ms"] = self.processed_at_ms
-        if self.error_message is not None:
-            item["error_message"] = self.error_message
+        optional_pairs = (
+            ("event_type", self.event_type),
+            ("processed_at_ms", self.processed_at_ms),
+            ("error_message", self.error_message),
+        )
+        item.update((k, v) for k, v in optional_pairs if v is not None)
         return item
 
     @staticmethod
@@ -464,8 +485,8 @@ class InsightRequest:
         return InsightRequest(
             hardware_id=item["hardware_id"],
             request_time_ms=item["request_time_ms"],
-            request_type=InsightRequestType(item["request_type"]),
-            status=InsightRequestStatus(item["status"]),
+            request_type=_REQUEST_TYPE_BY_VALUE[item["request_type"]],
+            status=_REQUEST_STATUS_BY_VALUE[item["status"]],
             event_type=item.get("event_type"),
             processed_at_ms=item.get("processed_at_ms"),
             error_message=item.get("error_message")
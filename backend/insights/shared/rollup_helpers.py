@@ -6,16 +6,38 @@ Provides functions for:
 - Bucket key generation
 - Metric key generation with sorted dimensions
 - TTL calculation
+- Counter update expressions and batched counter accumulation
 """
 
-from datetime import datetime, timezone, timedelta
-from typing import Dict, Optional
+import hashlib
+import math
+from concurrent.futures import Executor
+from decimal import Decimal
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+
+logger = Logger(child=True)
 
 
 # TTL constants
 MINUTE_BUCKET_TTL_DAYS = 7
 HOUR_BUCKET_TTL_DAYS = 90
 
+# Bucket widths. UTC minutes and hours are fixed-length in epoch time, so
+# alignment and TTLs are plain integer arithmetic.
+MINUTE_MS = 60_000
+HOUR_MS = 3_600_000
+SECONDS_PER_DAY = 86_400
+
+# Hash slots for approximate distinct counts (14 bits)
+DISTINCT_SLOT_BITS = 14
+
+# DynamoDB limit on actions per TransactWriteItems call
+TRANSACT_WRITE_MAX_ITEMS = 100
+
 
 def align_to_minute(timestamp_ms: int) -> int:
     """
@@ -27,9 +49,8 @@ def align_to_minute(timestamp_ms: int) -> int:
     Returns:
         Timestamp in milliseconds aligned to minute start
     """
-    dt = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
-    aligned = dt.replace(second=0, microsecond=0)
-    return int(aligned.timestamp() * 1000)
+    timestamp_ms = int(timestamp_ms)
+    return timestamp_ms - timestamp_ms % MINUTE_MS
 
 
 def align_to_hour_bucket(timestamp_ms: int) -> int:
@@ -42,9 +63,8 @@ def align_to_hour_bucket(timestamp_ms: int) -> int:
     Returns:
         Timestamp in milliseconds aligned to hour start
     """
-    dt = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
-    aligned = dt.replace(minute=0, second=0, microsecond=0)
-    return int(aligned.timestamp() * 1000)
+    timestamp_ms = int(timestamp_ms)
+    return timestamp_ms - timestamp_ms % HOUR_MS
 
 
 def generate_bucket_key(bucket_type: str, bucket_start_ms: int) -> str:
@@ -108,18 +128,16 @@ def calculate_ttl(bucket_type: str, bucket_start_ms: int) -> int:
     Returns:
         TTL timestamp in seconds (Unix epoch)
     """
-    bucket_start_dt = datetime.fromtimestamp(bucket_start_ms / 1000, tz=timezone.utc)
-
     if bucket_type == "minute":
-        ttl_dt = bucket_start_dt + timedelta(days=MINUTE_BUCKET_TTL_DAYS)
+        ttl_days = MINUTE_BUCKET_TTL_DAYS
     elif bucket_type == "hour":
-        ttl_dt = bucket_start_dt + timedelta(days=HOUR_BUCKET_TTL_DAYS)
+        ttl_days = HOUR_BUCKET_TTL_DAYS
     else:
         # Default to 7 days for unknown bucket types
-        ttl_dt = bucket_start_dt + timedelta(days=7)
+        ttl_days = 7
 
     # DynamoDB TTL expects seconds, not milliseconds
-    return int(ttl_dt.timestamp())
+    return int(bucket_start_ms) // 1000 + ttl_days * SECONDS_PER_DAY
 
 
 def get_minute_bucket(timestamp_ms: int) -> int:
@@ -148,23 +166,69 @@ def get_hour_bucket(timestamp_ms: int) -> int:
     return align_to_hour_bucket(timestamp_ms)
 
 
-def update_rollup_counter(
-    dynamodb_client,
+def distinct_slot(value: str) -> int:
+    """
+    Hash a value into one of 2**DISTINCT_SLOT_BITS slots.
+
+    Rollup rows keep the set of slots seen (ADD on a number set), so
+    concurrent batches reporting the same value don't double-count. The
+    read side estimates distinct values from the set size k with linear
+    counting: n = -m * ln(1 - k / m), where m = 2**DISTINCT_SLOT_BITS.
+
+    Args:
+        value: Value to hash (e.g. a hardware_id)
+
+    Returns:
+        Slot number
+    """
+    digest = hashlib.sha1(value.encode("utf-8")).digest()
+    return int.from_bytes(digest[:2], "big") >> (16 - DISTINCT_SLOT_BITS)
+
+
+def estimate_distinct_count(slot_count: int) -> int:
+    """
+    Estimate distinct values from the number of slots set (linear counting).
+
+    Args:
+        slot_count: Size of a rollup row's slots set
+
+    Returns:
+        Approximate number of distinct values
+    """
+    slot_total = 1 << DISTINCT_SLOT_BITS
+    # A saturated set has no finite estimate; report the largest one
+    slot_count = min(slot_count, slot_total - 1)
+    return round(-slot_total * math.log(1 - slot_count / slot_total))
+
+
+def _to_attribute_value(value: Any) -> Dict[str, Any]:
+    """Convert a rollup expression value to low-level DynamoDB attribute format."""
+    if isinstance(value, (int, float, Decimal)):
+        return {"N": str(value)}
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, (set, frozenset)):
+        return {"NS": [str(v) for v in sorted(value)]}
+    return {"M": {k: {"S": v} for k, v in value.items()}}
+
+
+def build_rollup_update(
     table_name: str,
     bucket_type: str,
     bucket_start_ms: int,
     metric_name: str,
     dimensions: Optional[Dict[str, str]] = None,
     count_increment: int = 1,
-    sum_increment: Optional[float] = None
-) -> None:
+    sum_increment: Optional[float] = None,
+    slot_increment: Optional[Set[int]] = None
+) -> Dict[str, Any]:
     """
-    Atomically update a rollup counter in DynamoDB.
+    Build the low-level UpdateItem parameters for a rollup counter increment.
 
-    Uses ADD operation for atomic increments and if_not_exists for static attributes.
+    The result can be passed to update_item as keyword arguments or wrapped
+    as {"Update": ...} in a TransactWriteItems request.
 
     Args:
-        dynamodb_client: boto3 DynamoDB client
         table_name: Name of the rollups table
         bucket_type: "minute" or "hour"
         bucket_start_ms: Bucket start timestamp in milliseconds
@@ -172,35 +236,44 @@ def update_rollup_counter(
         dimensions: Optional dictionary of dimension key-value pairs
         count_increment: Amount to increment count by (default 1)
         sum_increment: Optional amount to increment sum by
+        slot_increment: Optional distinct-count slots to add to the slots set
+
+    Returns:
+        Dict with TableName, Key, UpdateExpression and expression attributes
     """
     bucket_key = generate_bucket_key(bucket_type, bucket_start_ms)
     metric_key = generate_metric_key(metric_name, dimensions)
     ttl = calculate_ttl(bucket_type, bucket_start_ms)
 
     # Build update expression
-    update_parts = []
+    add_parts = []
     expression_attribute_values = {}
     expression_attribute_names = {}
 
-    # ADD count increment
-    update_parts.append("#count = if_not_exists(#count, :zero) + :count_inc")
+    # ADD count increment (ADD treats a missing attribute as 0)
+    add_parts.append("#count :count_inc")
     expression_attribute_names["#count"] = "count"
-    expression_attribute_values[":zero"] = 0
     expression_attribute_values[":count_inc"] = count_increment
 
     # ADD sum increment if provided
     if sum_increment is not None:
-        update_parts.append("#sum = if_not_exists(#sum, :zero_sum) + :sum_inc")
+        add_parts.append("#sum :sum_inc")
         expression_attribute_names["#sum"] = "sum"
-        expression_attribute_values[":zero_sum"] = 0
         expression_attribute_values[":sum_inc"] = sum_increment
 
+    # ADD distinct-count slots if provided (set union, idempotent per slot)
+    if slot_increment:
+        add_parts.append("#slots :slots_inc")
+        expression_attribute_names["#slots"] = "slots"
+        expression_attribute_values[":slots_inc"] = slot_increment
+
     # SET static attributes if they don't exist
     set_parts = []
     set_parts.append("bucket_start_ms = if_not_exists(bucket_start_ms, :bucket_start_ms)")
     set_parts.append("bucket_type = if_not_exists(bucket_type, :bucket_type)")
     set_parts.append("metric_name = if_not_exists(metric_name, :metric_name)")
-    set_parts.append("ttl = if_not_exists(ttl, :ttl)")
+    set_parts.append("#ttl = if_not_exists(#ttl, :ttl)")
+    expression_attribute_names["#ttl"] = "ttl"
 
     expression_attribute_values[":bucket_start_ms"] = bucket_start_ms
     expression_attribute_values[":bucket_type"] = bucket_type
@@ -213,21 +286,256 @@ def update_rollup_counter(
         expression_attribute_values[":dimensions"] = dimensions
 
     # Combine ADD and SET parts
-    update_expression = "ADD " + ", ".join(update_parts)
-    if set_parts:
-        update_expression += " SET " + ", ".join(set_parts)
+    update_expression = "ADD " + ", ".join(add_parts) + " SET " + ", ".join(set_parts)
 
-    # Execute atomic update
-    dynamodb_client.update_item(
-        TableName=table_name,
-        Key={
+    return {
+        "TableName": table_name,
+        "Key": {
             "bucket_key": {"S": bucket_key},
             "metric_key": {"S": metric_key}
         },
-        UpdateExpression=update_expression,
-        ExpressionAttributeNames=expression_attribute_names,
-        ExpressionAttributeValues={
-            k: {"N": str(v)} if isinstance(v, (int, float)) else {"S": v} if isinstance(v, str) else {"M": {mk: {"S": mv} for mk, mv in v.items()}}
-            for k, v in expression_attribute_values.items()
+        "UpdateExpression": update_expression,
+        "ExpressionAttributeNames": expression_attribute_names,
+        "ExpressionAttributeValues": {
+            k: _to_attribute_value(v) for k, v in expression_attribute_values.items()
         }
-    )
+    }
+
+
+def update_rollup_counter(
+    dynamodb_client,
+    table_name: str,
+    bucket_type: str,
+    bucket_start_ms: int,
+    metric_name: str,
+    dimensions: Optional[Dict[str, str]] = None,
+    count_increment: int = 1,
+    sum_increment: Optional[float] = None
+) -> None:
+    """
+    Atomically update a rollup counter in DynamoDB.
+
+    Uses ADD operation for atomic increments and if_not_exists for static attributes.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        table_name: Name of the rollups table
+        bucket_type: "minute" or "hour"
+        bucket_start_ms: Bucket start timestamp in milliseconds
+        metric_name: Name of the metric
+        dimensions: Optional dictionary of dimension key-value pairs
+        count_increment: Amount to increment count by (default 1)
+        sum_increment: Optional amount to increment sum by
+    """
+    # Execute atomic update
+    dynamodb_client.update_item(**build_rollup_update(
+        table_name,
+        bucket_type,
+        bucket_start_ms,
+        metric_name,
+        dimensions=dimensions,
+        count_increment=count_increment,
+        sum_increment=sum_increment
+    ))
+
+
+class BatchAccumulator:
+    """
+    Accumulates rollup counter deltas across a stream batch.
+
+    Increments for the same bucket, metric and dimensions are merged in
+    memory, then flushed with one write per distinct counter instead of one
+    UpdateItem per record.
+    """
+
+    def __init__(self) -> None:
+        # (bucket_type, bucket_start_ms, metric_name, dimensions_tuple) -> [count, sum, slots]
+        self._deltas: Dict[Tuple[str, int, str, Tuple[Tuple[str, str], ...]], List[Any]] = {}
+        # Raw increments recorded, to report how many writes the merge saved
+        self.increments = 0
+
+    def __len__(self) -> int:
+        return len(self._deltas)
+
+    def add(
+        self,
+        bucket_type: str,
+        bucket_start_ms: int,
+        metric_name: str,
+        dimensions: Optional[Dict[str, str]] = None,
+        count_increment: int = 1,
+        sum_increment: Optional[float] = None,
+        slots: Optional[Iterable[int]] = None
+    ) -> None:
+        """
+        Record a counter increment.
+
+        Args:
+            bucket_type: "minute" or "hour"
+            bucket_start_ms: Bucket start timestamp in milliseconds
+            metric_name: Name of the metric
+            dimensions: Optional dictionary of dimension key-value pairs
+            count_increment: Amount to increment count by (default 1)
+            sum_increment: Optional amount to increment sum by
+            slots: Optional distinct-count slots (see distinct_slot)
+        """
+        key = (bucket_type, bucket_start_ms, metric_name, tuple(sorted(dimensions.items())) if dimensions else ())
+        self.increments += 1
+        delta = self._deltas.setdefault(key, [0, None, None])
+        delta[0] += count_increment
+        if sum_increment is not None:
+            delta[1] = sum_increment if delta[1] is None else delta[1] + sum_increment
+        if slots is not None:
+            if delta[2] is None:
+                delta[2] = set()
+            delta[2].update(slots)
+
+    def build_updates(self, table_name: str) -> List[Dict[str, Any]]:
+        """
+        Build one UpdateItem parameter dict per accumulated counter.
+
+        Counters whose merged delta is a no-op (zero count, no sum and no
+        slots) are dropped rather than written.
+
+        Args:
+            table_name: Name of the rollups table
+
+        Returns:
+            List of update parameter dicts (see build_rollup_update)
+        """
+        return [
+            build_rollup_update(
+                table_name,
+                bucket_type,
+                bucket_start_ms,
+                metric_name,
+                dimensions=dict(dimensions) if dimensions else None,
+                count_increment=count,
+                sum_increment=total,
+                slot_increment=slots
+            )
+            for (bucket_type, bucket_start_ms, metric_name, dimensions), (count, total, slots) in self._deltas.items()
+            if count or total or slots
+        ]
+
+    def export_deltas(self) -> List[Dict[str, Any]]:
+        """
+        Export accumulated counters as JSON-serializable deltas and reset.
+
+        Used to hand a batch's counters to a downstream writer (see add_delta)
+        instead of flushing them to DynamoDB directly.
+
+        Returns:
+            List of delta dicts
+        """
+        deltas = [
+            {
+                "bucket_type": bucket_type,
+                "bucket_start_ms": bucket_start_ms,
+                "metric_name": metric_name,
+                "dimensions": dict(dimensions),
+                "count": count,
+                "sum": float(total) if total is not None else None,
+                "slots": sorted(slots) if slots else None
+            }
+            for (bucket_type, bucket_start_ms, metric_name, dimensions), (count, total, slots) in self._deltas.items()
+        ]
+        self._deltas = {}
+        return deltas
+
+    def add_delta(self, delta: Dict[str, Any]) -> None:
+        """
+        Merge a delta produced by export_deltas.
+
+        Args:
+            delta: Delta dict
+        """
+        self.add(
+            delta["bucket_type"],
+            delta["bucket_start_ms"],
+            delta["metric_name"],
+            dimensions=delta.get("dimensions"),
+            count_increment=delta["count"],
+            sum_increment=delta.get("sum"),
+            slots=delta.get("slots")
+        )
+
+    def flush(self, dynamodb_client, table_name: str, executor: Optional[Executor] = None) -> int:
+        """
+        Write all accumulated counters and reset the accumulator.
+
+        Counters are written TRANSACT_WRITE_MAX_ITEMS at a time with
+        TransactWriteItems. If a transaction is rejected (for example a
+        conflict with another shard's flush on the same bucket row), that
+        chunk is retried as individual UpdateItem calls.
+
+        Args:
+            dynamodb_client: boto3 DynamoDB client
+            table_name: Name of the rollups table
+            executor: Optional executor to write chunks concurrently; chunks
+                never share a counter row, so they cannot conflict with each other
+
+        Returns:
+            Number of counters written
+
+        Raises:
+            ClientError: If any counter could not be written. Counters in
+                other chunks are still attempted and stay written.
+        """
+        updates = self.build_updates(table_name)
+        self._deltas = {}
+
+        chunks = [
+            updates[i:i + TRANSACT_WRITE_MAX_ITEMS]
+            for i in range(0, len(updates), TRANSACT_WRITE_MAX_ITEMS)
+        ]
+
+        if executor is None or len(chunks) <= 1:
+            return sum(_write_rollup_chunk(dynamodb_client, chunk) for chunk in chunks)
+
+        return sum(executor.map(partial(_write_rollup_chunk, dynamodb_client), chunks))
+
+
+def _write_rollup_chunk(dynamodb_client, chunk: List[Dict[str, Any]]) -> int:
+    """
+    Write one chunk of rollup updates, falling back to individual updates.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        chunk: Up to TRANSACT_WRITE_MAX_ITEMS update parameter dicts
+
+    Returns:
+        Number of counters written
+
+    Raises:
+        ClientError: The first individual update failure, after every update
+            in the chunk has been attempted
+    """
+    try:
+        dynamodb_client.transact_write_items(
+            TransactItems=[{"Update": update} for update in chunk]
+        )
+        return len(chunk)
+    except ClientError as e:
+        logger.warning(
+            "Rollup transaction rejected, falling back to individual updates",
+            extra={"error": str(e), "counter_count": len(chunk)}
+        )
+
+    written = 0
+    first_error = None
+    for update in chunk:
+        try:
+            dynamodb_client.update_item(**update)
+            written += 1
+        except ClientError as update_error:
+            logger.error(
+                "Failed to update rollup counter",
+                extra={"error": str(update_error), "metric_key": update["Key"]["metric_key"]["S"]}
+            )
+            first_error = first_error or update_error
+
+    if first_error is not None:
+        raise first_error
+
+    return written
@@ -6,6 +6,7 @@ Tests aggregation logic, time window calculations, and statistics computation.
 
 import pytest
 from datetime import datetime, timezone
+import subprocess
 import sys
 import os
 
@@ -338,5 +339,25 @@ class TestAggregationCombination:
             assert combined[sensor]["total_count"] == 0
 
 
+class TestModuleImport:
+    """Tests for importing the handler the way the Lambda runtime does."""
+
+    def test_aggregator_imports_without_shared_package(self):
+        """Test aggregator and its shared modules import with only shared/ on the path."""
+        functions_dir = os.path.join(os.path.dirname(__file__), '..', 'functions')
+        env = {**os.environ, "AWS_DEFAULT_REGION": "us-east-1", "POWERTOOLS_TRACE_DISABLED": "true"}
+        env.pop("PYTHONPATH", None)
+
+        result = subprocess.run(
+            [sys.executable, "-c", "import aggregator"],
+            cwd=functions_dir,
+            env=env,
+            capture_output=True,
+            text=True
+        )
+
+        assert result.returncode == 0, result.stderr
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,61 @@
+"""Unit tests for dashboard API endpoints."""
+
+import json
+import os
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+# Set environment variables before importing the module
+os.environ['PLANT_EVENTS_TABLE'] = 'test-events-table'
+os.environ['PLANT_AGGREGATES_TABLE'] = 'test-aggregates-table'
+os.environ['PLANT_INSIGHTS_TABLE'] = 'test-insights-table'
+os.environ['PLANT_DEVICE_PROFILES_TABLE'] = 'test-profiles-table'
+os.environ['PLANT_DEVICE_STATUS_TABLE'] = 'test-status-table'
+os.environ['PLANT_ROLLUPS_TABLE'] = 'test-rollups-table'
+os.environ['POWERTOOLS_SERVICE_NAME'] = 'test-service'
+
+
+class TestGetDashboardRollups:
+    """Tests for GET /dashboard/rollups endpoint."""
+
+    @patch('functions.api.rollups_table')
+    def test_slot_sets_are_returned_as_distinct_estimates(self, mock_table):
+        """Test that distinct-count slot sets are replaced by their estimate."""
+        event = {
+            "resource": "/dashboard/rollups",
+            "path": "/dashboard/rollups",
+            "httpMethod": "GET",
+            "headers": {},
+            "queryStringParameters": {
+                "bucket_type": "minute",
+                "start_time": "1704067200000",
+                "end_time": "1704067259999"
+            },
+            "pathParameters": {},
+            "body": None
+        }
+
+        mock_table.query.return_value = {'Items': [
+            {
+                "bucket_key": "minute#1704067200000",
+                "metric_key": "devices_reporting_count",
+                "metric_name": "devices_reporting_count",
+                "count": Decimal("5"),
+                "slots": {Decimal("12"), Decimal("345"), Decimal("6789")}
+            },
+            {
+                "bucket_key": "minute#1704067200000",
+                "metric_key": "readings_ingested_count",
+                "metric_name": "readings_ingested_count",
+                "count": Decimal("40")
+            }
+        ]}
+
+        from functions.api import app
+        response = app.resolve(event, Mock())
+
+        assert response['statusCode'] == 200
+        devices, readings = json.loads(response['body'])['rollups']
+        assert 'slots' not in devices
+        assert devices['distinct_count_estimate'] == 3
+        assert 'distinct_count_estimate' not in readings
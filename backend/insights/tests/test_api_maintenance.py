@@ -2,6 +2,7 @@
 
 import json
 import os
+import sys
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 
@@ -92,6 +93,140 @@ class TestRerunEventDetection:
         assert 'hardware_id is required' in body['message']
 
 
+    def test_invalid_continuation_token(self):
+        """Test that an undecodable continuation token is rejected."""
+        event = {
+            "resource": "/admin/rerun-event-detection",
+            "path": "/admin/rerun-event-detection",
+            "httpMethod": "POST",
+            "headers": {},
+            "queryStringParameters": None,
+            "pathParameters": {},
+            "body": json.dumps({
+                "hardware_id": "device-001",
+                "start_time": 1704070800000,
+                "end_time": 1704074400000,
+                "continuation_token": "not-a-token"
+            })
+        }
+
+        from functions.api import app
+        response = app.resolve(event, Mock())
+
+        assert response['statusCode'] == 400
+        body = json.loads(response['body'])
+        assert 'continuation_token is invalid' in body['message']
+
+    def test_continuation_token_for_another_job_is_rejected(self):
+        """Test that a token issued for a different device or range is rejected."""
+        from functions.api import app, encode_pagination_token
+
+        token = encode_pagination_token({
+            'hardware_id': 'device-002',
+            'start_time_ms': 1704070800000,
+            'end_time_ms': 1704074400000,
+            'last_timestamp_ms': 1704072000000,
+            'readings_processed': 10,
+            'events_detected': 1
+        })
+        bodies = [
+            {"hardware_id": "device-001", "start_time": 1704070800000, "end_time": 1704074400000},
+            {"hardware_id": "device-002", "start_time": 1704070800000, "end_time": 1704078000000},
+        ]
+
+        for request_body in bodies:
+            event = {
+                "resource": "/admin/rerun-event-detection",
+                "path": "/admin/rerun-event-detection",
+                "httpMethod": "POST",
+                "headers": {},
+                "queryStringParameters": None,
+                "pathParameters": {},
+                "body": json.dumps({**request_body, "continuation_token": token})
+            }
+
+            response = app.resolve(event, Mock())
+
+            assert response['statusCode'] == 400
+            body = json.loads(response['body'])
+            assert 'continuation_token does not match' in body['message']
+
+    @patch('functions.api.dynamodb')
+    def test_timeout_before_first_reading_returns_partial(self, mock_dynamodb):
+        """Test that timing out before any reading resumes from the start of the range."""
+        mock_dynamodb.Table.return_value.query.return_value = {
+            'Items': [{"hardware_id": "device-001", "timestamp_ms": 1704070800000}]
+        }
+        event = {
+            "resource": "/admin/rerun-event-detection",
+            "path": "/admin/rerun-event-detection",
+            "httpMethod": "POST",
+            "headers": {},
+            "queryStringParameters": None,
+            "pathParameters": {},
+            "body": json.dumps({
+                "hardware_id": "device-001",
+                "start_time": 1704070800000,
+                "end_time": 1704074400000
+            })
+        }
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 0
+
+        event_detection = MagicMock()
+        event_detection.get_recent_readings.return_value = []
+
+        from functions.api import app, decode_pagination_token
+        with patch.dict(sys.modules, {'event_detection': event_detection}):
+            response = app.resolve(event, context)
+
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['status'] == 'partial'
+        assert body['readings_processed'] == 0
+        checkpoint = decode_pagination_token(body['continuation_token'])
+        assert checkpoint['last_timestamp_ms'] == 1704070800000 - 1
+        assert checkpoint['hardware_id'] == 'device-001'
+        assert checkpoint['start_time_ms'] == 1704070800000
+        assert checkpoint['end_time_ms'] == 1704074400000
+
+    @patch('functions.api.dynamodb')
+    def test_detection_context_is_capped_to_latest_readings(self, mock_dynamodb):
+        """Test that the rolling context keeps the latest 200 readings before the current one."""
+        start = 1704070800000
+        readings = [{"hardware_id": "device-001", "timestamp_ms": start + i * 1000} for i in range(250)]
+        mock_dynamodb.Table.return_value.query.return_value = {'Items': readings}
+        event = {
+            "resource": "/admin/rerun-event-detection",
+            "path": "/admin/rerun-event-detection",
+            "httpMethod": "POST",
+            "headers": {},
+            "queryStringParameters": None,
+            "pathParameters": {},
+            "body": json.dumps({
+                "hardware_id": "device-001",
+                "start_time": start,
+                "end_time": start + 3600000
+            })
+        }
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 60000
+
+        event_detection = MagicMock()
+        event_detection.get_recent_readings.return_value = []
+        event_detection.run_all_detectors.return_value = []
+
+        from functions.api import app
+        with patch.dict(sys.modules, {'event_detection': event_detection}):
+            response = app.resolve(event, context)
+
+        assert response['statusCode'] == 200
+        context_readings, current = event_detection.run_all_detectors.call_args.args
+        assert current == readings[-1]
+        assert context_readings == readings[-201:-1]
+        assert event_detection.get_recent_readings.call_args.kwargs['until_ms'] == start
+
+
 class TestRegenerateInsight:
     """Tests for POST /admin/regenerate-insight endpoint."""
 
@@ -113,3 +248,32 @@ class TestRegenerateInsight:
         assert response['statusCode'] == 400
         body = json.loads(response['body'])
         assert 'hardware_id is required' in body['message']
+
+    @patch('functions.api.insights_table')
+    @patch('functions.api.dynamodb')
+    def test_request_is_created_processing_and_marker_failure_is_ignored(self, mock_dynamodb, mock_insights):
+        """Test the poller can't claim the request and a failed marker still succeeds."""
+        requests_table = mock_dynamodb.Table.return_value
+        mock_insights.update_item.side_effect = Exception("marker write failed")
+        insight_generator = MagicMock()
+        insight_generator.generate_insight_for_device.return_value.timestamp_ms = 1704067200000
+        insight_generator.generate_insight_for_device.return_value.to_dynamodb_item.return_value = {}
+        event = {
+            "resource": "/admin/regenerate-insight",
+            "path": "/admin/regenerate-insight",
+            "httpMethod": "POST",
+            "headers": {},
+            "queryStringParameters": None,
+            "pathParameters": {},
+            "body": json.dumps({"hardware_id": "device-001"})
+        }
+
+        from functions.api import app
+        with patch.dict(sys.modules, {'insight_generator': insight_generator}):
+            response = app.resolve(event, Mock())
+
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['status'] == 'success'
+        assert requests_table.put_item.call_args.kwargs['Item']['status'] == 'processing'
+        update = requests_table.update_item.call_args.kwargs
+        assert update['ExpressionAttributeValues'][':done'] == 'done'
@@ -3,8 +3,9 @@ Unit tests for event detection logic.
 """
 
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import os
+import time
 
 os.environ["POWERTOOLS_TRACE_DISABLED"] = "true"
 
@@ -15,9 +16,21 @@ from shared.event_detection import (
     detect_humidity_anomaly,
     detect_environmental_change,
     get_cooldown_period,
-    check_cooldown
+    get_recent_readings,
+    commit_event_atomic,
+    commit_events_atomic,
+    create_insight_requests_for_critical_events,
+    readings_to_columns,
+    _last_event_start
 )
-from shared.models import EventType
+from shared.models import Event, EventType
+from botocore.exceptions import ClientError
+
+
+@pytest.fixture(autouse=True)
+def clear_last_event_cache():
+    """Start every test with an empty local cooldown cache."""
+    _last_event_start.clear()
 
 
 class TestWateringEventDetection:
@@ -713,6 +726,22 @@ class TestEnvironmentalChangeDetection:
         assert event is None
 
 
+class TestReadingColumns:
+    """Tests for per-sensor column extraction shared by the detectors."""
+
+    def test_columns_skip_missing_and_non_ok_values(self):
+        """Test that each column keeps only present samples with ok status."""
+        columns = readings_to_columns([
+            {"timestamp_ms": 1, "soil_moisture": 40.0, "humidity": 50.0, "temperature": 20.0, "pressure": 1000.0},
+            {"timestamp_ms": 2, "soil_moisture": 41.0, "soil_moisture_status": "error", "humidity": 51.0},
+            {"timestamp_ms": 3, "humidity": 52.0, "humidity_status": "error", "temperature": 21.0, "pressure": 1001.0},
+        ])
+
+        assert columns.soil_moisture == [(1, 40.0)]
+        assert columns.humidity == [(1, 50.0), (2, 51.0)]
+        assert columns.environment == [(1, 20.0, 50.0, 1000.0)]
+
+
 class TestCooldownEnforcement:
     """Tests for cooldown period enforcement."""
 
@@ -736,64 +765,214 @@ class TestCooldownEnforcement:
         """Test cooldown period for drying cycle is 0 (no cooldown)."""
         assert get_cooldown_period(EventType.DRYING_CYCLE) == 0
 
-    @patch("shared.event_detection.dynamodb_resource")
-    def test_check_cooldown_in_cooldown(self, mock_dynamodb):
-        """Test cooldown check when recent event exists."""
-        mock_table = MagicMock()
-        mock_table.query.return_value = {
-            "Items": [{"hardware_id": "device-001", "event_type": "Watering_Event"}]
-        }
-        mock_dynamodb.Table.return_value = mock_table
 
-        current_time = 1000000 + (30 * 60 * 1000)
-        in_cooldown = check_cooldown("device-001", EventType.WATERING_EVENT, current_time)
+class TestGetRecentReadings:
+    """Tests for fetching detection context readings."""
 
-        assert in_cooldown is True
+    @patch("shared.event_detection.readings_table")
+    def test_until_returns_latest_readings_oldest_first(self, mock_table):
+        """Test that an upper bound queries newest first and returns them in order."""
+        mock_table.query.return_value = {"Items": [{"timestamp_ms": 3}, {"timestamp_ms": 2}]}
 
-    @patch("shared.event_detection.dynamodb_resource")
-    def test_check_cooldown_not_in_cooldown(self, mock_dynamodb):
-        """Test cooldown check when no recent event exists."""
-        mock_table = MagicMock()
-        mock_table.query.return_value = {"Items": []}
-        mock_dynamodb.Table.return_value = mock_table
+        readings = get_recent_readings("device-001", 1, limit=2, until_ms=4)
 
-        current_time = 1000000 + (70 * 60 * 1000)
-        in_cooldown = check_cooldown("device-001", EventType.WATERING_EVENT, current_time)
+        assert readings == [{"timestamp_ms": 2}, {"timestamp_ms": 3}]
+        kwargs = mock_table.query.call_args.kwargs
+        assert kwargs["ScanIndexForward"] is False
+        assert kwargs["ExpressionAttributeValues"][":until"] == 3
 
-        assert in_cooldown is False
 
-    @patch("shared.event_detection.dynamodb_resource")
-    def test_check_cooldown_zero_cooldown_returns_false(self, mock_dynamodb):
-        """Test that events with zero cooldown always return False."""
-        # Should not even query DynamoDB
-        in_cooldown = check_cooldown("device-001", EventType.DRYING_CYCLE, 1000000)
-        assert in_cooldown is False
-        mock_dynamodb.Table.assert_not_called()
+class TestAtomicEventCommit:
+    """Tests for transactional event persistence with server-side cooldown."""
 
-    @patch("shared.event_detection.dynamodb_resource")
-    def test_check_cooldown_temperature_stress_30_minutes(self, mock_dynamodb):
-        """Test temperature stress cooldown is enforced for 30 minutes."""
-        mock_table = MagicMock()
-        mock_table.query.return_value = {
-            "Items": [{"hardware_id": "device-001", "event_type": "Temperature_Stress"}]
-        }
-        mock_dynamodb.Table.return_value = mock_table
+    def _event(self, event_type=EventType.WATERING_EVENT):
+        return Event(
+            hardware_id="device-001",
+            event_type=event_type,
+            start_time_ms=1000000,
+            end_time_ms=1000000,
+            sensor_values={"soil_moisture": 46.5},
+            detection_metadata={"method": "rapid_spike"}
+        )
+
+    @patch("shared.event_detection.dynamodb")
+    def test_commit_writes_event_and_status_with_cooldown_condition(self, mock_dynamodb):
+        """Test that the event and device status are written in one transaction."""
+        assert commit_event_atomic(self._event(), 1000000) is True
+
+        items = mock_dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+        assert items[0]["Put"]["Item"]["sensor_values"] == {"M": {"soil_moisture": {"N": "46.5"}}}
+        update = items[1]["Update"]
+        assert update["ExpressionAttributeNames"] == {"#last_0": "last_watering_event_at_ms"}
+        assert update["ExpressionAttributeValues"][":cooldown_since_0"] == {"N": str(1000000 - 60 * 60 * 1000)}
+
+    @patch("shared.event_detection.time.sleep")
+    @patch("shared.event_detection.dynamodb")
+    def test_transaction_conflict_is_retried(self, mock_dynamodb, mock_sleep):
+        """Test that a conflict with another device status writer is retried."""
+        conflict = ClientError(
+            {
+                "Error": {"Code": "TransactionCanceledException"},
+                "CancellationReasons": [{"Code": "None"}, {"Code": "TransactionConflict"}]
+            },
+            "TransactWriteItems"
+        )
+        mock_dynamodb.transact_write_items.side_effect = [conflict, None]
+
+        assert commit_event_atomic(self._event(), 1000000) is True
+        assert mock_dynamodb.transact_write_items.call_count == 2
+
+    @patch("shared.event_detection.time.sleep")
+    @patch("shared.event_detection.dynamodb")
+    def test_persistent_transaction_conflict_raises(self, mock_dynamodb, mock_sleep):
+        """Test that conflicts outlasting the retries fail the commit instead of dropping events."""
+        mock_dynamodb.transact_write_items.side_effect = ClientError(
+            {
+                "Error": {"Code": "TransactionCanceledException"},
+                "CancellationReasons": [{"Code": "None"}, {"Code": "TransactionConflict"}]
+            },
+            "TransactWriteItems"
+        )
 
-        current_time = 1000000 + (25 * 60 * 1000)  # 25 minutes later
-        in_cooldown = check_cooldown("device-001", EventType.TEMPERATURE_STRESS, current_time)
+        with pytest.raises(ClientError):
+            commit_event_atomic(self._event(), 1000000)
+        assert mock_dynamodb.transact_write_items.call_count == 3
 
-        assert in_cooldown is True
+    @patch("shared.event_detection.dynamodb")
+    def test_known_recent_event_skips_transaction(self, mock_dynamodb):
+        """Test that a committed event puts later events of its type in cooldown locally."""
+        assert commit_event_atomic(self._event(), 1000000) is True
+        assert commit_event_atomic(self._event(), 1000000 + (30 * 60 * 1000)) is False
 
-    @patch("shared.event_detection.dynamodb_resource")
-    def test_check_cooldown_environmental_change_2_hours(self, mock_dynamodb):
-        """Test environmental change cooldown is enforced for 2 hours."""
-        mock_table = MagicMock()
-        mock_table.query.return_value = {
-            "Items": [{"hardware_id": "device-001", "event_type": "Environmental_Change"}]
+        assert mock_dynamodb.transact_write_items.call_count == 1
+
+    @patch("shared.event_detection.dynamodb")
+    def test_zero_cooldown_has_no_condition(self, mock_dynamodb):
+        """Test that event types without cooldown are not conditioned on the last event."""
+        commit_event_atomic(self._event(EventType.DRYING_CYCLE), 1000000)
+
+        update = mock_dynamodb.transact_write_items.call_args.kwargs["TransactItems"][1]["Update"]
+        assert "ConditionExpression" not in update
+
+    @patch("shared.event_detection.dynamodb")
+    def test_reading_events_share_one_transaction(self, mock_dynamodb):
+        """Test that a reading's events are written with one combined status update."""
+        events = [self._event(), self._event(EventType.HUMIDITY_ANOMALY)]
+
+        assert commit_events_atomic(events, 1000000) == [True, True]
+
+        mock_dynamodb.transact_write_items.assert_called_once()
+        items = mock_dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+        assert [next(iter(item)) for item in items] == ["Put", "Put", "Update"]
+        assert items[2]["Update"]["ExpressionAttributeNames"] == {
+            "#last_0": "last_watering_event_at_ms",
+            "#last_1": "last_humidity_anomaly_at_ms"
         }
-        mock_dynamodb.Table.return_value = mock_table
 
-        current_time = 1000000 + (90 * 60 * 1000)  # 90 minutes later
-        in_cooldown = check_cooldown("device-001", EventType.ENVIRONMENTAL_CHANGE, current_time)
+    @patch("shared.event_detection.dynamodb")
+    def test_cached_event_type_is_left_out_of_the_transaction(self, mock_dynamodb):
+        """Test that only event types the cache proves in cooldown are skipped."""
+        assert commit_event_atomic(self._event(), 1000000) is True
+        mock_dynamodb.reset_mock()
+        events = [self._event(), self._event(EventType.HUMIDITY_ANOMALY)]
+
+        assert commit_events_atomic(events, 1000000 + 60000) == [False, True]
+
+        items = mock_dynamodb.transact_write_items.call_args.kwargs["TransactItems"]
+        assert [next(iter(item)) for item in items] == ["Put", "Update"]
+        assert items[1]["Update"]["ExpressionAttributeNames"] == {"#last_0": "last_humidity_anomaly_at_ms"}
+
+    @patch("shared.event_detection.dynamodb")
+    def test_cancelled_combined_transaction_retries_events_individually(self, mock_dynamodb):
+        """Test that one event in cooldown does not block the reading's other events."""
+        cancelled = ClientError(
+            {
+                "Error": {"Code": "TransactionCanceledException"},
+                "CancellationReasons": [{"Code": "None"}, {"Code": "None"}, {"Code": "ConditionalCheckFailed"}]
+            },
+            "TransactWriteItems"
+        )
+        mock_dynamodb.transact_write_items.side_effect = [cancelled, cancelled, None]
+        events = [self._event(), self._event(EventType.HUMIDITY_ANOMALY)]
+
+        assert commit_events_atomic(events, 1000000) == [False, True]
+        assert mock_dynamodb.transact_write_items.call_count == 3
+
+    @patch("shared.event_detection.dynamodb")
+    def test_cancelled_transaction_returns_false(self, mock_dynamodb):
+        """Test that a failed cooldown condition skips the event."""
+        mock_dynamodb.transact_write_items.side_effect = ClientError(
+            {
+                "Error": {"Code": "TransactionCanceledException"},
+                "CancellationReasons": [{"Code": "None"}, {"Code": "ConditionalCheckFailed"}]
+            },
+            "TransactWriteItems"
+        )
 
-        assert in_cooldown is True
+        assert commit_event_atomic(self._event(), 1000000) is False
+
+
+class TestCriticalEventInsightRequests:
+    """Tests for batched insight request creation from critical events."""
+
+    @patch("shared.event_detection.insight_requests_table")
+    def test_one_request_per_device_written_in_bulk(self, mock_table):
+        """Test that critical events are deduped per device and written via batch writer."""
+        mock_table.query.return_value = {"Items": []}
+        batch = mock_table.batch_writer.return_value.__enter__.return_value
+
+        created = create_insight_requests_for_critical_events([
+            ("device-001", EventType.TEMPERATURE_STRESS),
+            ("device-001", EventType.TEMPERATURE_STRESS),
+            ("device-002", EventType.TEMPERATURE_STRESS),
+            ("device-003", EventType.WATERING_EVENT),
+        ])
+
+        assert created == 2
+        written = sorted(call.kwargs["Item"]["hardware_id"] for call in batch.put_item.call_args_list)
+        assert written == ["device-001", "device-002"]
+        mock_table.put_item.assert_not_called()
+
+    @patch("shared.event_detection.insight_requests_table")
+    def test_pending_request_suppresses_new_request(self, mock_table):
+        """Test that a pending request within the batching window suppresses creation."""
+        mock_table.query.return_value = {"Items": [
+            {"hardware_id": "device-001", "status": "pending", "request_time_ms": int(time.time() * 1000)}
+        ]}
+        batch = mock_table.batch_writer.return_value.__enter__.return_value
+
+        created = create_insight_requests_for_critical_events([
+            ("device-001", EventType.TEMPERATURE_STRESS),
+        ])
+
+        assert created == 0
+        batch.put_item.assert_not_called()
+
+    @patch("shared.event_detection.insight_requests_table")
+    def test_daily_event_request_cap_suppresses_new_request(self, mock_table):
+        """Test that six event-driven requests in the last day suppress creation with one query."""
+        now_ms = int(time.time() * 1000)
+        mock_table.query.return_value = {"Items": [
+            {"request_time_ms": now_ms - (2 + i) * 60 * 60 * 1000, "status": "completed", "request_type": "event"}
+            for i in range(6)
+        ]}
+        batch = mock_table.batch_writer.return_value.__enter__.return_value
+
+        created = create_insight_requests_for_critical_events([
+            ("device-001", EventType.TEMPERATURE_STRESS),
+        ])
+
+        assert created == 0
+        assert mock_table.query.call_count == 1
+        batch.put_item.assert_not_called()
+
+    @patch("shared.event_detection.insight_requests_table")
+    def test_no_critical_events_skips_dynamodb(self, mock_table):
+        """Test that non-critical events never touch DynamoDB."""
+        created = create_insight_requests_for_critical_events([
+            ("device-001", EventType.DRYING_CYCLE),
+        ])
+
+        assert created == 0
+        mock_table.query.assert_not_called()
+        mock_table.batch_writer.assert_not_called()
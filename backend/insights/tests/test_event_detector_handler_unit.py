@@ -16,13 +16,19 @@ from functions.event_detector import (
 )
 
 
+def _context(remaining_ms=60000):
+    context = Mock()
+    context.get_remaining_time_in_millis.return_value = remaining_ms
+    return context
+
+
 class TestEventDetectorHandler:
     """Tests for Event Detector Lambda handler."""
 
     def test_lambda_handler_empty_records(self):
         """Test handler with no records."""
         event = {"Records": []}
-        context = Mock()
+        context = _context()
 
         result = lambda_handler(event, context)
 
@@ -37,7 +43,7 @@ class TestEventDetectorHandler:
                 {"eventName": "INSERT", "dynamodb": {"SequenceNumber": "2"}}
             ]
         }
-        context = Mock()
+        context = _context()
 
         result = lambda_handler(event, context)
 
@@ -55,13 +61,45 @@ class TestEventDetectorHandler:
                 {"eventName": "INSERT", "dynamodb": {"SequenceNumber": "2"}}
             ]
         }
-        context = Mock()
+        context = _context()
 
         result = lambda_handler(event, context)
 
         assert len(result["batchItemFailures"]) == 1
         assert result["batchItemFailures"][0]["itemIdentifier"] == "2"
 
+    @patch("functions.event_detector.release_event_processed")
+    @patch("functions.event_detector.reserve_stream_readings")
+    @patch("functions.event_detector.process_stream_record")
+    def test_lambda_handler_stops_before_deadline(self, mock_process, mock_reserve, mock_release):
+        """Test records past the deadline fail and their reservations are released."""
+        mock_reserve.return_value = {"batch-123#1": True, "batch-123#2": False}
+
+        event = {
+            "Records": [
+                {"eventName": "INSERT", "dynamodb": {"SequenceNumber": "1"}},
+                {"eventName": "INSERT", "dynamodb": {"SequenceNumber": "2"}}
+            ]
+        }
+
+        result = lambda_handler(event, _context(remaining_ms=1000))
+
+        mock_process.assert_not_called()
+        assert result == {"batchItemFailures": [{"itemIdentifier": "1"}, {"itemIdentifier": "2"}]}
+        mock_release.assert_called_once_with("batch-123#1")
+
+    @patch("functions.event_detector.release_event_processed")
+    @patch("functions.event_detector.reserve_stream_readings")
+    def test_lambda_handler_releases_reservations_on_crash(self, mock_reserve, mock_release):
+        """Test reservations left by an unexpected error are released."""
+        mock_reserve.return_value = {"batch-123#1": True}
+
+        with patch("retry_utils.process_stream_batch_with_isolation", side_effect=RuntimeError("boom")):
+            with pytest.raises(RuntimeError):
+                lambda_handler({"Records": []}, _context())
+
+        mock_release.assert_called_once_with("batch-123#1")
+
     def test_process_stream_record_skips_remove_events(self):
         """Test that REMOVE events are skipped."""
         record = {
@@ -72,11 +110,25 @@ class TestEventDetectorHandler:
         # Should not raise an error
         process_stream_record(record)
 
+    @patch("functions.event_detector.mark_event_processed_if_absent")
+    @patch("functions.event_detector.detect_events_for_reading")
+    def test_process_stream_record_skips_missing_new_image(self, mock_detect, mock_mark):
+        """Test that records without a NewImage are skipped before the idempotency check."""
+        record = {
+            "eventName": "INSERT",
+            "dynamodb": {"SequenceNumber": "1"}
+        }
+
+        process_stream_record(record)
+
+        mock_mark.assert_not_called()
+        mock_detect.assert_not_called()
+
     @patch("functions.event_detector.extract_reading_from_stream_record")
-    @patch("functions.event_detector.is_event_processed")
+    @patch("functions.event_detector.mark_event_processed_if_absent")
     @patch("functions.event_detector.detect_events_for_reading")
     def test_process_stream_record_skips_already_processed(
-        self, mock_detect, mock_is_processed, mock_extract
+        self, mock_detect, mock_mark, mock_extract
     ):
         """Test that already processed readings are skipped."""
         mock_extract.return_value = {
@@ -84,7 +136,7 @@ class TestEventDetectorHandler:
             "batch_id": "batch-123",
             "timestamp_ms": 1704067200000
         }
-        mock_is_processed.return_value = True
+        mock_mark.return_value = False
 
         record = {
             "eventName": "INSERT",
@@ -99,12 +151,12 @@ class TestEventDetectorHandler:
         mock_detect.assert_not_called()
 
     @patch("functions.event_detector.extract_reading_from_stream_record")
-    @patch("functions.event_detector.is_event_processed")
+    @patch("functions.event_detector.mark_event_processed_if_absent")
     @patch("functions.event_detector.detect_events_for_reading")
     def test_process_stream_record_processes_new_reading(
-        self, mock_detect, mock_is_processed, mock_extract
+        self, mock_detect, mock_mark, mock_extract
     ):
-        """Test that new readings are processed."""
+        """Test that new readings are reserved and then processed."""
         reading = {
             "hardware_id": "device-001",
             "batch_id": "batch-123",
@@ -112,7 +164,7 @@ class TestEventDetectorHandler:
             "soil_moisture": 45.0
         }
         mock_extract.return_value = reading
-        mock_is_processed.return_value = False
+        mock_mark.return_value = True
 
         record = {
             "eventName": "INSERT",
@@ -123,22 +175,80 @@ class TestEventDetectorHandler:
 
         process_stream_record(record)
 
+        mock_mark.assert_called_once()
+        assert mock_mark.call_args[0][:2] == ("batch-123#1704067200000", "device-001")
+
         # Should call detect_events_for_reading
         mock_detect.assert_called_once()
         call_args = mock_detect.call_args[0]
         assert call_args[0] == reading
         assert call_args[1] == "batch-123#1704067200000"
 
+    @patch("functions.event_detector.extract_reading_from_stream_record")
+    @patch("functions.event_detector.release_event_processed")
     @patch("functions.event_detector.mark_event_processed_if_absent")
-    def test_detect_events_marks_as_processed(self, mock_mark):
-        """Test that readings are marked as processed."""
-        reading = {
+    @patch("functions.event_detector.detect_events_for_reading")
+    def test_process_stream_record_releases_mark_on_failure(
+        self, mock_detect, mock_mark, mock_release, mock_extract
+    ):
+        """Test that a failed reading is released so the stream retry reprocesses it."""
+        mock_extract.return_value = {
             "hardware_id": "device-001",
-            "timestamp_ms": 1704067200000,
-            "soil_moisture": 45.0
+            "batch_id": "batch-123",
+            "timestamp_ms": 1704067200000
+        }
+        mock_mark.return_value = True
+        mock_detect.side_effect = Exception("Test error")
+
+        record = {
+            "eventName": "INSERT",
+            "dynamodb": {
+                "NewImage": {"hardware_id": {"S": "device-001"}}
+            }
+        }
+
+        with pytest.raises(Exception):
+            process_stream_record(record)
+
+        mock_release.assert_called_once_with("batch-123#1704067200000")
+
+    @patch("functions.event_detector.extract_reading_from_stream_record")
+    @patch("functions.event_detector.mark_event_processed_if_absent")
+    @patch("functions.event_detector.detect_events_for_reading")
+    def test_process_stream_record_consumes_batch_reservation(
+        self, mock_detect, mock_mark, mock_extract
+    ):
+        """Test that a batch reservation is used once and a repeat falls back to a mark."""
+        mock_extract.return_value = {
+            "hardware_id": "device-001",
+            "batch_id": "batch-123",
+            "timestamp_ms": 1704067200000
         }
-        reading_id = "batch-123#1704067200000"
+        mock_mark.return_value = False
+        reservations = {"batch-123#1704067200000": True}
 
-        detect_events_for_reading(reading, reading_id)
+        record = {
+            "eventName": "INSERT",
+            "dynamodb": {
+                "NewImage": {"hardware_id": {"S": "device-001"}}
+            }
+        }
 
-        mock_mark.assert_called_once_with(reading_id, "device-001")
+        process_stream_record(record, reservations=reservations)
+        process_stream_record(record, reservations=reservations)
+
+        mock_detect.assert_called_once()
+        mock_mark.assert_called_once()
+        assert reservations == {}
+
+    @patch("shared.event_detection.commit_events_atomic")
+    @patch("shared.event_detection.run_all_detectors")
+    @patch("shared.event_detection.get_recent_readings", return_value=[])
+    def test_detect_events_raises_when_commit_fails(self, mock_recent, mock_detectors, mock_commit):
+        """Test that a failed commit propagates so the reading is released and retried."""
+        mock_detectors.return_value = [("watering", Mock())]
+        mock_commit.side_effect = Exception("TransactionConflict")
+        reading = {"hardware_id": "device-001", "batch_id": "batch-123", "timestamp_ms": 1704067200000}
+
+        with pytest.raises(Exception):
+            detect_events_for_reading(reading, "batch-123#1704067200000", critical_queue=[], now_ms=1704067200000)
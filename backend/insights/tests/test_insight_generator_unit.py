@@ -0,0 +1,234 @@
+"""
+Unit tests for Insight Generator Lambda.
+"""
+
+import json
+import os
+from unittest.mock import MagicMock, Mock, patch
+
+from botocore.exceptions import ClientError
+
+# Set environment variable to disable tracing for tests
+os.environ["POWERTOOLS_TRACE_DISABLED"] = "true"
+
+from functions.insight_generator import (
+    InsightRequestType,
+    collect_insight_batches,
+    create_insight_requests,
+    generate_insights_for_batch,
+    lambda_handler,
+    submit_scheduled_insight_batch,
+    validate_and_sanitize_insight
+)
+
+
+class TestValidateAndSanitizeInsight:
+    """Tests for disease keyword sanitization of LLM responses."""
+
+    def test_replaces_keywords_and_their_derived_forms(self):
+        """Test that words starting with a disease keyword are replaced."""
+        result = validate_and_sanitize_insight({
+            "summary": "Diseased leaves, rotting stems, moldy soil and bacterial spots."
+        })
+
+        assert result["summary"] == "condition leaves, condition stems, condition soil and condition spots."
+
+    def test_leaves_unrelated_words_alone(self):
+        """Test that allowed prefixes and mid-word matches are not replaced."""
+        summary = "Rotate the pot and add carrot peels to the compost."
+
+        result = validate_and_sanitize_insight({"summary": summary})
+
+        assert result["summary"] == summary
+
+    def test_sanitizes_recommendations(self):
+        """Test that recommendation actions and reasons are sanitized."""
+        result = validate_and_sanitize_insight({
+            "summary": "Soil is wet.",
+            "recommendations": [{"action": "Remove moldy leaves", "reason": "Fungus spreads infections"}]
+        })
+
+        assert result["recommendations"] == [
+            {"action": "Remove condition leaves", "reason": "condition spreads condition", "urgency": "low"}
+        ]
+        assert result["confidence"] == "low"
+        assert result["trend"] == "stable"
+
+
+@patch("functions.insight_generator.build_batch_insight_prompt", return_value="prompt")
+@patch("functions.insight_generator.fetch_insight_inputs", return_value={"valid_hours": 24, "profile": None})
+class TestGenerateInsightsForBatch:
+    """Tests for batched insight generation."""
+
+    @patch("functions.insight_generator.record_insight_generation_failure")
+    @patch("functions.insight_generator.generate_insight_for_device")
+    @patch("functions.insight_generator.call_llm_api", return_value=None)
+    def test_failed_llm_call_marks_devices_failed(
+        self, mock_llm, mock_single, mock_record_failure, mock_fetch, mock_prompt
+    ):
+        """Test that a failed batched call doesn't fall back to one call per device."""
+        result = generate_insights_for_batch(["device-1", "device-2"])
+
+        assert result == [None, None]
+        mock_llm.assert_called_once()
+        mock_single.assert_not_called()
+        assert mock_record_failure.call_count == 2
+
+    @patch("functions.insight_generator.summarize_insight_inputs", return_value={})
+    @patch("functions.insight_generator.store_generated_insight", return_value="insight-1")
+    @patch("functions.insight_generator.generate_insight_for_device", return_value="insight-2")
+    @patch("functions.insight_generator.call_llm_api")
+    def test_missing_entries_fall_back_per_device(
+        self, mock_llm, mock_single, mock_store, mock_summarize, mock_fetch, mock_prompt
+    ):
+        """Test that only devices missing from the response are generated individually."""
+        mock_llm.return_value = {"insights": [{"device_index": 0, "summary": "Soil is moist."}, "malformed"]}
+
+        result = generate_insights_for_batch(["device-1", "device-2"])
+
+        assert result == ["insight-1", "insight-2"]
+        mock_single.assert_called_once_with("device-2")
+
+
+def _inputs(valid_hours):
+    return {"valid_hours": valid_hours, "profile": None, "aggregates": [], "events": []}
+
+
+@patch("functions.insight_generator.LLM_API_KEY", "test-key")
+@patch("functions.insight_generator.summarize_insight_inputs", return_value={"valid_hours": 24})
+@patch("functions.insight_generator.build_insight_prompt", return_value="prompt")
+@patch("functions.insight_generator.store_generated_insight")
+@patch("functions.insight_generator.insight_batches_table")
+@patch("functions.insight_generator.llm_session")
+class TestSubmitScheduledInsightBatch:
+    """Tests for submitting scheduled insights to the Batch API."""
+
+    @patch("functions.insight_generator.fetch_insight_inputs")
+    def test_submits_batch_then_stores_low_data_devices(
+        self, mock_fetch, mock_session, mock_batches, mock_store, mock_prompt, mock_summarize
+    ):
+        """Test that prompted devices are recorded and low-data devices stored."""
+        mock_fetch.side_effect = lambda hardware_id: _inputs(24 if hardware_id == "device-1" else 0)
+        mock_session.post.return_value.json.side_effect = [{"id": "file-1"}, {"id": "batch-1"}]
+
+        assert submit_scheduled_insight_batch(["device-1", "device-2"]) is True
+
+        item = mock_batches.put_item.call_args.kwargs["Item"]
+        assert item["batch_id"] == "batch-1"
+        assert list(item["devices"]) == ["device-1"]
+        mock_store.assert_called_once()
+        assert mock_store.call_args.args[0] == "device-2"
+
+    @patch("functions.insight_generator.fetch_insight_inputs")
+    def test_failed_submission_stores_nothing(
+        self, mock_fetch, mock_session, mock_batches, mock_store, mock_prompt, mock_summarize
+    ):
+        """Test that a failed upload leaves every device, low-data ones included, to the fallback."""
+        mock_fetch.side_effect = lambda hardware_id: _inputs(24 if hardware_id == "device-1" else 0)
+        mock_session.post.return_value.raise_for_status.side_effect = Exception("upload rejected")
+
+        assert submit_scheduled_insight_batch(["device-1", "device-2"]) is False
+
+        mock_batches.put_item.assert_not_called()
+        mock_store.assert_not_called()
+
+
+@patch("functions.insight_generator.create_insight_requests")
+@patch("functions.insight_generator.fetch_device_profile", return_value=None)
+@patch("functions.insight_generator.store_generated_insight")
+@patch("functions.insight_generator.insights_table")
+@patch("functions.insight_generator.insight_batches_table")
+@patch("functions.insight_generator.llm_session")
+class TestCollectInsightBatches:
+    """Tests for collecting finished Batch API jobs."""
+
+    def _setup(self, mock_session, mock_batches):
+        mock_batches.query.return_value = {"Items": [{
+            "batch_id": "batch-1",
+            "devices": {"device-1": {"valid_hours": 24}, "device-2": {"valid_hours": 24}}
+        }]}
+        status = Mock()
+        status.json.return_value = {"status": "completed", "output_file_id": "file-2"}
+        output = Mock()
+        output.content = json.dumps({
+            "custom_id": "device-1",
+            "response": {"body": {"choices": [{"message": {"content": json.dumps({"summary": "Soil is moist."})}}]}}
+        }).encode()
+        mock_session.get.side_effect = [status, output]
+
+    def test_stores_results_and_requeues_missing_devices(
+        self, mock_session, mock_batches, mock_insights, mock_store, mock_profile, mock_requests
+    ):
+        """Test that stored devices are counted and the rest are re-queued once."""
+        self._setup(mock_session, mock_batches)
+
+        counts = collect_insight_batches()
+
+        assert counts == {"batches_collected": 1, "insights_stored": 1, "devices_requeued": 1}
+        mock_requests.assert_called_once()
+        assert mock_requests.call_args.args[0] == ["device-2"]
+        update = mock_batches.update_item.call_args.kwargs
+        assert update["ConditionExpression"] == "#status = :submitted"
+        assert update["ExpressionAttributeValues"][":status"] == "collected"
+
+    def test_failed_flush_requeues_every_device(
+        self, mock_session, mock_batches, mock_insights, mock_store, mock_profile, mock_requests
+    ):
+        """Test that insights lost in a failed flush are re-queued instead of counted."""
+        self._setup(mock_session, mock_batches)
+        writer = MagicMock()
+        writer.__exit__.side_effect = ClientError({"Error": {"Code": "InternalServerError"}}, "BatchWriteItem")
+        mock_insights.batch_writer.return_value = writer
+
+        counts = collect_insight_batches()
+
+        assert counts["insights_stored"] == 0
+        assert mock_requests.call_args.args[0] == ["device-1", "device-2"]
+
+    def test_already_collected_batch_is_not_requeued(
+        self, mock_session, mock_batches, mock_insights, mock_store, mock_profile, mock_requests
+    ):
+        """Test that a batch another poll already settled doesn't re-queue its devices."""
+        self._setup(mock_session, mock_batches)
+        mock_batches.update_item.side_effect = ClientError(
+            {"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem"
+        )
+
+        counts = collect_insight_batches()
+
+        assert counts["batches_collected"] == 0
+        mock_requests.assert_not_called()
+
+
+class TestScheduledHandler:
+    """Tests for the scheduled insight generation invocation."""
+
+    @patch("functions.insight_generator.create_insight_requests", return_value=2)
+    @patch("functions.insight_generator.submit_scheduled_insight_batch", return_value=False)
+    @patch("functions.insight_generator.get_active_devices", return_value=["device-1", "device-2"])
+    def test_failed_submission_falls_back_to_requests(self, mock_active, mock_submit, mock_requests):
+        """Test that a chunk whose batch can't be submitted gets InsightRequests."""
+        response = lambda_handler({"source": "aws.events"}, Mock())
+
+        body = json.loads(response["body"])
+        assert body["devices_batched"] == 0
+        assert body["requests_created"] == 2
+        assert mock_requests.call_args.args[0] == ["device-1", "device-2"]
+
+
+class TestCreateInsightRequests:
+    """Tests for creating InsightRequest items."""
+
+    @patch("functions.insight_generator.insight_requests_table")
+    def test_counts_requests_once_flushed(self, mock_table):
+        """Test every queued request is counted after a clean flush."""
+        assert create_insight_requests(["device-1", "device-2"], InsightRequestType.SCHEDULED) == 2
+
+    @patch("functions.insight_generator.insight_requests_table")
+    def test_failed_flush_counts_nothing(self, mock_table):
+        """Test requests lost in a failed flush are not reported as created."""
+        writer = MagicMock()
+        writer.__exit__.side_effect = ClientError({"Error": {"Code": "InternalServerError"}}, "BatchWriteItem")
+        mock_table.batch_writer.return_value = writer
+
+        assert create_insight_requests(["device-1", "device-2"], InsightRequestType.SCHEDULED) == 0
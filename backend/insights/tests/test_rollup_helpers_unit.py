@@ -5,8 +5,15 @@ Tests bucket alignment, key generation, and TTL calculation.
 """
 
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
 from shared.rollup_helpers import (
+    BatchAccumulator,
+    build_rollup_update,
+    distinct_slot,
+    estimate_distinct_count,
     align_to_minute,
     align_to_hour_bucket,
     generate_bucket_key,
@@ -15,7 +22,8 @@ from shared.rollup_helpers import (
     get_minute_bucket,
     get_hour_bucket,
     MINUTE_BUCKET_TTL_DAYS,
-    HOUR_BUCKET_TTL_DAYS
+    HOUR_BUCKET_TTL_DAYS,
+    TRANSACT_WRITE_MAX_ITEMS
 )
 
 
@@ -159,3 +167,151 @@ class TestTTLCalculation:
         # Milliseconds would be 13 digits
         assert len(str(ttl)) <= 11  # Allow for future timestamps
         assert len(str(ttl)) >= 10  # Current timestamps are 10 digits
+
+
+class TestRollupUpdates:
+    """Test counter update construction and batch accumulation."""
+
+    def test_build_rollup_update_uses_add_for_counters(self):
+        """Test count and sum increments are ADD actions with static attributes SET."""
+        update = build_rollup_update(
+            "plant_rollups", "minute", 1705318380000, "pipeline_lag_seconds_sum", sum_increment=1.5
+        )
+
+        assert update["UpdateExpression"].startswith("ADD #count :count_inc, #sum :sum_inc SET ")
+        assert update["Key"] == {
+            "bucket_key": {"S": "minute#1705318380000"},
+            "metric_key": {"S": "pipeline_lag_seconds_sum#"}
+        }
+        assert update["ExpressionAttributeValues"][":count_inc"] == {"N": "1"}
+        assert update["ExpressionAttributeValues"][":sum_inc"] == {"N": "1.5"}
+
+    def test_accumulator_merges_identical_counters(self):
+        """Test increments for the same counter collapse into one update."""
+        accumulator = BatchAccumulator()
+        for _ in range(50):
+            accumulator.add("minute", 1705318380000, "readings_ingested_count")
+        accumulator.add("minute", 1705318380000, "events_detected_count", dimensions={"event_type": "a"})
+        accumulator.add("minute", 1705318380000, "events_detected_count", dimensions={"event_type": "b"})
+
+        updates = accumulator.build_updates("plant_rollups")
+
+        assert len(updates) == 3
+        assert accumulator.increments == 52
+        ingested = next(u for u in updates if u["Key"]["metric_key"]["S"] == "readings_ingested_count#")
+        assert ingested["ExpressionAttributeValues"][":count_inc"] == {"N": "50"}
+
+    def test_accumulator_unions_distinct_slots(self):
+        """Test distinct-count slots are unioned and written with a set ADD."""
+        accumulator = BatchAccumulator()
+        accumulator.add("minute", 1705318380000, "devices_reporting_count", count_increment=2,
+                        slots={distinct_slot("dev-a"), distinct_slot("dev-b")})
+        accumulator.add("minute", 1705318380000, "devices_reporting_count", count_increment=1,
+                        slots={distinct_slot("dev-a")})
+
+        update, = accumulator.build_updates("plant_rollups")
+
+        assert update["UpdateExpression"].startswith("ADD #count :count_inc, #slots :slots_inc SET ")
+        assert update["ExpressionAttributeValues"][":count_inc"] == {"N": "3"}
+        assert len(update["ExpressionAttributeValues"][":slots_inc"]["NS"]) == len(
+            {distinct_slot("dev-a"), distinct_slot("dev-b")}
+        )
+
+    def test_distinct_estimate_from_slot_count(self):
+        """Test the linear-counting estimate tracks small counts and stays finite when saturated."""
+        assert estimate_distinct_count(0) == 0
+        assert estimate_distinct_count(100) == 100
+        assert estimate_distinct_count(8000) > 8000
+        assert estimate_distinct_count(2 ** 14) == estimate_distinct_count(2 ** 14 - 1)
+
+    def test_build_updates_drops_no_op_counters(self):
+        """Test a counter with a zero merged delta is not written."""
+        accumulator = BatchAccumulator()
+        accumulator.add("minute", 1705318380000, "devices_reporting_count", count_increment=0)
+        accumulator.add("minute", 1705318380000, "readings_ingested_count")
+
+        updates = accumulator.build_updates("plant_rollups")
+
+        assert [u["Key"]["metric_key"]["S"] for u in updates] == ["readings_ingested_count#"]
+
+    def test_export_and_merge_deltas_round_trip(self):
+        """Test exported deltas survive JSON and merge into another accumulator."""
+        import json
+
+        source = BatchAccumulator()
+        source.add("minute", 1705318380000, "pipeline_lag_seconds_sum", sum_increment=1.5)
+        source.add("minute", 1705318380000, "events_detected_count", dimensions={"event_type": "a"})
+        deltas = json.loads(json.dumps(source.export_deltas()))
+
+        target = BatchAccumulator()
+        for delta in deltas + deltas:
+            target.add_delta(delta)
+
+        assert len(source) == 0
+        assert {u["Key"]["metric_key"]["S"]: u["ExpressionAttributeValues"][":count_inc"]
+                for u in target.build_updates("plant_rollups")} == {
+            "pipeline_lag_seconds_sum#": {"N": "2"},
+            "events_detected_count#event_type=a": {"N": "2"}
+        }
+
+    def test_flush_chunks_transactions_and_resets(self):
+        """Test flush writes in TransactWriteItems chunks and empties the accumulator."""
+        accumulator = BatchAccumulator()
+        for minute in range(TRANSACT_WRITE_MAX_ITEMS + 1):
+            accumulator.add("minute", minute * 60000, "readings_ingested_count")
+        client = MagicMock()
+
+        written = accumulator.flush(client, "plant_rollups")
+
+        assert written == TRANSACT_WRITE_MAX_ITEMS + 1
+        assert client.transact_write_items.call_count == 2
+        assert len(accumulator) == 0
+
+    def test_flush_falls_back_to_individual_updates(self):
+        """Test a rejected transaction is retried as individual updates."""
+        accumulator = BatchAccumulator()
+        accumulator.add("minute", 1705318380000, "readings_ingested_count")
+        accumulator.add("hour", 1705316400000, "readings_ingested_count")
+        client = MagicMock()
+        client.transact_write_items.side_effect = ClientError(
+            {"Error": {"Code": "TransactionCanceledException", "Message": "conflict"}},
+            "TransactWriteItems"
+        )
+
+        written = accumulator.flush(client, "plant_rollups")
+
+        assert written == 2
+        assert client.update_item.call_count == 2
+
+    def test_flush_raises_when_an_individual_update_fails(self):
+        """Test a counter that can't be written fails the flush after the rest are attempted."""
+        accumulator = BatchAccumulator()
+        accumulator.add("minute", 1705318380000, "readings_ingested_count")
+        accumulator.add("hour", 1705316400000, "readings_ingested_count")
+        client = MagicMock()
+        client.transact_write_items.side_effect = ClientError(
+            {"Error": {"Code": "TransactionCanceledException", "Message": "conflict"}},
+            "TransactWriteItems"
+        )
+        client.update_item.side_effect = [
+            ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "UpdateItem"),
+            None
+        ]
+
+        with pytest.raises(ClientError):
+            accumulator.flush(client, "plant_rollups")
+
+        assert client.update_item.call_count == 2
+
+    def test_flush_with_executor_writes_every_chunk(self):
+        """Test concurrent flush writes every chunk and reports the total."""
+        accumulator = BatchAccumulator()
+        for minute in range(TRANSACT_WRITE_MAX_ITEMS * 2 + 5):
+            accumulator.add("minute", minute * 60000, "readings_ingested_count")
+        client = MagicMock()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            written = accumulator.flush(client, "plant_rollups", executor=executor)
+
+        assert written == TRANSACT_WRITE_MAX_ITEMS * 2 + 5
+        assert client.transact_write_items.call_count == 3
@@ -0,0 +1,157 @@
+"""
+Unit tests for Rollup Updater Lambda handlers.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+import os
+
+# Set environment variable to disable tracing for tests
+os.environ["POWERTOOLS_TRACE_DISABLED"] = "true"
+
+from botocore.exceptions import ClientError
+from functions.rollup_updater import (
+    _STREAM_ROUTES,
+    BatchContext,
+    lambda_handler,
+    process_aggregate_metrics,
+    process_event_metrics,
+    publish_rollup_deltas,
+    queue_handler,
+    resolve_stream_route
+)
+
+
+class TestRollupUpdaterHandler:
+    """Tests for the stream handler."""
+
+    @patch("functions.rollup_updater.process_stream_record")
+    @patch("functions.rollup_updater.dynamodb_client")
+    def test_flush_failure_fails_the_batch(self, mock_client, mock_process):
+        """Test counters that can't be written make the stream redeliver the batch."""
+        def record_counter(record, ctx):
+            ctx.accumulator.add("minute", 1705318380000, "readings_ingested_count")
+
+        mock_process.side_effect = record_counter
+        mock_client.transact_write_items.side_effect = ClientError(
+            {"Error": {"Code": "InternalServerError"}}, "TransactWriteItems"
+        )
+        mock_client.update_item.side_effect = ClientError(
+            {"Error": {"Code": "InternalServerError"}}, "UpdateItem"
+        )
+        event = {"Records": [{"eventName": "INSERT", "dynamodb": {"SequenceNumber": "1"}}]}
+
+        with pytest.raises(ClientError):
+            lambda_handler(event, Mock())
+
+
+class TestResolveStreamRoute:
+    """Tests for routing stream records to metric processors."""
+
+    def test_tokens_are_checked_in_priority_order(self):
+        """Test a stack prefix containing a later token doesn't change the route."""
+        arn = "arn:aws:dynamodb:us-east-1:123456789012:table/plant-insights-DeviceReadingsTable-ABC/stream/2024"
+        aggregates_arn = "arn:aws:dynamodb:us-east-1:123456789012:table/plant-insights-PlantAggregatesTable-ABC/stream/2024"
+
+        assert resolve_stream_route(arn) is _STREAM_ROUTES["reading"]
+        assert resolve_stream_route(aggregates_arn) is _STREAM_ROUTES["aggregate"]
+
+    def test_unknown_table_has_no_route(self):
+        """Test tables without a known token are not routed."""
+        arn = "arn:aws:dynamodb:us-east-1:123456789012:table/plant-rollups/stream/2024"
+
+        assert resolve_stream_route(arn) is None
+
+
+class TestTimestampFallback:
+    """Tests for choosing the bucket timestamp of event and aggregate records."""
+
+    def test_zero_event_created_at_falls_back_to_start_time(self):
+        """Test an event stored with created_at_ms 0 is bucketed by its start time."""
+        ctx = BatchContext()
+
+        process_event_metrics(
+            {"event_type": "Watering_Event", "created_at_ms": 0, "start_time_ms": 1705318380000},
+            "INSERT",
+            ctx
+        )
+
+        buckets = {delta["bucket_start_ms"] for delta in ctx.accumulator.export_deltas()}
+        assert 1705318380000 in buckets
+
+    def test_zero_aggregate_computed_at_falls_back_to_window_start(self):
+        """Test an aggregate stored with computed_at_ms 0 is bucketed by its window start."""
+        ctx = BatchContext()
+
+        process_aggregate_metrics(
+            {"window_type": "hourly", "computed_at_ms": 0, "window_start_ms": 1705318380000},
+            "INSERT",
+            ctx
+        )
+
+        buckets = {delta["bucket_start_ms"] for delta in ctx.accumulator.export_deltas()}
+        assert 1705318380000 in buckets
+
+
+class TestPublishRollupDeltas:
+    """Tests for publishing counter deltas to the rollup queue."""
+
+    def _deltas(self):
+        return [{"bucket_type": "minute", "bucket_start_ms": 1705318380000,
+                 "metric_name": "readings_ingested_count", "dimensions": {}, "count": 1}]
+
+    @patch("functions.rollup_updater.time.sleep")
+    @patch("functions.rollup_updater.sqs_client")
+    def test_failed_entries_are_resent(self, mock_sqs, mock_sleep):
+        """Test entries SQS rejects are sent again."""
+        mock_sqs.send_message_batch.side_effect = [{"Failed": [{"Id": "0"}]}, {}]
+
+        assert publish_rollup_deltas(self._deltas()) == 1
+        assert mock_sqs.send_message_batch.call_count == 2
+
+    @patch("functions.rollup_updater.time.sleep")
+    @patch("functions.rollup_updater.sqs_client")
+    def test_persistent_failure_raises(self, mock_sqs, mock_sleep):
+        """Test deltas that never publish fail the call instead of being dropped."""
+        mock_sqs.send_message_batch.return_value = {"Failed": [{"Id": "0"}]}
+
+        with pytest.raises(RuntimeError):
+            publish_rollup_deltas(self._deltas())
+
+
+class TestQueueHandler:
+    """Tests for the rollup delta queue handler."""
+
+    @patch("functions.rollup_updater.dynamodb_client")
+    def test_flush_failure_returns_every_message(self, mock_client):
+        """Test a partial flush returns all messages for redelivery."""
+        mock_client.transact_write_items.side_effect = ClientError(
+            {"Error": {"Code": "InternalServerError"}}, "TransactWriteItems"
+        )
+        mock_client.update_item.side_effect = ClientError(
+            {"Error": {"Code": "InternalServerError"}}, "UpdateItem"
+        )
+        body = '[{"bucket_type": "minute", "bucket_start_ms": 1705318380000, ' \
+            '"metric_name": "readings_ingested_count", "dimensions": {}, "count": 2}]'
+        event = {"Records": [
+            {"messageId": "m-1", "body": body},
+            {"messageId": "m-2", "body": body}
+        ]}
+
+        result = queue_handler(event, Mock())
+
+        assert result == {"batchItemFailures": [{"itemIdentifier": "m-1"}, {"itemIdentifier": "m-2"}]}
+
+    @patch("functions.rollup_updater.dynamodb_client")
+    def test_malformed_message_merges_none_of_its_deltas(self, mock_client):
+        """Test valid deltas in a message with a malformed one aren't written."""
+        body = '[{"bucket_type": "minute", "bucket_start_ms": 1705318380000, ' \
+            '"metric_name": "readings_ingested_count", "dimensions": {}, "count": 2}, ' \
+            '{"bucket_type": "minute"}]'
+        event = {"Records": [{"messageId": "m-1", "body": body}]}
+
+        result = queue_handler(event, Mock())
+
+        assert result == {"batchItemFailures": [{"itemIdentifier": "m-1"}]}
+        mock_client.transact_write_items.assert_not_called()
+        mock_client.update_item.assert_not_called()
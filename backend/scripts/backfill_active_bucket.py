@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Backfill the active_bucket attribute on existing device status rows.
+
+The device status updater sets active_bucket (the UTC day of the last
+ingest) on every reading, but rows last written before ActiveDevicesIndex
+was added don't carry it. Until such a device reports again, the scheduled
+insight run can't find it. This script scans the device status table and
+sets the attribute from last_seen_ingest_time_ms wherever it is missing.
+
+Usage:
+    python backfill_active_bucket.py --table plant_device_status [--dry-run]
+
+Options:
+    --table     Name of the device status table
+    --dry-run   Count the rows that need the attribute without writing
+"""
+
+import argparse
+import sys
+from datetime import datetime, timezone
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+
+def active_bucket(ingest_time_ms: int) -> str:
+    """
+    Derive the UTC day bucket ("YYYY-MM-DD") for an ingest timestamp.
+
+    Matches derive_active_bucket in the device status updater.
+
+    Args:
+        ingest_time_ms: Ingest timestamp in milliseconds
+
+    Returns:
+        Day bucket string
+    """
+    return datetime.fromtimestamp(int(ingest_time_ms) / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def backfill(table_name: str, dry_run: bool = False) -> int:
+    """
+    Set active_bucket on every device status row that is missing it.
+
+    Args:
+        table_name: Device status table name
+        dry_run: Only count the rows that need the attribute
+
+    Returns:
+        Number of rows updated (or that would be updated on a dry run)
+    """
+    table = boto3.resource('dynamodb').Table(table_name)
+    scan_kwargs = {
+        'FilterExpression': Attr('active_bucket').not_exists() & Attr('last_seen_ingest_time_ms').exists(),
+        'ProjectionExpression': 'hardware_id, last_seen_ingest_time_ms'
+    }
+    updated = 0
+
+    while True:
+        response = table.scan(**scan_kwargs)
+
+        for item in response.get('Items', []):
+            if dry_run:
+                updated += 1
+                continue
+
+            try:
+                table.update_item(
+                    Key={'hardware_id': item['hardware_id']},
+                    UpdateExpression='SET active_bucket = :bucket',
+                    # Skip rows the status updater has written since the scan
+                    ConditionExpression='attribute_exists(hardware_id) AND attribute_not_exists(active_bucket)',
+                    ExpressionAttributeValues={
+                        ':bucket': active_bucket(item['last_seen_ingest_time_ms'])
+                    }
+                )
+                updated += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    return updated
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Backfill active_bucket on device status rows')
+    parser.add_argument('--table', required=True, help='Name of the device status table')
+    parser.add_argument('--dry-run', action='store_true', help='Count rows without writing')
+    args = parser.parse_args()
+
+    count = backfill(args.table, args.dry_run)
+    action = 'need' if args.dry_run else 'updated'
+    print(f"{count} device status rows {action} active_bucket")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Backfill the event_type_start_time key on existing plant events.
+
+Events written before DeviceEventTypeIndex was added don't carry the key,
+so the low-moisture "last watering" lookup can't see them. This script
+scans the events table and sets the key on every event that is missing it.
+
+The updates produce MODIFY stream records; the rollup updater only counts
+INSERT events, so rerunning the backfill doesn't skew the event rollups.
+
+Usage:
+    python backfill_event_type_keys.py --table plant_events [--dry-run]
+
+Options:
+    --table     Name of the plant events table
+    --dry-run   Count the events that need the key without writing
+"""
+
+import argparse
+import os
+import sys
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'insights', 'shared'))
+
+from models import event_type_time_key
+
+
+def backfill(table_name: str, dry_run: bool = False) -> int:
+    """
+    Set event_type_start_time on every event that is missing it.
+
+    Args:
+        table_name: Plant events table name
+        dry_run: Only count the events that need the key
+
+    Returns:
+        Number of events updated (or that would be updated on a dry run)
+    """
+    table = boto3.resource('dynamodb').Table(table_name)
+    scan_kwargs = {
+        'FilterExpression': Attr('event_type_start_time').not_exists(),
+        'ProjectionExpression': 'hardware_id, start_time_ms, event_type'
+    }
+    updated = 0
+
+    while True:
+        response = table.scan(**scan_kwargs)
+
+        for item in response.get('Items', []):
+            if dry_run:
+                updated += 1
+                continue
+
+            try:
+                table.update_item(
+                    Key={'hardware_id': item['hardware_id'], 'start_time_ms': item['start_time_ms']},
+                    UpdateExpression='SET event_type_start_time = :key',
+                    # Skip events deleted or written with the key since the scan
+                    ConditionExpression='attribute_exists(hardware_id) AND attribute_not_exists(event_type_start_time)',
+                    ExpressionAttributeValues={
+                        ':key': event_type_time_key(item['event_type'], item['start_time_ms'])
+                    }
+                )
+                updated += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    return updated
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Backfill event_type_start_time on plant events')
+    parser.add_argument('--table', required=True, help='Name of the plant events table')
+    parser.add_argument('--dry-run', action='store_true', help='Count events without writing')
+    args = parser.parse_args()
+
+    count = backfill(args.table, args.dry_run)
+    action = 'need' if args.dry_run else 'updated'
+    print(f"{count} events {action} event_type_start_time")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -281,10 +281,13 @@ async fn update_device_status(
     // Derive health_category based on last_seen_ingest_time
     let health_category = derive_health_category(reading.ingest_time_ms, now_ms);
 
+    // Day bucket keys the ActiveDevicesIndex GSI used by the insight generator
+    let active_bucket = derive_active_bucket(reading.ingest_time_ms);
+
     // Build update expression for field-owned updates
     // Status Updater owns: last_seen_event_time_ms, last_seen_ingest_time_ms,
     // ingest_event_skew_seconds, pipeline_lag_seconds, expected_interval_sec,
-    // sensor_status_summary, health_category, updated_at_ms
+    // sensor_status_summary, health_category, active_bucket, updated_at_ms
     let update_expression = "SET \
         last_seen_event_time_ms = :event_time, \
         last_seen_ingest_time_ms = :ingest_time, \
@@ -294,6 +297,7 @@ async fn update_device_status(
         last_processed_event_time_ms = :event_time, \
         sensor_status_summary = :sensor_summary, \
         health_category = :health_cat, \
+        active_bucket = :active_bucket, \
         updated_at_ms = :now";
 
     let mut expression_values = HashMap::new();
@@ -325,6 +329,10 @@ async fn update_device_status(
         ":health_cat".to_string(),
         aws_sdk_dynamodb::types::AttributeValue::S(health_category.to_string()),
     );
+    expression_values.insert(
+        ":active_bucket".to_string(),
+        aws_sdk_dynamodb::types::AttributeValue::S(active_bucket),
+    );
     expression_values.insert(
         ":now".to_string(),
         aws_sdk_dynamodb::types::AttributeValue::N(now_ms.to_string()),
@@ -396,6 +404,14 @@ fn derive_health_category(last_seen_ingest_time_ms: i64, now_ms: i64) -> &'stati
     }
 }
 
+/// Derive the UTC day bucket ("YYYY-MM-DD") for an ingest timestamp
+fn derive_active_bucket(ingest_time_ms: i64) -> String {
+    chrono::DateTime::from_timestamp_millis(ingest_time_ms)
+        .unwrap_or_default()
+        .format("%Y-%m-%d")
+        .to_string()
+}
+
 /// Record an error in device status
 /// This helper can be used by all pipelines to track errors
 pub async fn record_device_error(